@@ -0,0 +1,97 @@
+import json
+import os
+import sys
+import threading
+import time
+
+# Lazy, fork-aware Firestore initialization.
+# Importing firebase_admin and opening the client takes seconds on a cold
+# instance, so it runs on a background thread after the server is up:
+# /healthz answers at once and requests that need the database wait for it.
+#
+# The firebase_admin app (parsed credentials) is plain Python state and may be
+# created before gunicorn forks (GUNICORN_PRELOAD=1). The Firestore client
+# holds gRPC channels, which must not cross a fork, so it is always created in
+# the process that uses it: a client made in another pid is never reused.
+
+
+class FirestoreBackend:
+    def __init__(self, credentials_env="FIREBASE_CREDENTIALS_JSON"):
+        self.credentials_env = credentials_env
+        self._lock = threading.Lock()
+        self._pid = None
+        self._ready = threading.Event()
+        self._client = None
+        self.state = "idle"     # idle -> starting -> ready | failed | unconfigured
+        self.error = None
+        self.init_seconds = None
+
+    @property
+    def configured(self):
+        return bool(os.environ.get(self.credentials_env))
+
+    def prepare(self):
+        """Imports firebase_admin and initializes the app without opening a client (safe before fork)."""
+        import firebase_admin
+        from firebase_admin import credentials
+
+        if not firebase_admin._apps:
+            service_account_info = json.loads(os.environ[self.credentials_env])
+            firebase_admin.initialize_app(credentials.Certificate(service_account_info))
+
+    def start(self):
+        """Starts initializing the client in the background (once per process)."""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._ready = threading.Event()
+            self._client = None
+            self.error = None
+            self.init_seconds = None
+            if not self.configured:
+                self.state = "unconfigured"
+                print(f"CRITICAL: {self.credentials_env} not found. DB connection failed.", file=sys.stderr)
+                self._ready.set()
+                return
+            self.state = "starting"
+        threading.Thread(target=self._initialize, name="firestore-init", daemon=True).start()
+
+    def _initialize(self):
+        started = time.perf_counter()
+        try:
+            self.prepare()
+            from firebase_admin import firestore
+
+            self._client = firestore.client()
+            self.state = "ready"
+            print("INFO: Firebase initialized securely.", file=sys.stderr)
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            print(f"FATAL ERROR during Firebase init: {e}", file=sys.stderr)
+        finally:
+            self.init_seconds = time.perf_counter() - started
+            self._ready.set()
+
+    def client(self, timeout=30.0):
+        """The Firestore client, waiting up to `timeout` s for initialization; None if unavailable."""
+        self.start()
+        self._ready.wait(timeout)
+        return self._client
+
+    def warm(self):
+        """Opens the client's connection with one cheap read; returns seconds taken."""
+        db = self.client()
+        if db is None:
+            return None
+        started = time.perf_counter()
+        list(db.collection("leaderboard").limit(1).stream())
+        return time.perf_counter() - started
+
+    def status(self):
+        return {
+            "state": self.state,
+            "init_seconds": round(self.init_seconds, 3) if self.init_seconds is not None else None,
+            "error": self.error,
+        }
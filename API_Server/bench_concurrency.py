@@ -0,0 +1,183 @@
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from single_flight import SingleFlight
+
+# Concurrency benchmark for the serving modes in gunicorn.conf.py.
+# RUN : python bench_concurrency.py [--pollers 8] [--seconds 5]
+#
+# Needs no Firestore or Flask: a stand-in WSGI app mimics /leaderboard (one
+# slow query) and /submit_score (a read and a write) against a fake backend
+# that only sleeps. While N clients poll /leaderboard in a loop, one client
+# submits scores back to back, under three servers:
+#
+#   sync          one request at a time (gunicorn's default sync worker)
+#   gthread       a pool of request threads (gthread worker)
+#   gthread+sf    the same pool with /leaderboard queries coalesced
+#
+# The interesting numbers are submit latency and how many leaderboard
+# queries reached the backend.
+
+
+class FakeBackend:
+    def __init__(self, query_latency, read_latency, write_latency):
+        self.query_latency = query_latency
+        self.read_latency = read_latency
+        self.write_latency = write_latency
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    def leaderboard(self):
+        with self._lock:
+            self.queries += 1
+        time.sleep(self.query_latency)
+        return [{"username": f"player{i}", "total": 1000 - i} for i in range(50)]
+
+    def submit(self):
+        time.sleep(self.read_latency)
+        time.sleep(self.write_latency)
+
+
+def make_app(backend, coalesce):
+    flight = SingleFlight() if coalesce else None
+
+    def app(environ, start_response):
+        path = environ["PATH_INFO"]
+        if path == "/leaderboard":
+            rows = flight.do("leaderboard", backend.leaderboard) if flight else backend.leaderboard()
+            body = json.dumps(rows).encode()
+        elif path == "/submit_score":
+            length = int(environ.get("CONTENT_LENGTH") or 0)
+            environ["wsgi.input"].read(length)
+            backend.submit()
+            body = b'{"message": "ok"}'
+        else:
+            start_response("404 Not Found", [("Content-Type", "text/plain")])
+            return [b"not found"]
+        start_response("200 OK", [("Content-Type", "application/json"), ("Content-Length", str(len(body)))])
+        return [body]
+
+    return app
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class PooledWSGIServer(WSGIServer):
+    """WSGI server handing each connection to a fixed-size thread pool, like a gthread worker."""
+
+    threads = 16
+
+    def server_activate(self):
+        super().server_activate()
+        self.pool = ThreadPoolExecutor(self.threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else 0.0
+
+
+def run_mode(name, server_class, coalesce, args):
+    backend = FakeBackend(args.query_ms / 1000, args.read_ms / 1000, args.write_ms / 1000)
+    server = make_server("127.0.0.1", 0, make_app(backend, coalesce), server_class=server_class,
+                         handler_class=QuietHandler)
+    server.request_queue_size = 128
+    base = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    stop = threading.Event()
+    leaderboard_served = [0]
+    submit_latencies = []
+    lock = threading.Lock()
+
+    def poller():
+        while not stop.is_set():
+            try:
+                urllib.request.urlopen(base + "/leaderboard", timeout=30).read()
+            except OSError:
+                continue
+            with lock:
+                leaderboard_served[0] += 1
+
+    def submitter():
+        payload = json.dumps({"username": "bench", "score": 900, "maze_scores": {}}).encode()
+        while not stop.is_set():
+            started = time.perf_counter()
+            request = urllib.request.Request(base + "/submit_score", data=payload,
+                                             headers={"Content-Type": "application/json"})
+            try:
+                urllib.request.urlopen(request, timeout=30).read()
+            except OSError:
+                continue
+            submit_latencies.append(time.perf_counter() - started)
+
+    clients = [threading.Thread(target=poller) for _ in range(args.pollers)]
+    clients.append(threading.Thread(target=submitter))
+    for client in clients:
+        client.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for client in clients:
+        client.join()
+    server.shutdown()
+    server.server_close()
+
+    return {
+        "mode": name,
+        "submits_per_s": len(submit_latencies) / args.seconds,
+        "submit_p50_ms": percentile(submit_latencies, 0.5) * 1000,
+        "submit_p95_ms": percentile(submit_latencies, 0.95) * 1000,
+        "leaderboard_per_s": leaderboard_served[0] / args.seconds,
+        "backend_queries": backend.queries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serving-mode concurrency benchmark")
+    parser.add_argument("--pollers", type=int, default=8, help="clients polling /leaderboard")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, default=16, help="request threads for the gthread modes")
+    parser.add_argument("--query-ms", type=float, default=150, help="fake leaderboard query latency")
+    parser.add_argument("--read-ms", type=float, default=20, help="fake document read latency")
+    parser.add_argument("--write-ms", type=float, default=30, help="fake document write latency")
+    args = parser.parse_args()
+    PooledWSGIServer.threads = args.threads
+
+    results = [
+        run_mode("sync", WSGIServer, False, args),
+        run_mode("gthread", PooledWSGIServer, False, args),
+        run_mode("gthread+sf", PooledWSGIServer, True, args),
+    ]
+    print(f"{args.pollers} pollers, {args.threads} threads, query {args.query_ms:.0f} ms, "
+          f"submit {args.read_ms + args.write_ms:.0f} ms, {args.seconds:.0f} s per mode")
+    print(f"{'Mode':<12} {'Submits/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'Board/s':>8} {'Queries':>8}")
+    for r in results:
+        print(f"{r['mode']:<12} {r['submits_per_s']:>10.1f} {r['submit_p50_ms']:>8.0f} {r['submit_p95_ms']:>8.0f} "
+              f"{r['leaderboard_per_s']:>8.1f} {r['backend_queries']:>8}")
+
+
+if __name__ == "__main__":
+    main()
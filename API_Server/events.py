@@ -0,0 +1,39 @@
+import re
+
+# Event / season leaderboards.
+# Submissions that carry an "event" id are kept in their own collection,
+#   events/<event>/leaderboard/<username>
+# so concurrent competitions never write the same documents (or index ranges)
+# as each other or as the all-time board in 'leaderboard'.
+
+EVENT_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+KEY_SEPARATOR = "\x1f"   # joins event and username in write-behind buffer keys
+
+
+def normalize_event(value):
+    """The event id of a request ('' or None = all-time board); raises ValueError if malformed."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    if not EVENT_PATTERN.match(value):
+        raise ValueError(f"Invalid event id '{value}' (letters, digits, '.', '_', '-'; max 64).")
+    return value
+
+
+def leaderboard_collection(db, event):
+    if event is None:
+        return db.collection("leaderboard")
+    return db.collection("events").document(event).collection("leaderboard")
+
+
+def board_key(event, username):
+    """Write-behind key of a user's entry on a board; all-time keys stay the plain username."""
+    return username if event is None else f"{event}{KEY_SEPARATOR}{username}"
+
+
+def split_board_key(key):
+    """(event, username) for a board_key."""
+    event, separator, username = key.partition(KEY_SEPARATOR)
+    return (event, username) if separator else (None, key)
@@ -0,0 +1,25 @@
+import os
+
+# Gunicorn settings, used by the Procfile (gunicorn --config gunicorn.conf.py server:app).
+# gthread workers serve each request on a thread pool, so one worker keeps
+# many Firestore round trips in flight instead of blocking on each one the
+# way the default sync worker does. Tune per instance with env vars.
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+threads = int(os.environ.get("GUNICORN_THREADS", 16))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+keepalive = 5
+
+# GUNICORN_PRELOAD=1 imports the app (and parses the Firebase credentials) once
+# in the master, so forked workers start warm. The Firestore client and the
+# write-behind thread are not fork-safe and are started in each worker instead.
+preload_app = os.environ.get("GUNICORN_PRELOAD") == "1"
+
+
+def post_fork(server, worker):
+    if preload_app:
+        import server as app_module
+
+        app_module.start_worker()
@@ -0,0 +1,83 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+# Idempotent /submit_score.
+# The game sends a random "submission_id" with every score and reuses it on
+# retries. The first delivery of an id is recorded next to the score write as
+#   submissions/<submission_id>  {username, event, response, claimed_at, expires_at}
+# (created with create(), so a second delivery can never overwrite it), and
+# repeats get the recorded response back without touching the leaderboard.
+# In write-behind mode the id is recorded with its response before the score
+# is buffered, so a recorded id is never taken over. Records without a
+# response are claims left by older versions (which claimed first and answered
+# after buffering); one still unanswered after `claim_expired`'s max age
+# belongs to a delivery that died, and a retry may take it over.
+# A per-worker LRU answers most repeats without a database read. Old records
+# are removed by a Firestore TTL policy on 'expires_at':
+#   gcloud firestore fields ttls update expires_at --collection-group=submissions --enable-ttl
+
+SUBMISSION_ID = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+
+def normalize_submission_id(value):
+    """The request's submission id (None if it sent none); raises ValueError if malformed."""
+    if value is None or value == "":
+        return None
+    if not isinstance(value, str) or not SUBMISSION_ID.match(value):
+        raise ValueError("submission_id must be 8-64 letters, digits, '-' or '_'.")
+    return value
+
+
+def submission_record(username, event, response, ttl):
+    return {
+        "username": username,
+        "event": event,
+        "response": response,
+        "claimed_at": datetime.now(timezone.utc),
+        "expires_at": datetime.now(timezone.utc) + timedelta(seconds=ttl),
+    }
+
+
+def claim_expired(record, max_age):
+    """True for a claim that got no response within `max_age` seconds (its delivery never finished)."""
+    if record.get("response") is not None:
+        return False
+    claimed_at = record.get("claimed_at")
+    if claimed_at is None:   # recorded before claims were timestamped
+        return True
+    return datetime.now(timezone.utc) - claimed_at > timedelta(seconds=max_age)
+
+
+class DedupCache:
+    """Bounded LRU of submission id -> response, entries expiring after `ttl` seconds."""
+
+    def __init__(self, max_entries=10_000, ttl=3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, submission_id):
+        with self._lock:
+            entry = self._entries.get(submission_id)
+            if entry is None:
+                return None
+            expires, response = entry
+            if expires < time.monotonic():
+                del self._entries[submission_id]
+                return None
+            self._entries.move_to_end(submission_id)
+            return response
+
+    def put(self, submission_id, response):
+        with self._lock:
+            self._entries[submission_id] = (time.monotonic() + self.ttl, response)
+            self._entries.move_to_end(submission_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
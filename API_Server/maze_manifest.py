@@ -0,0 +1,52 @@
+import json
+import os
+import sys
+import threading
+
+# Read-only view of the maze manifest written by src/maze_catalog.py
+# (src/mazes/.catalog.json). The server is deployed on its own, so it reads
+# the manifest file instead of importing the catalog; the file is re-read only
+# when its mtime changes.
+
+
+class ManifestCache:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime_ns = None
+        self._mazes = []
+
+    def mazes(self):
+        """Manifest rows as dicts with 'file' added, in file-name order."""
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return self._mazes
+        with self._lock:
+            if mtime_ns != self._mtime_ns:
+                try:
+                    with open(self.path, "r") as f:
+                        files = json.load(f).get("files", {})
+                    self._mazes = [
+                        dict(entry, file=name) for name, entry in sorted(files.items()) if "error" not in entry
+                    ]
+                    self._mtime_ns = mtime_ns
+                except (OSError, ValueError) as e:
+                    print(f"WARNING: Could not read maze manifest {self.path}: {e}", file=sys.stderr)
+            return self._mazes
+
+    def find(self, key):
+        """Same lookup order as MazeCatalog.find: file/stem, maze name, then hash prefix."""
+        folded = key.strip().casefold()
+        mazes = self.mazes()
+        for maze in mazes:
+            if folded in (maze["file"].casefold(), os.path.splitext(maze["file"])[0].casefold()):
+                return maze
+        for maze in mazes:
+            if maze["name"] == key.strip():
+                return maze
+        if len(folded) >= 7:
+            for maze in mazes:
+                if maze["hash"].startswith(folded):
+                    return maze
+        return None
@@ -0,0 +1,149 @@
+import hashlib
+import math
+import threading
+import time
+from bisect import bisect_right
+
+from sharded_counters import accumulate
+
+# Per-maze score statistics, kept up to date by /submit_score.
+# Each completed maze adds one observation per metric (score, moves,
+# distance, time) to a state made only of sums and counts:
+#   count, sum, sum_sq        -> mean and standard deviation
+#   zero, bins {index: n}     -> quantile sketch with 2% relative error
+#   hist {bucket: n}          -> fixed-edge histogram for the dashboard
+# Because every field is additive, states merge by adding them up. That is
+# how the sharded counters store them (one Firestore Increment per field),
+# and how a worker adds its own submissions on top of the last load.
+
+METRICS = ("score", "moves", "distance", "time")   # order of a maze_scores entry
+RELATIVE_ACCURACY = 0.02
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+HISTOGRAM_EDGES = {
+    "score": (100, 200, 300, 400, 500, 600, 700, 800, 900),
+    "moves": (5, 10, 20, 30, 50, 75, 100, 150, 200),
+    "distance": (250, 500, 750, 1000, 1500, 2000, 3000, 5000),
+    "time": (5, 10, 20, 30, 60, 120, 300, 600),
+}
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def stats_counter_name(maze_name):
+    """Counter document id for a maze (names may contain '/')."""
+    return "maze:" + hashlib.sha1(maze_name.encode()).hexdigest()[:20]
+
+
+def bin_index(value):
+    """Sketch bin of a positive value: bin i holds (GAMMA^(i-1), GAMMA^i]."""
+    return math.ceil(math.log(value) / LOG_GAMMA)
+
+
+def observation(metrics):
+    """State delta for one maze result [score, moves, distance, time]."""
+    delta = {}
+    for name, value in zip(METRICS, metrics):
+        value = float(value)
+        if not math.isfinite(value):
+            raise ValueError(f"{name} is not a finite number")
+        entry = {
+            "count": 1,
+            "sum": value,
+            "sum_sq": value * value,
+            "hist": {str(bisect_right(HISTOGRAM_EDGES[name], value)): 1},
+        }
+        if value > 0:
+            entry["bins"] = {str(bin_index(value)): 1}
+        else:
+            entry["zero"] = 1
+        delta[name] = entry
+    return delta
+
+
+def quantiles(state, qs=QUANTILES):
+    """Sketch estimates (within RELATIVE_ACCURACY) of the given quantiles."""
+    count = state.get("count", 0)
+    if not count:
+        return {}
+    zero = state.get("zero", 0)
+    bins = sorted((int(index), n) for index, n in state.get("bins", {}).items())
+    estimates = {}
+    for q in qs:
+        rank = q * (count - 1)
+        seen = zero
+        value = 0.0
+        if rank >= zero:
+            for index, n in bins:
+                seen += n
+                if seen > rank:
+                    value = 2 * GAMMA ** index / (GAMMA + 1)
+                    break
+            else:
+                value = 2 * GAMMA ** bins[-1][0] / (GAMMA + 1) if bins else 0.0
+        estimates[f"p{round(q * 100)}"] = round(value, 2)
+    return estimates
+
+
+def histogram(name, state):
+    edges = HISTOGRAM_EDGES[name]
+    counts = state.get("hist", {})
+    return [
+        {
+            "from": edges[i - 1] if i else None,
+            "to": edges[i] if i < len(edges) else None,
+            "count": counts.get(str(i), 0),
+        }
+        for i in range(len(edges) + 1)
+    ]
+
+
+def summarize(state):
+    """The /stats/maze response body for a maze's merged state."""
+    summary = {"count": state.get("score", {}).get("count", 0)}
+    for name in METRICS:
+        metric = state.get(name, {})
+        count = metric.get("count", 0)
+        if not count:
+            continue
+        mean = metric["sum"] / count
+        variance = max(0.0, metric.get("sum_sq", 0.0) / count - mean * mean)
+        summary[name] = {
+            "mean": round(mean, 2),
+            "stddev": round(math.sqrt(variance), 2),
+            **quantiles(metric),
+            "histogram": histogram(name, metric),
+        }
+    return summary
+
+
+class MazeStatsIndex:
+    """Merged states per maze, with the rendered summary cached until the next change."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states = {}
+        self._summaries = {}
+        self.loaded_at = {}
+
+    def load(self, maze_name, state):
+        """Replaces a maze's state with the stored totals (other workers' submissions included)."""
+        with self._lock:
+            self._states[maze_name] = state
+            self._summaries.pop(maze_name, None)
+            self.loaded_at[maze_name] = time.time()
+
+    def observe(self, maze_name, delta):
+        """Adds an observation() delta that has also been written to the store."""
+        with self._lock:
+            if maze_name not in self._states:
+                return   # not loaded yet; the first load reads this submission from the store
+            accumulate(self._states[maze_name], delta)
+            self._summaries.pop(maze_name, None)
+
+    def summary(self, maze_name):
+        """Cached summary, or None if the maze hasn't been loaded."""
+        with self._lock:
+            summary = self._summaries.get(maze_name)
+            if summary is None and maze_name in self._states:
+                summary = self._summaries[maze_name] = summarize(self._states[maze_name])
+            return summary
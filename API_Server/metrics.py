@@ -0,0 +1,170 @@
+"""
+In-process metrics for the API server, rendered in the Prometheus text
+exposition format on /metrics.
+
+Recording is a dict lookup plus a bisect under one lock, so it is cheap
+enough to run on every request. Each gunicorn worker keeps its own registry;
+a scrape reports the worker that served it.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import Response, g, request
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a running sum and count."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Holds counters and histograms keyed by (name, label pairs)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+
+    def describe(self, name, kind, text):
+        self._help[name] = (kind, text)
+
+    def inc(self, name, labels=(), amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def render(self):
+        """Returns every metric in the Prometheus text format (version 0.0.4)."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, (list(h.counts), h.sum, h.count, h.buckets))
+                for key, h in self._histograms.items()
+            )
+
+        lines = []
+        described = set()
+
+        def header(name, kind):
+            if name not in described:
+                described.add(name)
+                help_kind, text = self._help.get(name, (kind, name))
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {help_kind}")
+
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), (counts, total, count, buckets) in histograms:
+            header(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', repr(float(bound))),))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+registry = Registry()
+registry.describe("http_requests_total", "counter", "Requests served, by endpoint, method and status.")
+registry.describe("http_request_duration_seconds", "histogram", "Time spent in the Flask handler, by endpoint.")
+registry.describe("http_request_size_bytes", "histogram", "Request body size, by endpoint.")
+registry.describe("http_response_size_bytes", "histogram", "Response body size, by endpoint.")
+registry.describe("json_parse_duration_seconds", "histogram", "Time spent decoding request JSON, by endpoint.")
+registry.describe("backend_calls_total", "counter", "Firestore calls, by operation and outcome.")
+registry.describe("backend_call_duration_seconds", "histogram", "Firestore call latency, by operation.")
+
+
+@contextmanager
+def backend_call(operation):
+    """Times one database round trip and counts it by outcome."""
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        registry.observe("backend_call_duration_seconds", (("operation", operation),), time.perf_counter() - started)
+        registry.inc("backend_calls_total", (("operation", operation), ("outcome", outcome)))
+
+
+def timed_json(endpoint):
+    """Parses the current request body as JSON, recording how long decoding took."""
+    started = time.perf_counter()
+    try:
+        return request.get_json()
+    finally:
+        registry.observe("json_parse_duration_seconds", (("endpoint", endpoint),), time.perf_counter() - started)
+
+
+def instrument(app):
+    """Installs per-request timing and size hooks and the /metrics endpoint on a Flask app."""
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop("metrics_started", None)
+        endpoint = request.endpoint or "unmatched"
+        if endpoint == "metrics":
+            return response
+        labels = (("endpoint", endpoint),)
+        if started is not None:
+            registry.observe("http_request_duration_seconds", labels, time.perf_counter() - started)
+        registry.inc("http_requests_total", labels + (("method", request.method), ("status", str(response.status_code))))
+        if request.content_length is not None:
+            registry.observe("http_request_size_bytes", labels, request.content_length, SIZE_BUCKETS)
+        if response.content_length is not None:
+            registry.observe("http_response_size_bytes", labels, response.content_length, SIZE_BUCKETS)
+        return response
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        """
+        Exposes request, payload and backend metrics for Prometheus scraping.
+        """
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+    return app
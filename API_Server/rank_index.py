@@ -0,0 +1,186 @@
+import random
+import threading
+import time
+
+# In-memory order-statistics index over leaderboard totals.
+# An indexable skip list keeps (-total, username) keys in rank order; every
+# link also stores how many positions it skips, so finding a key's rank,
+# the key at a rank, inserting and removing all take O(log n) expected time.
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, levels):
+        self.key = key
+        self.next = [None] * levels
+        self.width = [1] * levels
+
+
+class IndexableSkipList:
+    MAX_LEVELS = 32
+
+    def __init__(self, seed=None):
+        self._random = random.Random(seed)
+        self._head = _Node(None, self.MAX_LEVELS)
+        self._levels = 1
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _random_levels(self):
+        levels = 1
+        while levels < self.MAX_LEVELS and self._random.random() < 0.5:
+            levels += 1
+        return levels
+
+    def _path(self, key):
+        """Rightmost node before `key` on every level, and the positions of those nodes."""
+        chain = [None] * self.MAX_LEVELS
+        positions = [0] * self.MAX_LEVELS
+        node = self._head
+        position = 0
+        for level in reversed(range(self._levels)):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+            positions[level] = position
+        return chain, positions
+
+    def insert(self, key):
+        chain, positions = self._path(key)
+        levels = self._random_levels()
+        if levels > self._levels:
+            for level in range(self._levels, levels):
+                chain[level] = self._head
+                positions[level] = 0
+                self._head.width[level] = self._size + 1
+            self._levels = levels
+
+        node = _Node(key, levels)
+        position = positions[0] + 1   # 1-based position of the new node
+        for level in range(levels):
+            before = chain[level]
+            node.next[level] = before.next[level]
+            before.next[level] = node
+            # `before` used to skip before.width[level] positions; split that span around the new node
+            skipped = position - positions[level]
+            node.width[level] = before.width[level] - skipped + 1
+            before.width[level] = skipped
+        for level in range(levels, self._levels):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key):
+        chain, _ = self._path(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        for level in range(self._levels):
+            before = chain[level]
+            if before.next[level] is node:
+                before.width[level] += node.width[level] - 1
+                before.next[level] = node.next[level]
+            else:
+                before.width[level] -= 1
+        while self._levels > 1 and self._head.next[self._levels - 1] is None:
+            self._head.width[self._levels - 1] = 1
+            self._levels -= 1
+        self._size -= 1
+
+    def rank(self, key):
+        """1-based position of `key`, or None if absent."""
+        chain, positions = self._path(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            return None
+        return positions[0] + 1
+
+    def at(self, rank):
+        """Key at 1-based position `rank`."""
+        if not 1 <= rank <= self._size:
+            raise IndexError(rank)
+        node = self._head
+        position = 0
+        for level in reversed(range(self._levels)):
+            while node.next[level] is not None and position + node.width[level] <= rank:
+                position += node.width[level]
+                node = node.next[level]
+        return node.key
+
+    def range(self, first, last):
+        """Keys at positions first..last (1-based, inclusive, clipped to the list)."""
+        first = max(1, first)
+        last = min(self._size, last)
+        if first > last:
+            return []
+        node = self._head
+        position = 0
+        for level in reversed(range(self._levels)):
+            while node.next[level] is not None and position + node.width[level] <= first:
+                position += node.width[level]
+                node = node.next[level]
+        keys = []
+        while node is not None and position <= last:
+            keys.append(node.key)
+            node = node.next[0]
+            position += 1
+        return keys
+
+
+class RankIndex:
+    """Users ranked by total score (highest first, ties by username)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._list = IndexableSkipList()
+        self._totals = {}
+        self.loaded_at = None
+
+    def __len__(self):
+        return len(self._totals)
+
+    def load(self, totals):
+        """Replaces the index with {username: total}."""
+        entries = IndexableSkipList()
+        for username, total in totals.items():
+            entries.insert((-total, username))
+        with self._lock:
+            self._list = entries
+            self._totals = dict(totals)
+            self.loaded_at = time.time()
+
+    def update(self, username, total):
+        with self._lock:
+            old = self._totals.get(username)
+            if old == total:
+                return
+            if old is not None:
+                self._list.remove((-old, username))
+            self._list.insert((-total, username))
+            self._totals[username] = total
+
+    def lookup(self, username, radius=2):
+        """
+        {'rank', 'total', 'players', 'neighbors'} for `username`, with the
+        `radius` players ranked directly above and below, or None if unknown.
+        """
+        with self._lock:
+            total = self._totals.get(username)
+            if total is None:
+                return None
+            rank = self._list.rank((-total, username))
+            keys = self._list.range(rank - radius, rank + radius)
+            players = len(self._list)
+        first = max(1, rank - radius)
+        return {
+            "rank": rank,
+            "total": total,
+            "players": players,
+            "neighbors": [
+                {"rank": first + i, "username": name, "total": -negative_total}
+                for i, (negative_total, name) in enumerate(keys)
+            ],
+        }
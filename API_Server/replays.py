@@ -0,0 +1,40 @@
+import base64
+import binascii
+import hashlib
+
+# Ghost replays sent along with /submit_score ("replays": {maze name: base64}).
+# The files come from the game's src/ghost_replay.py; the server only checks
+# the magic bytes and the size and stores them as-is, one document per
+# (user, maze) in the 'replays' collection, separate from the leaderboard
+# documents so leaderboard reads never pull replay bytes.
+
+MAGIC = b"GHST"
+
+
+def replay_doc_id(username, maze):
+    """Firestore-safe document id for a (user, maze) pair (maze names may contain '/')."""
+    return hashlib.sha1(f"{username}\n{maze}".encode()).hexdigest()
+
+
+def decode_replays(payload, max_bytes):
+    """
+    Splits the optional 'replays' field into ({maze: bytes}, [rejected maze
+    names]). Anything that isn't a ghost file under `max_bytes` is rejected.
+    """
+    if not isinstance(payload, dict):
+        return {}, ([] if payload is None else ["*"])
+    accepted = {}
+    rejected = []
+    for maze, text in payload.items():
+        try:
+            if not isinstance(text, str) or len(text) > max_bytes * 4 // 3 + 4:
+                raise ValueError
+            blob = base64.b64decode(text, validate=True)
+        except (ValueError, binascii.Error):
+            rejected.append(str(maze))
+            continue
+        if not blob.startswith(MAGIC) or len(blob) > max_bytes:
+            rejected.append(str(maze))
+            continue
+        accepted[str(maze)] = blob
+    return accepted, rejected
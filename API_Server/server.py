@@ -1,36 +1,237 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
-from flask import Flask, request, jsonify
+import time
+STARTED_AT = time.perf_counter()  # time-to-first-response is measured from here
+
+from flask import Flask, Response, request, jsonify, send_from_directory
 import os
 import json 
 import sys # For logging/debugging
+from backend import FirestoreBackend
+from write_behind import WriteBehindBuffer, merge_entry
+from metrics import backend_call, instrument, registry, timed_json
+from single_flight import SingleFlight
+from maze_manifest import ManifestCache
+from rank_index import RankIndex
+from events import board_key, leaderboard_collection, normalize_event, split_board_key
+from sharded_counters import ShardedCounter, counter_name
+from maze_stats import MazeStatsIndex, observation, stats_counter_name
+from replays import decode_replays, replay_doc_id
+from idempotency import DedupCache, claim_expired, normalize_submission_id, submission_record
+from snapshots import TABLES, SnapshotWriter, checked_at, latest_version, snapshot_filename
+import snapshots
 
 # --- Secure Initialization ---
-db = None
+# Firebase is initialized on a background thread (see backend.py) so the
+# server answers /healthz while the client is still connecting.
+backend = FirestoreBackend("FIREBASE_CREDENTIALS_JSON")
+BACKEND_WAIT = float(os.environ.get("BACKEND_WAIT", 30.0))  # max seconds a request waits for the client
 
-try:
-    # 1. Read the JSON string from the environment variable set in Render
-    firebase_config_json = os.environ.get("FIREBASE_CREDENTIALS_JSON")
-    
-    if firebase_config_json:
-        # 2. Parse the string into a dictionary
-        service_account_info = json.loads(firebase_config_json)
-        
-        # 3. Initialize Firebase using the secure dictionary
-        # Check if the app is already initialized (important for testing)
-        if not firebase_admin._apps:
-            cred = credentials.Certificate(service_account_info)
-            firebase_admin.initialize_app(cred)
-        
-        db = firestore.client()
-        print("INFO: Firebase initialized securely.", file=sys.stderr)
-    else:
-        print("CRITICAL: FIREBASE_CREDENTIALS_JSON not found. DB connection failed.", file=sys.stderr)
+app = Flask(__name__)
+instrument(app)  # per-request latency/size histograms + /metrics
 
-except Exception as e:
-    print(f"FATAL ERROR during Firebase init: {e}", file=sys.stderr)
+# --- Write-Behind Mode (optional) ---
+# WRITE_BEHIND=1 coalesces submissions per user in memory and flushes them in
+# batches instead of writing to Firestore on every /submit_score.
+WRITE_BEHIND = os.environ.get("WRITE_BEHIND") == "1"
+write_buffer = None
+
+
+def commit_buffered_scores(items):
+    """Writes a batch of coalesced user entries with server-side increments."""
+    from firebase_admin import firestore
+
+    db = backend.client(BACKEND_WAIT)
+    if db is None:
+        raise RuntimeError(f"Database unavailable ({backend.state}).")
+    batch = db.batch()
+    for key, entry in items:
+        event, username = split_board_key(key)
+        batch.set(leaderboard_collection(db, event).document(username), {
+            "total": firestore.Increment(entry["total"]),
+            "total_moves": firestore.Increment(entry["total_moves"]),
+            "total_distance": firestore.Increment(entry["total_distance"]),
+            "total_time": firestore.Increment(entry["total_time"]),
+            "mazes": entry["mazes"],
+            "last_updated": firestore.SERVER_TIMESTAMP,
+        }, merge=True)
+    with backend_call("leaderboard.batch_commit"):
+        results = batch.commit()
+    return results[0].update_time if results else None
+
+
+if WRITE_BEHIND and backend.configured:
+    write_buffer = WriteBehindBuffer(
+        commit_buffered_scores,
+        interval=float(os.environ.get("WRITE_BEHIND_INTERVAL", 2.0)),
+        max_pending=int(os.environ.get("WRITE_BEHIND_MAX_PENDING", 200)),
+        spill_path=os.environ.get("WRITE_BEHIND_SPILL", "write_behind_spill.json"),
+    )
+    print("INFO: Write-behind mode enabled.", file=sys.stderr)
+
+# --- Startup Timing ---
+registry.describe("server_first_response_seconds", "histogram", "Time from process start to the first response sent.")
+first_response_seconds = None
+
+
+@app.after_request
+def _record_first_response(response):
+    global first_response_seconds
+    if first_response_seconds is None:
+        first_response_seconds = time.perf_counter() - STARTED_AT
+        registry.observe("server_first_response_seconds", (), first_response_seconds)
+        print(f"INFO: First response ({request.path}) {first_response_seconds * 1000:.0f} ms after start, "
+              f"backend {backend.state}", file=sys.stderr)
+    return response
+
+
+# --- Leaderboard Snapshots (optional) ---
+# SNAPSHOT_DIR=path writes the board as versioned Arrow IPC files every
+# SNAPSHOT_INTERVAL seconds (needs pyarrow) and serves them under /snapshot.
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR")
+snapshot_writer = None
+
+
+def snapshot_rows():
+    db = backend.client(BACKEND_WAIT)
+    if db is None:
+        raise RuntimeError(f"Database unavailable ({backend.state}).")
+    return build_leaderboard(db)
+
+
+if SNAPSHOT_DIR and not snapshots.available():
+    print("WARNING: SNAPSHOT_DIR is set but pyarrow is not installed; snapshots disabled.", file=sys.stderr)
+elif SNAPSHOT_DIR:
+    snapshot_writer = SnapshotWriter(
+        snapshot_rows,
+        SNAPSHOT_DIR,
+        interval=float(os.environ.get("SNAPSHOT_INTERVAL", 60.0)),
+        keep=int(os.environ.get("SNAPSHOT_KEEP", 3)),
+    )
+
+# --- Request Coalescing ---
+# Concurrent /leaderboard requests share one in-flight Firestore query.
+registry.describe("backend_calls_coalesced_total", "counter", "Requests served from another request's in-flight backend call.")
+leaderboard_flight = SingleFlight(
+    on_shared=lambda key: registry.inc("backend_calls_coalesced_total", (("operation", key),))
+)
+
+
+def fetch_leaderboard_docs(db, event=None):
+    from firebase_admin import firestore
+
+    with backend_call("leaderboard.stream"):
+        query = leaderboard_collection(db, event).order_by("total", direction=firestore.Query.DESCENDING)
+        return list(query.stream())
+
+# --- Rank Index ---
+# /rank answers from an in-memory order-statistics index. submit_score keeps
+# it current for this worker; a full reload from the board every
+# RANK_REFRESH seconds picks up other workers' writes.
+RANK_REFRESH = float(os.environ.get("RANK_REFRESH", 60.0))
+RANK_MISS_RELOAD = float(os.environ.get("RANK_MISS_RELOAD", 5.0))  # min index age before a /rank miss reloads it
+rank_index = RankIndex()
+
+
+def rank_index_stale():
+    return rank_index.loaded_at is None or time.time() - rank_index.loaded_at > RANK_REFRESH
+
+# --- Events & Sharded Counters ---
+# A submission's optional "event" id (or DEFAULT_EVENT) selects its board, see
+# events.py. Submission and per-maze completion counts are kept per board in
+# sharded counters (COUNTER_SHARDS documents each) and served by /stats.
+DEFAULT_EVENT = normalize_event(os.environ.get("DEFAULT_EVENT"))
+COUNTER_SHARDS = int(os.environ.get("COUNTER_SHARDS", 8))
+
+
+def count_submission(db, event, maze_scores):
+    """Bumps the board's submission and per-maze completion counters; failures are only logged."""
+    try:
+        with backend_call("counters.increment"):
+            ShardedCounter(counter_name(event), COUNTER_SHARDS).increment(db, {
+                "submissions": 1,
+                "completions": {str(maze_name): 1 for maze_name in maze_scores},
+            })
+    except Exception as e:
+        print(f"Counter update error: {e}", file=sys.stderr)
+
+
+# --- Per-Maze Stats ---
+# Streaming statistics of every completion of a maze (see maze_stats.py).
+# Submissions are added to a sharded counter per maze; /stats/maze/<name>
+# reloads a maze's totals at most every STATS_REFRESH seconds and this
+# worker's own submissions are added on top in between.
+STATS_REFRESH = float(os.environ.get("STATS_REFRESH", 30.0))
+maze_stats = MazeStatsIndex()
+
+
+def record_maze_stats(db, maze_scores):
+    """Adds each maze result to its maze's stats; failures are only logged."""
+    for maze_name, metrics in maze_scores.items():
+        maze_name = str(maze_name)
+        try:
+            # metrics = [score, move_count, total_distance, elapsed]
+            if not isinstance(metrics, list) or len(metrics) != 4:
+                raise ValueError("expected [score, moves, distance, time]")
+            delta = observation(metrics)
+            with backend_call("maze_stats.increment"):
+                ShardedCounter(stats_counter_name(maze_name), COUNTER_SHARDS).increment(db, delta)
+        except Exception as e:
+            print(f"Maze stats update error ({maze_name}): {e}", file=sys.stderr)
+            continue
+        maze_stats.observe(maze_name, delta)
+
+
+# --- Idempotent Submissions ---
+# Clients send a "submission_id" and reuse it on retries; see idempotency.py.
+SUBMISSION_TTL = float(os.environ.get("SUBMISSION_TTL", 7 * 24 * 3600))  # how long ids are remembered
+recent_submissions = DedupCache(int(os.environ.get("SUBMISSION_CACHE_SIZE", 10_000)), SUBMISSION_TTL)
+registry.describe("submissions_deduplicated_total", "counter", "Repeated submission ids answered without a write.")
+registry.describe("submissions_reclaimed_total", "counter", "Abandoned write-behind claims taken over by a retry.")
+
+# --- Ghost Replays ---
+# Optional per-maze run recordings; only each user's best run per maze is kept.
+REPLAY_MAX_BYTES = int(os.environ.get("REPLAY_MAX_BYTES", 32 * 1024))
 
-app = Flask(__name__)
+
+def store_replays(db, username, replays, maze_scores, score):
+    """Stores replays that beat the user's stored one for that maze; returns the mazes stored."""
+    from firebase_admin import firestore
+
+    stored = []
+    for maze_name, blob in replays.items():
+        metrics = maze_scores.get(maze_name)
+        maze_score = float(metrics[0]) if isinstance(metrics, list) and metrics else score
+        replay_ref = db.collection("replays").document(replay_doc_id(username, maze_name))
+        try:
+            with backend_call("replays.get"):
+                existing = replay_ref.get()
+            if existing.exists and existing.to_dict().get("score", 0.0) >= maze_score:
+                continue
+            with backend_call("replays.set"):
+                replay_ref.set({
+                    "username": username,
+                    "maze": maze_name,
+                    "score": maze_score,
+                    "size": len(blob),
+                    "data": blob,
+                    "updated": firestore.SERVER_TIMESTAMP,
+                })
+            stored.append(maze_name)
+        except Exception as e:
+            print(f"Replay storage error ({username}, {maze_name}): {e}", file=sys.stderr)
+    return stored
+
+
+# --- Bulk Submission ---
+# Tournaments (src/tournament.py) submit a whole ranking at once to
+# /submit_scores; each payload is applied exactly like a /submit_score.
+BULK_MAX = int(os.environ.get("BULK_MAX", 200))  # payloads per /submit_scores request
+registry.describe("bulk_submissions_total", "counter", "Payloads received through /submit_scores.")
+
+# --- Maze Catalog (optional) ---
+# MAZE_MANIFEST points at the manifest written by src/maze_catalog.py so the
+# server can list mazes and look them up by file stem, name or hash.
+MAZE_MANIFEST = os.environ.get("MAZE_MANIFEST")
+maze_manifest = ManifestCache(MAZE_MANIFEST) if MAZE_MANIFEST else None
 
 # --- API Endpoints ---
 @app.route("/submit_score", methods=["POST"])
@@ -41,12 +242,63 @@ def submit_score():
     
     The expected payload structure includes a detailed 'maze_scores' list:
     "maze_scores": {"Maze Name": [score, moves, distance, time_elapsed]}
+
+    An optional "submission_id" makes retries safe: every later delivery of
+    the same id gets the first response back (with "duplicate": true).
     """
+    db = backend.client(BACKEND_WAIT)
     if not db:
         return jsonify({"error": "Server not connected to Database."}), 503
+    return submission_response(*apply_submission(db, timed_json("submit_score")))
 
+
+@app.route("/submit_scores", methods=["POST"])
+def submit_scores():
+    """
+    Bulk /submit_score: {"submissions": [payload, ...]}, every payload in the
+    /submit_score format. Payloads are applied one by one (each with its own
+    transaction and submission id, so resending a batch is safe) and the
+    answer has one result per payload, in order, each with its "status".
+    """
+    db = backend.client(BACKEND_WAIT)
+    if not db:
+        return jsonify({"error": "Server not connected to Database."}), 503
+    data = timed_json("submit_scores")
+    submissions = data.get("submissions") if isinstance(data, dict) else None
+    if not isinstance(submissions, list) or not submissions:
+        return jsonify({"error": "Expected a non-empty 'submissions' list."}), 400
+    if len(submissions) > BULK_MAX:
+        return jsonify({"error": f"At most {BULK_MAX} submissions per request."}), 413
+
+    results = []
+    for payload in submissions:
+        try:
+            body, status = apply_submission(db, payload)
+        except Exception as e:   # one failed payload doesn't lose the rest of the batch
+            print(f"Bulk submission error: {e}", file=sys.stderr)
+            body, status = {"error": "Submission failed; resend it."}, 500
+        results.append(dict(body, status=status))
+    registry.inc("bulk_submissions_total", amount=len(results))
+    return jsonify({
+        "results": results,
+        "accepted": sum(1 for result in results if result["status"] == 200),
+    }), 200
+
+
+def submission_response(body, status):
+    response = jsonify(body)
+    if status == 409:
+        response.headers["Retry-After"] = "1"
+    return response, status
+
+
+def apply_submission(db, data):
+    """Validates and applies one /submit_score payload; returns (response body, HTTP status)."""
+    from firebase_admin import firestore
+
+    if not isinstance(data, dict):
+        return {"error": "Expected a JSON object."}, 400
     try:
-        data = request.json
         username = data.get("username", "").strip()
         
         # 1. New Maze Performance Metrics from Client (Per-Maze Data - used for secure aggregation)
@@ -60,6 +312,9 @@ def submit_score():
         # This dict now contains the list: {maze_name: [score, move_count, total_distance, elapsed]}
         maze_scores = data.get("maze_scores", {}) 
 
+        # 3. Optional ghost replays: {maze_name: base64 ghost file}, stored separately
+        replays, replays_rejected = decode_replays(data.get("replays"), REPLAY_MAX_BYTES)
+
         # Convert and validate metrics
         moves_int = int(moves) if moves is not None else 0
         distance_float = float(distance) if distance is not None else 0.0
@@ -68,78 +323,470 @@ def submit_score():
 
     except (ValueError, TypeError) as e:
         print(f"Validation Error: {e}", file=sys.stderr)
-        return jsonify({"error": "Invalid data format or type received. Check all six fields."}), 400
+        return {"error": "Invalid data format or type received. Check all six fields."}, 400
 
     if not username or score is None:
-        return jsonify({"error": "Missing username or score"}), 400
+        return {"error": "Missing username or score"}, 400
 
-    user_ref = db.collection("leaderboard").document(username) 
-    
-    # Initialize all total fields safely with 0 if user is new
-    user_data = user_ref.get().to_dict() or {
-        "total": 0.0, 
-        "mazes": {}, 
-        "total_moves": 0,          
-        "total_distance": 0.0,     
-        "total_time": 0.0          
+    # Optional event / season id; the score counts on that event's board only
+    try:
+        event = normalize_event(data.get("event", DEFAULT_EVENT))
+        submission_id = normalize_submission_id(data.get("submission_id"))
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    # A retried delivery gets the first delivery's answer and changes nothing
+    if submission_id:
+        cached = recent_submissions.get(submission_id)
+        if cached is not None:
+            registry.inc("submissions_deduplicated_total", (("source", "memory"),))
+            return dict(cached, duplicate=True), 200
+        submission_ref = db.collection("submissions").document(submission_id)
+    else:
+        submission_ref = None
+
+    user_ref = leaderboard_collection(db, event).document(username)
+
+    if write_buffer:
+        delta = {
+            "total": score_float,
+            "total_moves": moves_int,
+            "total_distance": distance_float,
+            "total_time": time_float,
+            "mazes": maze_scores,
+        }
+        # Read-your-writes: the stored document plus whatever is still buffered plus this score
+        with backend_call("leaderboard.get"):
+            snapshot = user_ref.get()
+        user_data = merge_entry(
+            merge_entry(
+                snapshot.to_dict() or {},
+                write_buffer.overlay().delta(board_key(event, username), snapshot.update_time) or {},
+            ),
+            delta,
+        )
+        response = {
+            "message": "Score and all metrics queued",
+            "event": event,
+            "user_total": user_data.get("total", 0.0),
+            "total_moves": user_data.get("total_moves", 0)
+        }
+        # Record the id with its response before buffering: create() fails if
+        # another delivery got there first, and a failed write leaves nothing
+        # buffered, so a recorded id always means a counted score and the other way round
+        if submission_ref is not None:
+            from google.api_core.exceptions import AlreadyExists
+            try:
+                with backend_call("submissions.create"):
+                    submission_ref.create(submission_record(username, event, response, SUBMISSION_TTL))
+            except AlreadyExists:
+                if not reclaim_submission(db, submission_ref, username, event, response):
+                    return duplicate_submission(submission_ref, submission_id)
+        write_buffer.add(board_key(event, username), delta)
+    else:
+        @firestore.transactional
+        def accumulate(transaction):
+            """Adds the score and records the submission id in one transaction; (response, duplicate)."""
+            if submission_ref is not None:
+                existing = submission_ref.get(transaction=transaction)
+                if existing.exists:
+                    return existing.to_dict().get("response"), True
+
+            # Initialize all total fields safely with 0 if user is new
+            snapshot = user_ref.get(transaction=transaction)
+            user_data = snapshot.to_dict() or {
+                "total": 0.0, 
+                "mazes": {}, 
+                "total_moves": 0,          
+                "total_distance": 0.0,     
+                "total_time": 0.0          
+            }
+
+            # CORE LOGIC: Accumulate all four metrics securely on the server
+
+            # 1. Score Accumulation (Relies on top-level 'score' for the correct increment)
+            user_data["total"] = user_data["total"] + score_float
+
+            # 2. Metric Accumulation (Relies on top-level metrics for the correct increment)
+            user_data["total_moves"] = user_data.get("total_moves", 0) + moves_int
+            user_data["total_distance"] = user_data.get("total_distance", 0.0) + distance_float
+            user_data["total_time"] = user_data.get("total_time", 0.0) + time_float
+
+            # 3. Maze Completion Tracking (Stores the new detailed list structure, which is acceptable in Firestore)
+            user_data.setdefault("mazes", {}).update(maze_scores)
+            user_data["last_updated"] = firestore.SERVER_TIMESTAMP 
+
+            transaction.set(user_ref, user_data)
+            response = {
+                "message": "Score and all metrics updated", 
+                "event": event,
+                "user_total": user_data["total"],
+                "total_moves": user_data["total_moves"] 
+            }
+            if submission_ref is not None:
+                transaction.create(submission_ref, submission_record(username, event, response, SUBMISSION_TTL))
+            return response, False
+
+        with backend_call("leaderboard.transaction"):
+            response, duplicate = accumulate(db.transaction())
+        if duplicate:
+            registry.inc("submissions_deduplicated_total", (("source", "store"),))
+            if response is None:
+                return submission_in_progress()
+            recent_submissions.put(submission_id, response)
+            return dict(response, duplicate=True), 200
+
+    if event is None:
+        rank_index.update(username, response["user_total"])
+    count_submission(db, event, maze_scores)
+    record_maze_stats(db, maze_scores)
+    if submission_id:
+        recent_submissions.put(submission_id, response)
+    response = dict(response)
+    if replays or replays_rejected:
+        response["replays_stored"] = store_replays(db, username, replays, maze_scores, score_float)
+        response["replays_rejected"] = replays_rejected
+    return response, 200
+
+
+def reclaim_submission(db, submission_ref, username, event, response):
+    """
+    Takes over a claim that never got a response (left by a delivery that
+    died; after a flush interval plus the grace period nothing can still be
+    answering it) and records `response` on it. True if this request now owns it.
+    """
+    from google.api_core.exceptions import FailedPrecondition, NotFound
+
+    with backend_call("submissions.get"):
+        snapshot = submission_ref.get()
+    if not snapshot.exists or not claim_expired(snapshot.to_dict() or {}, write_buffer.interval + write_buffer.grace_period):
+        return False
+    try:
+        # Conditional on the record being unchanged, so only one retry can take it over
+        with backend_call("submissions.reclaim"):
+            submission_ref.update(submission_record(username, event, response, SUBMISSION_TTL),
+                                  option=db.write_option(last_update_time=snapshot.update_time))
+    except (FailedPrecondition, NotFound):
+        return False
+    registry.inc("submissions_reclaimed_total")
+    return True
+
+
+def duplicate_submission(submission_ref, submission_id):
+    """Answer for a submission id that is already recorded in the store."""
+    registry.inc("submissions_deduplicated_total", (("source", "store"),))
+    with backend_call("submissions.get"):
+        record = submission_ref.get().to_dict() or {}
+    response = record.get("response")
+    if response is None:
+        return submission_in_progress()
+    recent_submissions.put(submission_id, response)
+    return dict(response, duplicate=True), 200
+
+
+def submission_in_progress():
+    # The first delivery is still being applied; the client's next retry will see its result
+    # (submission_response adds Retry-After)
+    return {"error": "Submission is already being processed; retry shortly."}, 409
+
+
+def leaderboard_row(username, data):
+    """Compiles one user's document into a leaderboard entry for the Streamlit app."""
+    return {
+        "username": username,
+        "total": data.get("total", 0.0),
+        "total_moves": data.get("total_moves", 0),
+        "total_distance": data.get("total_distance", 0.0),
+        "total_time": data.get("total_time", 0.0),
+        # Calculate number of completed mazes from the 'mazes' map
+        "mazes_completed": len(data.get("mazes", {})),
+        "mazes" : data.get("mazes", {})
     }
 
-    # CORE LOGIC: Accumulate all four metrics securely on the server
-    
-    # 1. Score Accumulation (Relies on top-level 'score' for the correct increment)
-    user_data["total"] = user_data["total"] + score_float
-    
-    # 2. Metric Accumulation (Relies on top-level metrics for the correct increment)
-    user_data["total_moves"] = user_data.get("total_moves", 0) + moves_int
-    user_data["total_distance"] = user_data.get("total_distance", 0.0) + distance_float
-    user_data["total_time"] = user_data.get("total_time", 0.0) + time_float
-    
-    # 3. Maze Completion Tracking (Stores the new detailed list structure, which is acceptable in Firestore)
-    user_data["mazes"].update(maze_scores)
-    user_data["last_updated"] = firestore.SERVER_TIMESTAMP 
-    
-    user_ref.set(user_data) 
 
-    return jsonify({
-        "message": "Score and all metrics updated", 
-        "user_total": user_data["total"],
-        "total_moves": user_data["total_moves"] 
-    }), 200
+def build_leaderboard(db, event=None, reload_ranks=False):
+    """
+    All rows of a board (None = all-time), sorted by total score, including
+    buffered submissions. The all-time board also refreshes the rank index
+    when it is stale (or always, with `reload_ranks`).
+    """
+    # Sorted by total score descending; shared with concurrent requests for the same board
+    flight_key = "leaderboard.stream" if event is None else f"leaderboard.stream:{event}"
+    docs = leaderboard_flight.do(flight_key, lambda: fetch_leaderboard_docs(db, event))
+    overlay = write_buffer.overlay() if write_buffer else None
+
+    leaderboard_data = []
+    for doc in docs:
+        data = doc.to_dict()
+        if overlay:
+            delta = overlay.delta(board_key(event, doc.id), doc.update_time)
+            if delta:
+                data = merge_entry(dict(data, mazes=dict(data.get("mazes", {}))), delta)
+        leaderboard_data.append(leaderboard_row(doc.id, data))
+
+    if overlay:
+        # Users that only exist in the buffer so far, then re-rank
+        seen = {doc.id for doc in docs}
+        for key in overlay.usernames:
+            key_event, username = split_board_key(key)
+            if key_event == event and username not in seen:
+                leaderboard_data.append(leaderboard_row(username, overlay.delta(key)))
+        leaderboard_data.sort(key=lambda row: row["total"], reverse=True)
+    if event is None and (reload_ranks or rank_index_stale()):
+        rank_index.load({row["username"]: row["total"] for row in leaderboard_data})
+    return leaderboard_data
 
 
 @app.route("/leaderboard", methods=["GET"])
 def leaderboard():
     """
     Retrieves and returns the aggregated leaderboard data, sorted by total score.
+    ?event=<id> returns that event's board instead of the all-time one.
     """
+    try:
+        event = normalize_event(request.args.get("event"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    db = backend.client(BACKEND_WAIT)
     if not db:
         return jsonify({"error": "Server not connected to Database."}), 503
         
     try:
-        # Sort by total score descending
-        docs = db.collection("leaderboard").order_by("total", direction=firestore.Query.DESCENDING).stream()
-        
-        leaderboard_data = []
-        for doc in docs:
-            data = doc.to_dict()
-            # Compile data for the Streamlit app
-            leaderboard_data.append({
-                "username": doc.id,
-                "total": data.get("total", 0.0),
-                "total_moves": data.get("total_moves", 0),
-                "total_distance": data.get("total_distance", 0.0),
-                "total_time": data.get("total_time", 0.0),
-                # Calculate number of completed mazes from the 'mazes' map
-                "mazes_completed": len(data.get("mazes", {})),
-                "mazes" : data.get("mazes", {})
-            })
-
-        return jsonify(leaderboard_data), 200
+        return jsonify(build_leaderboard(db, event)), 200
     except Exception as e:
         print(f"Leaderboard retrieval error: {e}", file=sys.stderr)
         return jsonify({"error": "Failed to retrieve leaderboard data."}), 500
 
 
+@app.route("/stats", methods=["GET"])
+def stats():
+    """Submission and per-maze completion counts of a board (?event=<id>, default all-time)."""
+    try:
+        event = normalize_event(request.args.get("event"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    db = backend.client(BACKEND_WAIT)
+    if not db:
+        return jsonify({"error": "Server not connected to Database."}), 503
+
+    try:
+        with backend_call("counters.read"):
+            totals = ShardedCounter(counter_name(event), COUNTER_SHARDS).read(db)
+    except Exception as e:
+        print(f"Stats retrieval error: {e}", file=sys.stderr)
+        return jsonify({"error": "Failed to retrieve stats."}), 500
+    return jsonify({
+        "event": event,
+        "submissions": totals.get("submissions", 0),
+        "completions": totals.get("completions", {}),
+    }), 200
+
+
+@app.route("/stats/maze/<path:name>", methods=["GET"])
+def maze_stats_view(name):
+    """Count, mean, stddev, p50/p90/p99 and histograms of score, moves, distance and time for one maze."""
+    loaded_at = maze_stats.loaded_at.get(name)
+    if loaded_at is None or time.time() - loaded_at > STATS_REFRESH:
+        db = backend.client(BACKEND_WAIT)
+        try:
+            if not db:
+                raise RuntimeError(f"Database unavailable ({backend.state}).")
+            counter = ShardedCounter(stats_counter_name(name), COUNTER_SHARDS)
+
+            def read_totals():
+                with backend_call("maze_stats.read"):
+                    return counter.read(db)
+
+            maze_stats.load(name, leaderboard_flight.do(f"maze_stats.read:{name}", read_totals))
+        except Exception as e:
+            print(f"Maze stats load error ({name}): {e}", file=sys.stderr)
+            if loaded_at is None:
+                return jsonify({"error": "Failed to load maze stats."}), 503 if not db else 500
+            # otherwise serve the previous totals
+
+    summary = maze_stats.summary(name)
+    if not summary or not summary["count"]:
+        return jsonify({"error": f"No completions of '{name}' yet."}), 404
+    return jsonify(dict(summary, maze=name, as_of=maze_stats.loaded_at.get(name))), 200
+
+
+def reload_rank_index():
+    """Reloads the rank index from the board; an error response if there is no index to serve."""
+    db = backend.client(BACKEND_WAIT)
+    if not db:
+        return jsonify({"error": "Server not connected to Database."}), 503
+    try:
+        leaderboard_flight.do("rank.load", lambda: build_leaderboard(db, reload_ranks=True))
+    except Exception as e:
+        print(f"Rank index load error: {e}", file=sys.stderr)
+        if rank_index.loaded_at is None:
+            return jsonify({"error": "Failed to load leaderboard data."}), 500
+    return None
+
+
+@app.route("/rank/<username>", methods=["GET"])
+def rank(username):
+    """
+    The user's position on the board, their total and the players ranked
+    around them (?radius=N, default 2, max 10).
+    """
+    try:
+        radius = min(10, max(0, int(request.args.get("radius", 2))))
+    except ValueError:
+        return jsonify({"error": "radius must be a whole number."}), 400
+
+    if rank_index_stale():
+        error = reload_rank_index()
+        if error:
+            return error
+
+    result = rank_index.lookup(username.strip(), radius)
+    if result is None and time.time() - rank_index.loaded_at > RANK_MISS_RELOAD:
+        # The user may have scored on another worker since the last load
+        error = reload_rank_index()
+        if error:
+            return error
+        result = rank_index.lookup(username.strip(), radius)
+    if result is None:
+        return jsonify({"error": f"No scores for '{username}' yet."}), 404
+    result["username"] = username.strip()
+    result["as_of"] = rank_index.loaded_at
+    return jsonify(result), 200
+
+
+@app.route("/replay/<username>/<path:maze>", methods=["GET"])
+def replay(username, maze):
+    """The user's best ghost replay for a maze, as the raw .ghost file."""
+    db = backend.client(BACKEND_WAIT)
+    if not db:
+        return jsonify({"error": "Server not connected to Database."}), 503
+    try:
+        with backend_call("replays.get"):
+            snapshot = db.collection("replays").document(replay_doc_id(username.strip(), maze)).get()
+    except Exception as e:
+        print(f"Replay retrieval error: {e}", file=sys.stderr)
+        return jsonify({"error": "Failed to retrieve replay."}), 500
+    if not snapshot.exists:
+        return jsonify({"error": f"No replay of '{maze}' for '{username}'."}), 404
+    entry = snapshot.to_dict()
+    response = Response(bytes(entry["data"]), mimetype="application/octet-stream")
+    response.headers["X-Replay-Score"] = str(entry.get("score", 0.0))
+    response.headers["Cache-Control"] = "public, max-age=60"
+    return response
+
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    """Liveness check; never touches the database."""
+    return jsonify({
+        "status": "ok",
+        "uptime_seconds": round(time.perf_counter() - STARTED_AT, 3),
+        "backend": backend.status(),
+    }), 200
+
+
+@app.route("/warmup", methods=["GET", "POST"])
+def warmup():
+    """Waits for Firebase init and opens the connection with one small read."""
+    try:
+        with backend_call("warmup"):
+            read_seconds = backend.warm()
+    except Exception as e:
+        print(f"Warmup error: {e}", file=sys.stderr)
+        return jsonify({"status": "error", "backend": backend.status()}), 503
+    if read_seconds is None:
+        return jsonify({"status": "unavailable", "backend": backend.status()}), 503
+    return jsonify({
+        "status": "warm",
+        "backend": backend.status(),
+        "first_read_seconds": round(read_seconds, 3),
+    }), 200
+
+
+@app.route("/mazes", methods=["GET"])
+def mazes():
+    """Lists the mazes in the catalog manifest."""
+    if not maze_manifest:
+        return jsonify({"error": "Maze catalog not configured."}), 503
+    return jsonify(maze_manifest.mazes()), 200
+
+
+@app.route("/mazes/<key>", methods=["GET"])
+def maze_info(key):
+    """Looks a maze up by file stem, maze name or content hash (prefix)."""
+    if not maze_manifest:
+        return jsonify({"error": "Maze catalog not configured."}), 503
+    maze = maze_manifest.find(key)
+    if maze is None:
+        return jsonify({"error": f"No maze matches '{key}'."}), 404
+    return jsonify(maze), 200
+
+
+@app.route("/snapshot", methods=["GET"])
+def snapshot_index():
+    """Current snapshot version, when it was last checked and the URLs of its tables."""
+    if not snapshot_writer:
+        return jsonify({"error": "Leaderboard snapshots are disabled."}), 404
+    version = latest_version(SNAPSHOT_DIR)
+    if version is None:
+        return jsonify({"error": "No leaderboard snapshot available."}), 503
+    return jsonify({
+        "version": version,
+        "checked_at": checked_at(SNAPSHOT_DIR, version),
+        "tables": {table: f"/snapshot/{table}/{version}" for table in TABLES},
+    }), 200
+
+
+def send_snapshot(table, version, max_age):
+    response = send_from_directory(
+        SNAPSHOT_DIR,
+        snapshot_filename(table, version),
+        mimetype="application/vnd.apache.arrow.file",
+        etag=f"{table}-{version}",
+        max_age=max_age,
+    )
+    response.headers["X-Snapshot-Version"] = str(version)
+    return response
+
+
+@app.route("/snapshot/<table>", methods=["GET"])
+def latest_snapshot(table):
+    """The newest snapshot of `table`; its version is in X-Snapshot-Version / ETag."""
+    version = latest_version(SNAPSHOT_DIR) if snapshot_writer and table in TABLES else None
+    if version is None:
+        return jsonify({"error": "No leaderboard snapshot available."}), 404
+    return send_snapshot(table, version, max_age=0)
+
+
+@app.route("/snapshot/<table>/<int:version>", methods=["GET"])
+def versioned_snapshot(table, version):
+    """A specific snapshot version; immutable, so it may be cached for good."""
+    if not snapshot_writer or table not in TABLES:
+        return jsonify({"error": "No leaderboard snapshot available."}), 404
+    response = send_snapshot(table, version, max_age=31536000)
+    response.headers["Cache-Control"] += ", immutable"
+    return response
+
+
+# --- Worker Startup ---
+def start_worker():
+    """Starts this process's background work: Firestore init, write-behind flusher, snapshots."""
+    backend.start()
+    if write_buffer:
+        write_buffer.start()
+    if snapshot_writer:
+        snapshot_writer.start()
+
+
+if os.environ.get("GUNICORN_PRELOAD") == "1":
+    # Loaded in the gunicorn master: only parse credentials; each worker calls
+    # start_worker() after the fork (see gunicorn.conf.py)
+    if backend.configured:
+        backend.prepare()
+else:
+    start_worker()
+
+
 if __name__ == "__main__":
     # Use environment variable for port or default to 8080
     port = int(os.environ.get("PORT", 8080))
@@ -0,0 +1,52 @@
+import random
+
+# Sharded counters for aggregate stats (submissions, completions per maze).
+# A single counter document can only take about one write per second, so
+# each counter is split over `shards` documents,
+#   counters/<name>/shards/<0 .. shards - 1>
+# every increment goes to one shard picked at random, and a read sums all
+# shards. Values may be nested maps of numbers ({"completions": {maze: n}}).
+
+
+def _increments(deltas, increment):
+    return {
+        key: _increments(value, increment) if isinstance(value, dict) else increment(value)
+        for key, value in deltas.items()
+    }
+
+
+def accumulate(totals, values):
+    """Adds a (nested) map of numbers onto `totals` in place."""
+    for key, value in values.items():
+        if isinstance(value, dict):
+            accumulate(totals.setdefault(key, {}), value)
+        elif isinstance(value, (int, float)):
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+def counter_name(event):
+    return "all-time" if event is None else f"event:{event}"
+
+
+class ShardedCounter:
+    def __init__(self, name, shards=8):
+        self.name = name
+        self.shards = max(1, shards)
+
+    def _shards(self, db):
+        return db.collection("counters").document(self.name).collection("shards")
+
+    def increment(self, db, deltas):
+        """Adds `deltas` (a possibly nested map of numbers) to one random shard."""
+        from firebase_admin import firestore
+
+        shard = self._shards(db).document(str(random.randrange(self.shards)))
+        shard.set(_increments(deltas, firestore.Increment), merge=True)
+
+    def read(self, db):
+        """Sum over every shard (also shards left over from a larger shard count)."""
+        totals = {}
+        for doc in self._shards(db).stream():
+            accumulate(totals, doc.to_dict() or {})
+        return totals
@@ -0,0 +1,48 @@
+import threading
+
+# Request coalescing for expensive read-only backend calls.
+# While one request is already running a call for a key (e.g. the full
+# leaderboard query), concurrent requests for the same key wait for that
+# result instead of issuing their own round trip, so a burst of pollers
+# costs one Firestore query and leaves worker threads free for writes.
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, on_shared=None):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._on_shared = on_shared   # called with the key whenever a result is shared
+
+    def do(self, key, fn):
+        """Runs fn() for `key`, or waits for the identical call already in flight."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if self._on_shared:
+                self._on_shared(key)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
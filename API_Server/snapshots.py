@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+pa = None   # pyarrow, imported by available() only when snapshots are enabled
+
+# Periodic leaderboard snapshots as Arrow IPC files.
+# Every SNAPSHOT_INTERVAL seconds the current board is written to
+#   <dir>/leaderboard-<version>.arrow    one row per user
+#   <dir>/maze_scores-<version>.arrow    one row per (user, maze)
+# Files are written under a temp name and renamed, and never modified after,
+# so readers can memory-map them. A new version is only written when the board
+# changed; otherwise the newest files are touched, so their mtime tells when
+# the board was last checked. The newest SNAPSHOT_KEEP versions are kept.
+# Every gunicorn worker runs a writer, but only the one holding an flock on
+# <dir>/.writer.lock writes; another takes over if that worker exits.
+
+TABLES = ("leaderboard", "maze_scores")
+FILE_PATTERN = re.compile(r"^(leaderboard|maze_scores)-(\d+)\.arrow$")
+LOCK_NAME = ".writer.lock"
+
+
+def available():
+    """Imports pyarrow on first use; False if it isn't installed."""
+    global pa
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.ipc  # noqa: F401
+        except ImportError:
+            return False
+        pa = pyarrow
+    return True
+
+
+def leaderboard_table(rows):
+    return pa.table({
+        "username": pa.array([row["username"] for row in rows], pa.string()),
+        "total": pa.array([float(row["total"]) for row in rows], pa.float64()),
+        "total_moves": pa.array([int(row["total_moves"]) for row in rows], pa.int64()),
+        "total_distance": pa.array([float(row["total_distance"]) for row in rows], pa.float64()),
+        "total_time": pa.array([float(row["total_time"]) for row in rows], pa.float64()),
+        "mazes_completed": pa.array([int(row["mazes_completed"]) for row in rows], pa.int32()),
+    })
+
+
+def maze_scores_table(rows):
+    columns = {"maze": [], "username": [], "score": [], "moves": [], "distance": [], "time": []}
+    for row in rows:
+        for maze_name, metrics in row["mazes"].items():
+            # metrics = [score, move_count, total_distance, elapsed]
+            if len(metrics) != 4:
+                continue
+            columns["maze"].append(maze_name)
+            columns["username"].append(row["username"])
+            columns["score"].append(float(metrics[0]))
+            columns["moves"].append(int(metrics[1]))
+            columns["distance"].append(float(metrics[2]))
+            columns["time"].append(float(metrics[3]))
+    return pa.table({
+        "maze": pa.array(columns["maze"], pa.string()),
+        "username": pa.array(columns["username"], pa.string()),
+        "score": pa.array(columns["score"], pa.float64()),
+        "moves": pa.array(columns["moves"], pa.int64()),
+        "distance": pa.array(columns["distance"], pa.float64()),
+        "time": pa.array(columns["time"], pa.float64()),
+    })
+
+
+def latest_version(directory):
+    """Highest version for which every table exists, or None."""
+    found = {}
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return None
+    for name in names:
+        match = FILE_PATTERN.match(name)
+        if match:
+            found.setdefault(int(match.group(2)), set()).add(match.group(1))
+    complete = [version for version, tables in found.items() if tables == set(TABLES)]
+    return max(complete) if complete else None
+
+
+def snapshot_filename(table, version):
+    return f"{table}-{version}.arrow"
+
+
+def checked_at(directory, version):
+    """When the board was last found to match `version` (unix time)."""
+    return os.path.getmtime(os.path.join(directory, snapshot_filename("leaderboard", version)))
+
+
+class SnapshotWriter:
+    def __init__(self, fetch_rows, directory, interval=60.0, keep=3):
+        self.fetch_rows = fetch_rows
+        self.directory = directory
+        self.interval = interval
+        self.keep = keep
+        self._content_hash = None
+        self._lock_fd = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self._acquire():
+                    self.write_once()
+            except Exception as e:
+                print(f"ERROR: Leaderboard snapshot failed: {e}", file=sys.stderr)
+            self._stop.wait(self.interval)
+
+    def _acquire(self):
+        """True if this process is the snapshot writer (taking the lock if it is free)."""
+        if self._lock_fd is not None:
+            return True
+        try:
+            import fcntl
+        except ImportError:   # no flock (Windows): every process writes
+            return True
+        os.makedirs(self.directory, exist_ok=True)
+        fd = os.open(os.path.join(self.directory, LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        print(f"INFO: Process {os.getpid()} writes the leaderboard snapshots.", file=sys.stderr)
+        return True
+
+    def write_once(self):
+        """Writes a new snapshot version if the board changed; returns the current version."""
+        rows = self.fetch_rows()
+        content_hash = hashlib.sha1(json.dumps(rows, sort_keys=True, default=str).encode()).hexdigest()
+        if content_hash == self._content_hash:
+            version = latest_version(self.directory)
+            if version is not None:
+                for table_name in TABLES:
+                    os.utime(os.path.join(self.directory, snapshot_filename(table_name, version)))
+            return version
+
+        os.makedirs(self.directory, exist_ok=True)
+        version = max(time.time_ns() // 1_000_000, (latest_version(self.directory) or 0) + 1)
+        for table_name, table in (("leaderboard", leaderboard_table(rows)), ("maze_scores", maze_scores_table(rows))):
+            path = os.path.join(self.directory, snapshot_filename(table_name, version))
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with pa.OSFile(tmp_path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, path)
+        self._content_hash = content_hash
+        self._prune(version)
+        print(f"INFO: Leaderboard snapshot {version} written ({len(rows)} users).", file=sys.stderr)
+        return version
+
+    def _prune(self, newest):
+        versions = sorted({
+            int(match.group(2))
+            for match in map(FILE_PATTERN.match, os.listdir(self.directory)) if match
+        }, reverse=True)
+        for version in versions[self.keep:]:
+            if version == newest:
+                continue
+            for table_name in TABLES:
+                try:
+                    os.remove(os.path.join(self.directory, snapshot_filename(table_name, version)))
+                except OSError:
+                    pass
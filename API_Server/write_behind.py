@@ -0,0 +1,265 @@
+"""
+Write-behind buffer for score submissions.
+
+When enabled, /submit_score does not write to Firestore directly. Each
+submission is merged into an in-memory entry for its user (totals are summed,
+the 'mazes' maps are merged) and a background thread flushes all pending
+entries in batches, either every `interval` seconds or as soon as
+`max_pending` users are waiting.
+
+Entries that could not be committed on shutdown are spilled to a local JSON
+file and replayed on the next start, so a restart never loses a score. Every
+process spills to its own file next to `spill_path` (write_behind_spill.json
+-> write_behind_spill.<pid>-<time>.json), and a starting worker claims each
+file by renaming it before replaying it, so no two workers overwrite or
+replay the same leftovers. Replayed entries are committed directly, and a
+claimed file is deleted only after its entries are written (the part that
+failed is spilled again).
+
+Each gunicorn worker owns its own buffer, so read-your-writes holds for
+requests served by the same worker process.
+"""
+import atexit
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+TOTAL_FIELDS = ("total", "total_moves", "total_distance", "total_time")
+
+
+def empty_entry():
+    return {
+        "total": 0.0,
+        "total_moves": 0,
+        "total_distance": 0.0,
+        "total_time": 0.0,
+        "mazes": {},
+    }
+
+
+def merge_entry(entry, delta):
+    """Adds the totals of `delta` onto `entry` and merges its 'mazes' map (newer wins)."""
+    for field in TOTAL_FIELDS:
+        entry[field] = entry.get(field, 0) + delta.get(field, 0)
+    entry.setdefault("mazes", {}).update(delta.get("mazes", {}))
+    return entry
+
+
+class WriteBehindBuffer:
+    """
+    Coalesces per-user score deltas in memory and flushes them in batches.
+
+    `commit_fn(items)` receives a list of (username, entry) pairs, writes them
+    in one batch and returns the commit's update time (or None). A failing
+    commit leaves its entries queued for the next flush.
+    """
+
+    def __init__(self, commit_fn, interval=2.0, max_pending=200, batch_size=400,
+                 spill_path=None, grace_period=60.0):
+        self._commit_fn = commit_fn
+        self.interval = interval
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.spill_path = spill_path
+        self.grace_period = grace_period
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self._pending = {}      # username -> entry waiting for the next flush
+        self._inflight = {}     # username -> entry currently being committed
+        self._committed = deque()  # (monotonic time, update_time, {username: entry})
+
+    # --- Lifecycle ---
+    def start(self):
+        self._load_spill()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stops the flusher, commits everything left and spills what still fails."""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+        self.flush()
+        self._spill()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    # --- Submissions ---
+    def add(self, username, delta):
+        """Merges a submission into the user's pending entry."""
+        with self._lock:
+            entry = self._pending.setdefault(username, empty_entry())
+            merge_entry(entry, delta)
+            if len(self._pending) >= self.max_pending:
+                self._wake.set()
+
+    def flush(self):
+        """Commits all pending entries in batches of `batch_size`."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                self._inflight, self._pending = self._pending, {}
+                items = list(self._inflight.items())
+
+            written = 0
+            for i in range(0, len(items), self.batch_size):
+                chunk = items[i:i + self.batch_size]
+                try:
+                    update_time = self._commit_fn(chunk)
+                except Exception as e:
+                    print(f"Write-behind flush error: {e}", file=sys.stderr)
+                    self._requeue(items[i:])
+                    break
+                with self._lock:
+                    self._committed.append((time.monotonic(), update_time, dict(chunk)))
+                    for username, _ in chunk:
+                        self._inflight.pop(username, None)
+                written += len(chunk)
+
+            with self._lock:
+                self._inflight = {}
+                self._prune_committed()
+            return written
+
+    def _requeue(self, items):
+        # Failed entries are older than anything that arrived meanwhile, so
+        # newer maze results must win when the two are merged.
+        with self._lock:
+            for username, entry in items:
+                self._inflight.pop(username, None)
+                newer = self._pending.get(username)
+                if newer is not None:
+                    merge_entry(entry, newer)
+                self._pending[username] = entry
+
+    def _prune_committed(self):
+        cutoff = time.monotonic() - self.grace_period
+        while self._committed and self._committed[0][0] < cutoff:
+            self._committed.popleft()
+
+    # --- Read-your-writes ---
+    def overlay(self):
+        """
+        Captures what a database read may still be missing.
+
+        Take the overlay after the read has returned: pending and in-flight
+        entries are always added, and recently committed batches are added
+        only for documents read before that commit.
+        """
+        with self._lock:
+            unsent = {}
+            for source in (self._inflight, self._pending):
+                for username, entry in source.items():
+                    merge_entry(unsent.setdefault(username, empty_entry()), entry)
+            committed = [(update_time, entries) for _, update_time, entries in self._committed]
+        return ReadOverlay(unsent, committed)
+
+    # --- Durability ---
+    def _spill_files(self):
+        """Spill files left by any process (including the plain `spill_path` of older versions)."""
+        base, ext = os.path.splitext(self.spill_path)
+        return sorted(set(glob.glob(f"{glob.escape(base)}.*{ext}")) | {self.spill_path})
+
+    def _spill(self):
+        with self._lock:
+            leftover = dict(self._pending)
+        if not leftover or not self.spill_path:
+            return
+        try:
+            path = self._write_spill(leftover)
+            print(f"WARNING: Spilled {len(leftover)} unflushed submissions to {path}", file=sys.stderr)
+        except OSError as e:
+            print(f"FATAL ERROR spilling write-behind buffer: {e}", file=sys.stderr)
+
+    def _write_spill(self, leftover):
+        """Writes `leftover` to a new spill file of this process and returns its path."""
+        base, ext = os.path.splitext(self.spill_path)
+        path = f"{base}.{os.getpid()}-{time.time_ns()}{ext}"
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(leftover, f)
+        os.replace(f"{path}.tmp", path)
+        return path
+
+    def _load_spill(self):
+        """
+        Commits every spill file left by any process. A file is removed only
+        once all its entries are written; what failed is spilled again for
+        the next start.
+        """
+        if not self.spill_path:
+            return
+        for path in self._spill_files():
+            # Renaming is atomic: if another worker claimed the file first, this one fails
+            claimed = f"{path}.{os.getpid()}.claimed"
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            try:
+                with open(claimed, "r") as f:
+                    items = list(json.load(f).items())
+            except (OSError, ValueError) as e:
+                print(f"Write-behind spill file {path} could not be replayed: {e}", file=sys.stderr)
+                continue
+            print(f"INFO: Replaying {len(items)} spilled submissions from {path}.", file=sys.stderr)
+            for i in range(0, len(items), self.batch_size):
+                try:
+                    self._commit_fn(items[i:i + self.batch_size])
+                except Exception as e:
+                    print(f"Write-behind replay error: {e}", file=sys.stderr)
+                    self._respill(claimed, dict(items[i:]))
+                    break
+            else:
+                os.remove(claimed)
+
+    def _respill(self, claimed, leftover):
+        """Puts the uncommitted rest of a claimed spill file back for the next start."""
+        try:
+            path = self._write_spill(leftover)
+            os.remove(claimed)
+            print(f"WARNING: {len(leftover)} spilled submissions left in {path}", file=sys.stderr)
+        except OSError as e:
+            print(f"FATAL ERROR re-spilling write-behind entries (kept in {claimed}): {e}", file=sys.stderr)
+
+
+class ReadOverlay:
+    """Buffered deltas to add on top of a leaderboard read."""
+
+    def __init__(self, unsent, committed):
+        self._unsent = unsent
+        self._committed = committed
+        self.usernames = set(unsent)
+        for _, entries in committed:
+            self.usernames.update(entries)
+
+    def delta(self, username, doc_update_time=None):
+        """Returns the entry to merge onto `username`'s document, or None."""
+        delta = None
+        for update_time, entries in self._committed:
+            entry = entries.get(username)
+            if entry is None or update_time is None:
+                continue
+            if doc_update_time is not None and doc_update_time >= update_time:
+                continue
+            delta = merge_entry(delta or empty_entry(), entry)
+        if username in self._unsent:
+            delta = merge_entry(delta or empty_entry(), self._unsent[username])
+        return delta
@@ -1,25 +1,58 @@
+import time
+STARTED_AT = time.perf_counter()  # time-to-first-frame is measured from here
+
 import turtle
 import tkinter as tk
-import time
 import json
 import math
+import os
+import queue
+import random
+import subprocess
+import sys
+import threading
+import uuid
 import tkinter.messagebox as msg
+import tkinter.ttk as ttk
 import tkinter.simpledialog as simpledialog
-import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from frame_profiler import make_profiler
+from distance_field import field_for_maze
+from command_script import ScriptError, compile_script, trace
+from ghost_replay import load_tracks, record_path, save_ghost, to_text
+from maze_catalog import load_catalog, maze_hash
+from maze_engine import STEP_DELAY, TURN, TURN_DELAY, VirtualClock, compute_score, run_path
+from viewport import Viewport
 
 API_URL = "https://ace-rnd-escapeprotocol.onrender.com/submit_score"
+WARMUP_URL = "https://ace-rnd-escapeprotocol.onrender.com/warmup"  # wakes the server while the player plays
+SUBMIT_ATTEMPTS = 4     # score uploads are retried with backoff; the submission id makes that safe
+SUBMIT_TIMEOUT = 10     # seconds per attempt
 PLAYER_USERNAME = ""
 # ------------------ CONFIG ------------------
-maze_files = [
-    r"src/mazes/Polygon.json",
-    r"src/mazes/test.json",
-    r"src/mazes/maze1.json",
-    r"src/mazes/logo.json",
-]
+# Mazes to play, by file stem, maze name or hash (see src/maze_catalog.py).
+# ESCAPE_MAZES="Birb,Vision" overrides the list, ESCAPE_MAZES=all plays every maze.
+MAZE_PLAYLIST = ["Polygon", "test", "maze1", "logo"]
+catalog = load_catalog()
+playlist = os.environ.get("ESCAPE_MAZES", "")
+if playlist == "all":
+    maze_files = [catalog.path(name) for name, _ in catalog.entries()]
+else:
+    maze_files = catalog.resolve(playlist.split(",") if playlist else MAZE_PLAYLIST)
 current_maze_index = 0
 scores = {}
 timer_running = False
 start_time = 0
+profiler = make_profiler()  # ESCAPE_PROFILE=1 times every step of run_commands
+USE_DISTANCE_FIELD = os.environ.get("ESCAPE_DISTANCE_FIELD", "1") == "1"  # O(1) collision lookups
+STARTUP_LOG = os.environ.get("ESCAPE_STARTUP_LOG")  # append startup timings (JSON lines) to this file
+SCORE_CLOCK = os.environ.get("ESCAPE_SCORE_CLOCK", "virtual")  # "virtual" (planning + simulated travel) or "wall"
+PLAYBACK_SPEED = float(os.environ.get("ESCAPE_PLAYBACK_SPEED", "1"))  # 2 = twice as fast, 0 = instant
+EVENT = os.environ.get("ESCAPE_EVENT")  # event / season id: scores go to that event's board
+GHOST_DIR = os.environ.get("ESCAPE_GHOST_DIR", "ghosts")  # best runs per maze, replayed as ghosts
+GHOST_COUNT = int(os.environ.get("ESCAPE_GHOSTS", "3"))  # ghosts shown (and kept) per maze, 0 = off
+score_clock = VirtualClock()
 # --------------------------------------------
 
 # --- Main Tkinter window ---
@@ -53,10 +86,9 @@ canvas.pack()
 screen = turtle.TurtleScreen(canvas)
 screen.tracer(0)   # manual updates
 
-# Maze drawing turtle
-maze = turtle.RawTurtle(screen)
-maze.speed(0)
-maze.hideturtle()
+# Zoom/pan view; draws the walls itself (created before the turtles, see viewport.py)
+viewport = Viewport(screen)
+viewport.bind()
 
 # Player turtle
 player = turtle.RawTurtle(screen)
@@ -70,11 +102,18 @@ goal_marker.shape("circle")
 goal_marker.color("green")
 goal_marker.penup()
 
+# Ghost turtles (created on first use)
+GHOST_COLORS = ["gray60", "gray70", "gray80", "gray50", "gray40"]
+ghost_turtles = []
+
 # Globals
 walls = []
+distance_field = None
+distance_field_lock = threading.Lock()   # a maze switch and a field install never interleave
 start_pos = (0, 0)
 goal_pos = (0, 0)
 maze_name = ""
+maze_key = ""   # content hash: ghosts of an edited maze don't carry over
 
 total_moves_all = 0
 total_distance_all = 0.0
@@ -96,7 +135,8 @@ def get_username():
             status_label.config(text="Status: Ready (Anonymous Player)")
 
 # --- Send Users Score ---
-def send_score(username, score, maze_scores, moves, distance):
+def send_score(username, score, maze_scores, moves, distance, replays=None):
+    import requests  # only needed once a maze is finished; preloaded in the background at startup
     data = {
         "username": username,
         "score": score,
@@ -104,8 +144,65 @@ def send_score(username, score, maze_scores, moves, distance):
         "moves": moves,
         "distance": distance,
     }
-    response = requests.post(API_URL, json=data)
-    print(response.json())
+    if EVENT:
+        data["event"] = EVENT
+    if replays:
+        data["replays"] = replays   # {maze name: base64 ghost file}
+    # One id for every attempt: the server answers a repeated id without counting the score again
+    data["submission_id"] = uuid.uuid4().hex
+    for attempt in range(SUBMIT_ATTEMPTS):
+        retry_after = 0.0
+        try:
+            response = requests.post(API_URL, json=data, timeout=SUBMIT_TIMEOUT)
+            if response.status_code < 500 and response.status_code not in (409, 429):
+                print(response.text)
+                return response.ok
+            reason = f"HTTP {response.status_code}"
+            retry_after = float(response.headers.get("Retry-After", 0) or 0)
+        except (requests.RequestException, ValueError) as e:
+            reason = str(e)
+        if attempt + 1 < SUBMIT_ATTEMPTS:
+            delay = max(retry_after, min(8.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0))
+            print(f"WARNING: Score upload failed ({reason}); retrying in {delay:.1f}s", file=sys.stderr)
+            time.sleep(delay)
+    print(f"ERROR: Score upload failed after {SUBMIT_ATTEMPTS} attempts ({reason}).", file=sys.stderr)
+    return False
+
+# Uploads retry for up to ~50 s, so they run on worker threads and report
+# back through a queue polled from the event loop.
+upload_results = queue.Queue()
+uploads_pending = 0
+
+
+def upload_score(maze, **score):
+    """send_score on a worker thread; the outcome is shown in the status label."""
+    global uploads_pending
+
+    def worker():
+        try:
+            uploaded = send_score(**score)
+        except Exception as e:   # e.g. requests missing; the game carries on either way
+            print(f"ERROR: Score upload failed: {e}", file=sys.stderr)
+            uploaded = False
+        upload_results.put((maze, uploaded))
+
+    threading.Thread(target=worker, daemon=True).start()
+    uploads_pending += 1
+    if uploads_pending == 1:
+        root.after(100, poll_uploads)
+
+
+def poll_uploads():
+    global uploads_pending
+    while True:
+        try:
+            maze, uploaded = upload_results.get_nowait()
+        except queue.Empty:
+            break
+        uploads_pending -= 1
+        status_label.config(text=f"{maze} Complete! Uploaded\n" if uploaded else f"{maze} Complete! ⚠️ Upload failed\n")
+    if uploads_pending:
+        root.after(100, poll_uploads)
 
 # --- Border Color SET ---
 def set_border_color(color):
@@ -113,23 +210,38 @@ def set_border_color(color):
     border_frame.update()
 
 # --- Maze Loader ---
+def load_distance_field(filename, maze_walls):
+    """
+    Loads (or builds) the maze's distance field off the UI thread. Until it
+    arrives wall_hit_index runs the exact scan, which gives the same answers.
+    """
+    def worker():
+        global distance_field
+        field = field_for_maze(filename, maze_walls)
+        with distance_field_lock:
+            if maze_walls is walls:   # still the current maze
+                distance_field = field
+
+    threading.Thread(target=worker, daemon=True).start()
+
+
+
 def build_maze(filename):
-    global walls, start_pos, goal_pos, maze_name
-    maze.clear()
-    walls.clear()
+    global walls, start_pos, goal_pos, maze_name, maze_key, distance_field
     with open(filename, "r") as f:
         data = json.load(f)
-    walls = data["walls"]
+    with distance_field_lock:
+        walls = data["walls"]
+        distance_field = None
+    if USE_DISTANCE_FIELD:
+        load_distance_field(filename, walls)
     start_pos = tuple(data["start"])
     goal_pos = tuple(data["goal"])
     maze_name = data["name"]
+    maze_key = maze_hash(data)[:16]
     maze_label.config(text=maze_name)
-    for wall in walls:
-        x1, y1, x2, y2 = wall
-        maze.penup()
-        maze.goto(x1, y1)
-        maze.pendown()
-        maze.goto(x2, y2)
+    hide_ghosts()
+    viewport.set_walls(walls, points=(start_pos, goal_pos), fit=True)
     player.clear()
     player.penup()
     player.goto(start_pos)
@@ -164,16 +276,85 @@ def show_final_scores():
     msg.showinfo("Results", summary)
 
 
+# --- Ghosts ---
+def show_ghosts():
+    """Loads this maze's best local runs and puts a ghost turtle at each start."""
+    if GHOST_COUNT <= 0:
+        return []
+    tracks = load_tracks(GHOST_DIR, maze_key, GHOST_COUNT)
+    while len(ghost_turtles) < len(tracks):
+        ghost = turtle.RawTurtle(screen)
+        ghost.shape("turtle")
+        ghost.color(GHOST_COLORS[len(ghost_turtles) % len(GHOST_COLORS)])
+        ghost.penup()
+        ghost.hideturtle()
+        ghost_turtles.append(ghost)
+    for ghost in ghost_turtles:
+        ghost.hideturtle()
+    for ghost in ghost_turtles[:len(tracks)]:
+        ghost.goto(start_pos)
+        ghost.setheading(0)
+        ghost.showturtle()
+    return tracks
+
+
+def advance_ghosts(tracks, elapsed):
+    """
+    Moves every ghost to where its run was after `elapsed` simulated seconds;
+    a ghost whose file turns out to be damaged is dropped.
+    """
+    for ghost, track in zip(ghost_turtles, tracks):
+        try:
+            pose = track.advance(elapsed)
+        except ValueError as e:
+            print(f"WARNING: Dropping ghost {track.header.get('username', '?')}: {e}", file=sys.stderr)
+            track.close()
+            ghost.hideturtle()
+            continue
+        if pose is not None:
+            ghost.goto(pose[0], pose[1])
+            ghost.setheading(pose[2])
+
+
+def hide_ghosts():
+    for ghost in ghost_turtles:
+        ghost.hideturtle()
+
+
+def close_ghosts(tracks):
+    """Closes the files of ghosts still mid-run when the player's run ends."""
+    for track in tracks:
+        track.close()
+
+
+def record_ghost(path, result, score):
+    """Saves the finished run as a local ghost; returns the file bytes (None if ghosts are off)."""
+    if GHOST_COUNT <= 0:
+        return None
+    blob = record_path(path, result, {"maze": maze_name, "score": round(score, 2), "username": PLAYER_USERNAME})
+    try:
+        save_ghost(GHOST_DIR, maze_key, blob, keep=GHOST_COUNT)
+    except OSError as e:
+        print(f"WARNING: Could not save ghost: {e}", file=sys.stderr)
+    return blob
+
+
 # --- Collision Detection ---
-def is_collision(x, y):
+def wall_hit_index(x, y):
+    """Returns the index of the first wall closer than THRESHOLD to (x, y), or -1."""
     THRESHOLD = 5
-    for x1, y1, x2, y2 in walls:
+    # Away from the threshold band the distance field answers on its own
+    if distance_field is not None and distance_field.classify(x, y, THRESHOLD) is False:
+        profiler.count_collision(None)
+        return -1
+    for i, (x1, y1, x2, y2) in enumerate(walls):
         dx = x2 - x1
         dy = y2 - y1
         len_sq = dx * dx + dy * dy
         if len_sq == 0:
             if math.hypot(x - x1, y - y1) < THRESHOLD:
-                return True
+                profiler.count_collision(i)
+                return i
             continue
         t = ((x - x1) * dx + (y - y1) * dy) / len_sq
         t = max(0, min(1, t))
@@ -181,32 +362,53 @@ def is_collision(x, y):
         closest_y = y1 + t * dy
         distance = math.hypot(x - closest_x, y - closest_y)
         if distance < THRESHOLD:
-            return True
-    return False
+            profiler.count_collision(i)
+            return i
+    profiler.count_collision(-1)
+    return -1
+
+
+def is_collision(x, y):
+    return wall_hit_index(x, y) >= 0
 
 
 # --- Timer ---
 def start_timer():
     global start_time, timer_running
     start_time = time.time()
+    score_clock.reset()
     timer_running = True
     update_timer()
 
 
+def score_elapsed():
+    """Seconds that count towards the score for the current maze."""
+    if SCORE_CLOCK == "wall":
+        return time.time() - start_time
+    return score_clock.elapsed()
+
+
 def update_timer():
     if timer_running:
-        elapsed = time.time() - start_time
+        elapsed = score_elapsed()
         timer_label.config(text=f"⏱ Time: {int(elapsed)}s")
         root.after(1000, update_timer)
 
 
 # --- Command Execution ---
+def show_script_error(error):
+    text_box.tag_remove("script_error", "1.0", tk.END)
+    text_box.tag_add("script_error", f"{error.line}.0", f"{error.line}.end")
+    text_box.see(f"{error.line}.0")
+    status_label.config(text=f"❌ Line {error.line}: {error.message}")
+    set_border_color("red")
+
+
 def run_commands():
     global start_time, timer_running, total_time_all, total_moves_all, total_distance_all, total_score_all, maze_name
-    move_count = 0
-    total_distance = 0
 
     set_border_color("white")
+    text_box.tag_remove("script_error", "1.0", tk.END)
     player.clear()
     player.penup()
     player.goto(start_pos)
@@ -214,84 +416,188 @@ def run_commands():
     player.setheading(0)
     screen.update()
 
-    commands = text_box.get("1.0", tk.END).strip().splitlines()
-
-    for cmd in commands:
-        parts = cmd.strip().split()
-        if not parts:
+    score_clock.begin_run()
+    profiler.begin_run(maze_name, len(walls))
+    profiler.start_step()
+    try:
+        program = compile_script(text_box.get("1.0", tk.END))
+        path = trace(program, start_pos)
+    except ScriptError as e:
+        profiler.end_step()
+        profiler.finish("script error")
+        score_clock.end_run(0.0)
+        show_script_error(e)
+        return
+    profiler.mark("compile")
+    result = run_path(path, goal_pos, lambda x, y: wall_hit_index(x, y) >= 0,
+                      profiler.mark if profiler.enabled else None)
+    profiler.mark("tally")
+    profiler.end_step()
+
+    # Play the precomputed path back up to the step where the run ends.
+    # The score clock only counts the simulated travel time, so playback may
+    # run at any speed; at speed 0 the screen is only redrawn per command.
+    # Ghosts follow the same simulated clock (`travel`).
+    instant = PLAYBACK_SPEED <= 0
+    last_step = result["steps"] - 1
+    ghosts = show_ghosts()
+    travel = 0.0
+    for i in range(result["instructions"]):
+        if program.ops[i] == TURN:
+            profiler.start_step()
+            player.right(program.args[i])
+            travel += TURN_DELAY
+            advance_ghosts(ghosts, travel)
+            profiler.mark("turn")
+            if not instant:
+                screen.update()
+                profiler.mark("render")
+                time.sleep(TURN_DELAY / PLAYBACK_SPEED)
+                profiler.mark("delay")
+            profiler.end_step()
             continue
-        action = parts[0].upper()
-        move_count += 1
-        if action == "MOVE" and len(parts) == 2:
-            try:
-                dist = int(parts[1])
-                total_distance += abs(dist)
-                step = 5
-                for _ in range(abs(dist)//step):
-                    player.forward(step if dist > 0 else -step)
-                    screen.update()
-                    time.sleep(0.02)
-                    if is_collision(player.xcor(), player.ycor()):
-                        player.backward(step)
-                        status_label.config(text="💥 Hit a wall! Try again.")
-                        set_border_color("red")
-                        return
-                    if player.distance(goal_pos) < 15:
-                        elapsed = time.time() - start_time
-                        score = max(0, 1000 - (elapsed * 2 + move_count * 1 + total_distance * 0.1))
-                        scores[f"{maze_name}"] = score
-                        print(scores)
-                        set_border_color("green")
-                        timer_running = False
-                        total_moves_all += move_count
-                        total_distance_all += total_distance
-                        total_score_all += score
-                        status_label.config(
-                            text=f"{maze_name} Complete!\n"
-                        )
-                        score_label.config(
-                            text=f"⏱ Prev. Maze Time: {elapsed:.2f}s\n🚶 Moves: {total_moves_all}\n📏 Distance: {int(total_distance_all)}\n🏆 Score: {total_score_all:.2f}"
-                        )
-                        screen.update()
-                        if PLAYER_USERNAME == "" or PLAYER_USERNAME == "Anonymous":
-                            print("Score not submitted: Anonymous player.")
-                            pass 
-                        else:
-                            status_label.config(
-                                text=f"{maze_name} Complete! Uploading score\n"
-                            )
-                            screen.update()
-                            # Submit the total score and the current maze score
-                            send_score(
-                                username=PLAYER_USERNAME, 
-                                score=score, 
-                                maze_scores={maze_name: [score,move_count,total_distance,elapsed]},
-                                moves=move_count,        # Pass the move count for this single maze
-                                distance=total_distance, # Pass the distance for this single maze
-                            )
-                            status_label.config(
-                                text=f"{maze_name} Complete! Uploaded\n"
-                            )
-                        if current_maze_index == len(maze_files) - 1:
-                            # final maze — show final scores after a short pause so user can read
-                            root.after(1500, show_final_scores)
-                        else:
-                            # not last one — go to next maze after a short pause
-                            root.after(2000, load_next_maze)
-                        return
-            except:
-                pass
-        elif action == "TURN" and len(parts) == 2:
-            try:
-                angle = int(parts[1])
-                player.right(angle)
+        for k in range(path.first_step[i], min(path.first_step[i + 1], last_step + 1)):
+            profiler.start_step()
+            player.goto(path.xs[k], path.ys[k])
+            travel += STEP_DELAY
+            advance_ghosts(ghosts, travel)
+            profiler.mark("motion")
+            if not instant:
                 screen.update()
-                time.sleep(0.1)
-            except:
-                pass
+                profiler.mark("render")
+                time.sleep(STEP_DELAY / PLAYBACK_SPEED)
+                profiler.mark("delay")
+            profiler.end_step()
+        if instant:
+            screen.update()
+    close_ghosts(ghosts)
+    score_clock.end_run(result["elapsed"])
+
+    move_count = result["moves"]
+    total_distance = result["distance"]
+    if result["outcome"] == "collision":
+        profiler.finish("hit wall")
+        stop = result["stop_step"]
+        player.goto((path.xs[stop - 1], path.ys[stop - 1]) if stop else start_pos)
+        status_label.config(text="💥 Hit a wall! Try again.")
+        set_border_color("red")
+        return
+    if result["outcome"] == "goal":
+        profiler.finish("goal")
+        elapsed = score_elapsed()
+        score = compute_score(elapsed, move_count, total_distance)
+        scores[f"{maze_name}"] = score
+        ghost = record_ghost(path, result, score)
+        print(scores)
+        set_border_color("green")
+        timer_running = False
+        total_moves_all += move_count
+        total_distance_all += total_distance
+        total_score_all += score
+        status_label.config(
+            text=f"{maze_name} Complete!\n"
+        )
+        score_label.config(
+            text=f"⏱ Prev. Maze Time: {elapsed:.2f}s\n🚶 Moves: {total_moves_all}\n📏 Distance: {int(total_distance_all)}\n🏆 Score: {total_score_all:.2f}"
+        )
+        screen.update()
+        if PLAYER_USERNAME == "" or PLAYER_USERNAME == "Anonymous":
+            print("Score not submitted: Anonymous player.")
+            pass 
+        else:
+            status_label.config(
+                text=f"{maze_name} Complete! Uploading score\n"
+            )
+            # Submit the total score and the current maze score (in the background)
+            upload_score(
+                maze_name,
+                username=PLAYER_USERNAME, 
+                score=score, 
+                maze_scores={maze_name: [score,move_count,total_distance,elapsed]},
+                moves=move_count,        # Pass the move count for this single maze
+                distance=total_distance, # Pass the distance for this single maze
+                replays={maze_name: to_text(ghost)} if ghost else None,
+            )
+        if current_maze_index == len(maze_files) - 1:
+            # final maze — show final scores after a short pause so user can read
+            root.after(1500, show_final_scores)
+        else:
+            # not last one — go to next maze after a short pause
+            root.after(2000, load_next_maze)
+        return
+    profiler.finish("finished commands")
     status_label.config(text="✅ Finished commands")
 
 
+# --- Evaluate Script On All Mazes ---
+# The evaluator runs in its own process (it fans out to a process pool, which
+# must not re-import this Tk script), fed the script on stdin.
+EVALUATOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "script_evaluator.py")
+evaluation_results = queue.Queue()
+
+
+def evaluate_all_mazes():
+    script = text_box.get("1.0", tk.END)
+    text_box.tag_remove("script_error", "1.0", tk.END)
+    evaluate_button.config(state="disabled")
+    status_label.config(text=f"🧪 Evaluating script on {len(maze_files)} mazes...")
+
+    def worker():
+        try:
+            completed = subprocess.run(
+                [sys.executable, EVALUATOR, "--json", "-", *maze_files],
+                input=script, capture_output=True, text=True, timeout=120,
+            )
+            evaluation_results.put(json.loads(completed.stdout))
+        except (OSError, ValueError, subprocess.SubprocessError) as e:
+            evaluation_results.put({"error": f"Evaluation failed: {e}", "line": None})
+
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(50, poll_evaluation)
+
+
+def poll_evaluation():
+    try:
+        report = evaluation_results.get_nowait()
+    except queue.Empty:
+        root.after(50, poll_evaluation)
+        return
+    evaluate_button.config(state="normal")
+    if "error" in report:
+        if report["line"]:
+            show_script_error(ScriptError(report["line"], report["error"]))
+        else:
+            status_label.config(text=f"❌ {report['error']}")
+        return
+    rows = report["results"]
+    passed = sum(row["outcome"] == "goal" for row in rows)
+    status_label.config(text=f"🧪 Script reaches the goal on {passed}/{len(rows)} mazes")
+    show_evaluation(rows)
+
+
+def show_evaluation(rows):
+    window = tk.Toplevel(root)
+    window.title("🧪 Script Evaluation")
+    columns = ("maze", "result", "moves", "distance", "stopped", "score")
+    headings = ("Maze", "Result", "Moves", "Distance", "Stopped at", "Projected score")
+    table = ttk.Treeview(window, columns=columns, show="headings", height=len(rows))
+    for column, heading in zip(columns, headings):
+        table.heading(column, text=heading)
+        table.column(column, width=200 if column == "maze" else 100, anchor="w" if column == "maze" else "center")
+    for row in rows:
+        if row["outcome"] == "error":
+            table.insert("", tk.END, values=(row["name"], "⚠ error", "", "", row["error"], ""))
+            continue
+        result = {"goal": "✅ pass", "collision": "💥 wall", "finished": "❌ short"}[row["outcome"]]
+        stopped = "" if row["outcome"] == "goal" else f"({row['position'][0]:.0f}, {row['position'][1]:.0f})"
+        if row["outcome"] == "collision":
+            stopped += f" line {row['line']}"
+        table.insert("", tk.END, values=(row["name"], result, row["moves"], row["distance"], stopped,
+                                         f"{row['projected_score']:.2f}"))
+    table.pack(padx=10, pady=10)
+    tk.Label(window, text="Projected score assumes no thinking time.", font=("Arial", 9)).pack(pady=(0, 10))
+
+
 # --- UI ELEMENTS ---
 timer_label = tk.Label(frame_left, text="⏱ Time: 0.0s", font=("Consolas", 11, "bold"))
 timer_label.pack(pady=5)
@@ -303,11 +609,15 @@ label = tk.Label(frame_left, text="Enter commands:")
 label.pack()
 
 text_box = tk.Text(frame_left, height=15, width=25)
+text_box.tag_configure("script_error", background="#ffd6d6")
 text_box.pack()
 
 run_button = tk.Button(frame_left, text="▶ Run", command=run_commands)
 run_button.pack(pady=5)
 
+evaluate_button = tk.Button(frame_left, text="🧪 Evaluate on all mazes", command=evaluate_all_mazes)
+evaluate_button.pack(pady=5)
+
 status_label = tk.Label(frame_left, text="Status: Ready", justify="left", wraplength=250)
 status_label.pack()
 
@@ -330,6 +640,13 @@ using text-based movement commands — without hitting any walls.
 - Rotates the turtle clockwise by the given number of degrees.
 - Rotates Anti Clockwise by using negative number of degrees.
 
+🔁 REPEAT <count> ... END
+- Runs the commands between REPEAT and END <count> times.
+- Blocks can be nested.
+
+# comment
+- Anything after # on a line is ignored.
+
 ───────────────────────────────
 💻 **EXAMPLES**
 ───────────────────────────────
@@ -340,6 +657,11 @@ MOVE 240
 TURN 55
 MOVE 70 
 
+REPEAT 4
+  MOVE 50
+  TURN 90
+END
+
 ───────────────────────────────
 🎯 **GOAL**
 ───────────────────────────────
@@ -351,7 +673,7 @@ MOVE 70
 🕹️ **SCORING SYSTEM**
 ───────────────────────────────
 🏆 Final Score is calculated from:
-- ⏱️ Time taken  
+- ⏱️ Time taken (thinking time + travel time of your runs)  
 - 🚶 Number of moves (commands)  
 - 📏 Total distance traveled  
 
@@ -363,6 +685,7 @@ Higher scores = better performance!
 - Try smaller moves for precision.
 - Use right angles (90°) for sharp turns.
 - Plan your path before executing commands.
+- 🧪 Evaluate on all mazes shows how your script does on every maze at once.
 
 Good luck, maze solver! 🎉
 """
@@ -384,10 +707,67 @@ Good luck, maze solver! 🎉
 help_button = tk.Button(frame_left, text="❓ Help / Instructions", command=show_instructions)
 help_button.pack(pady=5)
 
-get_username()
-
-# Build first maze and start timer
-build_maze(maze_files[current_maze_index])
-start_timer()
-
-root.mainloop()
+# --- Startup ---
+def preload_modules():
+    """
+    Imports modules that are only needed later (network upload) in the
+    background and wakes the API server, so a cold start doesn't land in
+    send_score.
+    """
+    def worker():
+        try:
+            import requests
+        except ImportError as e:
+            print(f"WARNING: {e}; scores can't be uploaded.", file=sys.stderr)
+            return
+        try:
+            requests.post(WARMUP_URL, timeout=60)
+        except requests.RequestException as e:
+            print(f"WARNING: Server warm-up failed: {e}", file=sys.stderr)
+
+    threading.Thread(target=worker, daemon=True).start()
+
+
+def report_startup(window_ms, first_frame_ms):
+    print(f"INFO: Window shown after {window_ms:.0f} ms, first maze drawn after {first_frame_ms:.0f} ms",
+          file=sys.stderr)
+    if STARTUP_LOG:
+        try:
+            with open(STARTUP_LOG, "a") as f:
+                f.write(json.dumps({
+                    "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "window_ms": round(window_ms, 1),
+                    "first_frame_ms": round(first_frame_ms, 1),
+                    "python": sys.version.split()[0],
+                }) + "\n")
+        except OSError as e:
+            print(f"Could not write startup log: {e}", file=sys.stderr)
+
+
+def startup(window_ms):
+    """Deferred setup, run from the event loop once the window is on screen."""
+    if not maze_files:
+        # Every playlist key was unknown (each one already reported by catalog.resolve)
+        message = f"No mazes to play: playlist '{playlist or ','.join(MAZE_PLAYLIST)}' matches nothing in {catalog.directory}"
+        print(f"ERROR: {message}", file=sys.stderr)
+        status_label.config(text="❌ No mazes to play")
+        msg.showerror("No mazes", message)
+        return
+    build_maze(maze_files[current_maze_index])
+    root.update_idletasks()
+    report_startup(window_ms, (time.perf_counter() - STARTED_AT) * 1000)
+    preload_modules()
+    get_username()
+    start_timer()
+
+
+def main():
+    # Paint the (empty) window first, then build the first maze from the event loop
+    root.update()
+    window_ms = (time.perf_counter() - STARTED_AT) * 1000
+    root.after(0, startup, window_ms)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import gc
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import deque
+
+from command_script import compile_script, trace
+from distance_field import DistanceField, field_for_maze
+from maze_catalog import load_catalog
+from maze_engine import THRESHOLD, WallGrid, is_collision, load_maze, run_path, wall_hit_index
+from maze_generator import generate
+from maze_solver import solve
+
+# Engine benchmarks over the shipped mazes and generated grids of growing size.
+# RUN : python src/bench_engine.py [--quick] [--save-baseline] [--threshold 0.25]
+#
+#   collision.scan     maze_engine.is_collision (linear scan over every wall)
+#   collision.field    distance-field lookup with exact fallback (the game's path)
+#   collision.grid     WallGrid cell lookup + exact test
+#   load.cached        load_maze + field_for_maze with a warm .dfield cache (build_maze)
+#   load.cold          load_maze + DistanceField.build (first run of a new maze)
+#   script.run         compile_script + trace + run_path of a route to the goal, in steps/s
+#
+# Every result is ops/s (best of several repeats). Results are compared with
+# bench_baseline.json next to this file (one baseline per mode, full and
+# --quick); a benchmark still slower than its baseline by more than
+# --threshold after re-measuring exits with status 1. Baselines are
+# machine-specific: re-save them (--save-baseline) on the machine that checks.
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+GRID_SIZES = (5, 10, 20, 40, 80)
+QUICK_SIZES = (5, 20, 40)
+CELL = 20
+RETRIES = 2
+
+
+def best_rate(fn, ops, repeats=5, min_time=0.05):
+    """ops/s of fn() (which performs `ops` operations), best of `repeats` timed batches."""
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()   # like timeit: a collection landing in one batch skews it
+    try:
+        return ops / _best_time(fn, repeats, min_time)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _best_time(fn, repeats, min_time):
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or loops >= 1 << 16:
+            break
+        loops *= 2
+    best = elapsed
+    for _ in range(repeats - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, time.perf_counter() - started)
+    return best / loops
+
+
+def sample_points(maze, count, seed=7):
+    xs = [maze["start"][0], maze["goal"][0]]
+    ys = [maze["start"][1], maze["goal"][1]]
+    for x1, y1, x2, y2 in maze["walls"]:
+        xs += (x1, x2)
+        ys += (y1, y2)
+    rng = random.Random(seed)
+    return [(rng.uniform(min(xs), max(xs)), rng.uniform(min(ys), max(ys))) for _ in range(count)]
+
+
+def grid_route_script(maze, size):
+    """MOVE/TURN script along the BFS route through a generated size x size grid maze."""
+    wall_set = {tuple(w) for w in maze["walls"]}
+    x0, y0 = -(size * CELL) // 2, (size * CELL) // 2
+
+    def open_between(col, row, ncol, nrow):
+        # Same edge coordinates as maze_generator._grid_walls emits
+        if ncol != col:
+            x, top = x0 + max(col, ncol) * CELL, y0 - row * CELL
+            return (x, top, x, top - CELL) not in wall_set
+        left, y = x0 + col * CELL, y0 - max(row, nrow) * CELL
+        return (left, y, left + CELL, y) not in wall_set
+
+    previous = {(0, 0): None}
+    queue = deque([(0, 0)])
+    while queue:
+        col, row = queue.popleft()
+        for ncol, nrow in ((col + 1, row), (col - 1, row), (col, row + 1), (col, row - 1)):
+            if 0 <= ncol < size and 0 <= nrow < size and (ncol, nrow) not in previous \
+                    and open_between(col, row, ncol, nrow):
+                previous[(ncol, nrow)] = (col, row)
+                queue.append((ncol, nrow))
+    route = [(size - 1, size - 1)]
+    while previous[route[-1]] is not None:
+        route.append(previous[route[-1]])
+    route.reverse()
+
+    commands = []
+    heading = 0
+    for (col, row), (ncol, nrow) in zip(route, route[1:]):
+        target = {(1, 0): 0, (-1, 0): 180, (0, 1): -90, (0, -1): 90}[(ncol - col, nrow - row)]
+        turn = (heading - target + 180) % 360 - 180
+        if turn:
+            commands.append(f"TURN {turn}")
+            heading = target
+        if commands and commands[-1].startswith("MOVE") and not turn:
+            commands[-1] = f"MOVE {int(commands[-1].split()[1]) + CELL}"
+        else:
+            commands.append(f"MOVE {CELL}")
+    return "\n".join(commands)
+
+
+def bench_maze(label, filename, maze, script, quick):
+    walls = maze["walls"]
+    # Fewer probe points on big mazes keeps the linear-scan batches to about a second
+    points = sample_points(maze, max(100, min(500 if quick else 2000, 1_000_000 // max(1, len(walls)))))
+    field = field_for_maze(filename, walls)
+    grid = WallGrid(walls)
+
+    def scan():
+        for x, y in points:
+            is_collision(walls, x, y)
+
+    def via_field():
+        for x, y in points:
+            verdict = field.classify(x, y, THRESHOLD)
+            if verdict is None:
+                wall_hit_index(walls, x, y)
+
+    def via_grid():
+        for x, y in points:
+            for i in grid.near_point(x, y):
+                if wall_hit_index((walls[i],), x, y) >= 0:
+                    break
+
+    measures = {
+        "collision.scan": lambda: best_rate(scan, len(points)),
+        "collision.field": lambda: best_rate(via_field, len(points)),
+        "collision.grid": lambda: best_rate(via_grid, len(points)),
+        "load.cached": lambda: best_rate(lambda: field_for_maze(filename, load_maze(filename)["walls"]), 1),
+        "load.cold": lambda: best_rate(lambda: DistanceField.build(load_maze(filename)["walls"]), 1, repeats=3),
+    }
+    if script:
+        def hit_test(x, y):
+            verdict = field.classify(x, y, THRESHOLD)
+            return wall_hit_index(walls, x, y) >= 0 if verdict is None else verdict
+
+        steps = len(trace(compile_script(script), maze["start"]))
+        result = run_path(trace(compile_script(script), maze["start"]), maze["goal"], hit_test)
+        if result["outcome"] != "goal":
+            print(f"WARNING: {label}: benchmark route ends in '{result['outcome']}'", file=sys.stderr)
+        measures["script.run"] = lambda: best_rate(
+            lambda: run_path(trace(compile_script(script), maze["start"]), maze["goal"], hit_test), steps)
+    return {f"{name}[{label}]": measure for name, measure in measures.items()}
+
+
+def scaling_exponent(points):
+    """Slope of log(time per op) against log(walls): 0 = flat, 1 = linear in walls."""
+    if len(points) < 2:
+        return None
+    xs = [math.log(walls) for walls, _ in points]
+    ys = [-math.log(rate) for _, rate in points]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    var = sum((x - mx) ** 2 for x in xs)
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / var if var else None
+
+
+def main(argv):
+    quick = "--quick" in argv
+    save = "--save-baseline" in argv
+    threshold = float(argv[argv.index("--threshold") + 1]) if "--threshold" in argv else 0.25
+
+    with tempfile.TemporaryDirectory() as tmp:
+        measures = {}
+        sizes = {}
+        catalog = load_catalog()
+        for name, _ in catalog.entries():
+            filename = catalog.path(name)
+            maze = load_maze(filename)
+            solution = solve(maze)
+            measures.update(bench_maze(os.path.splitext(name)[0], filename, maze,
+                                       "\n".join(solution["commands"]) if solution else None, quick))
+        for size in QUICK_SIZES if quick else GRID_SIZES:
+            maze = generate("kruskal", size, size, seed=1, cell=CELL)
+            filename = os.path.join(tmp, f"grid{size}.json")
+            with open(filename, "w") as f:
+                json.dump(maze, f)
+            maze = load_maze(filename)
+            grid_measures = bench_maze(f"grid{size}", filename, maze, grid_route_script(maze, size), quick)
+            measures.update(grid_measures)
+            sizes.update(dict.fromkeys(grid_measures, len(maze["walls"])))
+
+        results = {key: measure() for key, measure in measures.items()}
+        print(f"{'Benchmark':<44} {'Walls':>6} {'ops/s':>14}")
+        for key, rate in results.items():
+            print(f"{key:<44} {sizes.get(key, ''):>6} {rate:>14,.0f}")
+        curves = {}
+        for key, walls in sizes.items():
+            curves.setdefault(key.split("[")[0], []).append((walls, results[key]))
+        print("\nScaling over generated grids (time per op ~ walls^k):")
+        for name, points in curves.items():
+            k = scaling_exponent(points)
+            curve = "  ".join(f"{walls}:{rate:,.0f}" for walls, rate in points)
+            print(f"  {name:<18} k={k:5.2f}   {curve}")
+
+        # --quick and full runs differ in probe counts and process state, so each keeps its own baseline
+        mode = "quick" if quick else "full"
+        baselines = {}
+        if os.path.exists(BASELINE):
+            with open(BASELINE) as f:
+                baselines = json.load(f)
+        if save:
+            baselines[mode] = results
+            with open(BASELINE, "w") as f:
+                json.dump(baselines, f, indent=1, sort_keys=True)
+            print(f"\nBaseline ({mode}) saved to {BASELINE}")
+            return 0
+        if mode not in baselines:
+            print(f"\nNo {mode} baseline yet; run with --save-baseline to record one.")
+            return 0
+
+        baseline = baselines[mode]
+        regressions = []
+        for key, rate in results.items():
+            reference = baseline.get(key)
+            # A slow result is re-measured before it counts, so one noisy batch doesn't fail the run
+            for _ in range(RETRIES):
+                if not reference or rate >= reference * (1 - threshold):
+                    break
+                rate = max(rate, measures[key]())
+            if reference and rate < reference * (1 - threshold):
+                regressions.append(f"  {key}: {rate:,.0f} ops/s vs baseline {reference:,.0f} ({rate / reference - 1:+.0%})")
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) regressed by more than {threshold:.0%}:")
+        print("\n".join(regressions))
+        return 1
+    print(f"\n✅ No benchmark regressed by more than {threshold:.0%} against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,195 @@
+from array import array
+
+from maze_engine import MOVE, STEP, TURN, _rotate, is_collision, run_path
+
+# Command script compiler.
+#
+#   MOVE <pixels>      forward (negative = backward)
+#   TURN <degrees>     clockwise (negative = anti-clockwise)
+#   REPEAT <n>         repeat the block up to the matching END n times
+#   END
+#   # comment          ignored, as are blank lines
+#
+# compile_script() turns the text into a flat instruction array (REPEAT
+# blocks expanded, every instruction tagged with its source line) and raises
+# ScriptError with the line number on the first problem. trace() then lays
+# the instructions out as the polyline the turtle will walk, sampled at every
+# 5 px animation step, so collision and scoring run on precomputed points.
+
+OP_NAMES = ("MOVE", "TURN")
+
+MAX_INSTRUCTIONS = 100_000
+MAX_STEPS = 500_000
+MAX_DEPTH = 50           # REPEAT blocks nested inside each other
+INT_LIMIT = 1 << (8 * array("i").itemsize - 1)   # arguments are stored in array("i")
+
+
+class ScriptError(ValueError):
+    """A problem in the command script, tied to its 1-based source line."""
+
+    def __init__(self, line, message):
+        super().__init__(f"Line {line}: {message}")
+        self.line = line
+        self.message = message
+
+
+class Program:
+    """Compiled script: parallel arrays of opcodes, arguments and source lines."""
+
+    def __init__(self):
+        self.ops = array("b")
+        self.args = array("i")
+        self.lines = array("i")
+
+    def __len__(self):
+        return len(self.ops)
+
+    def __iter__(self):
+        return zip(self.ops, self.args, self.lines)
+
+
+class Path:
+    """
+    Every animation step of a program.
+
+    xs/ys hold the turtle position after each step, step_instr the
+    instruction that step belongs to, and first_step[i] the index of
+    instruction i's first step (first_step[len(program)] == number of steps).
+    """
+
+    def __init__(self, program, start):
+        self.program = program
+        self.start = start
+        self.xs = array("d")
+        self.ys = array("d")
+        self.step_instr = array("i")
+        self.first_step = array("i")
+
+    def __len__(self):
+        return len(self.xs)
+
+    def segments(self):
+        """The polyline as (x1, y1, x2, y2, instruction) per MOVE that advances."""
+        x, y = self.start
+        for i, op in enumerate(self.program.ops):
+            first, last = self.first_step[i], self.first_step[i + 1]
+            if op == MOVE and last > first:
+                yield x, y, self.xs[last - 1], self.ys[last - 1], i
+                x, y = self.xs[last - 1], self.ys[last - 1]
+
+
+def _parse_int(word, line, usage):
+    try:
+        value = int(word)
+    except ValueError:
+        raise ScriptError(line, f"'{word}' is not a whole number ({usage}).") from None
+    if not -INT_LIMIT <= value < INT_LIMIT:
+        raise ScriptError(line, f"'{word}' is too large ({usage}).")
+    return value
+
+
+def _parse_block(lines, index, opened_at, depth=0):
+    """
+    Parses lines from `index` until the END closing a REPEAT on `opened_at`
+    (0 = top level), `depth` REPEATs deep.
+    """
+    block = []
+    while index < len(lines):
+        number = index + 1
+        parts = lines[index].split("#", 1)[0].split()
+        index += 1
+        if not parts:
+            continue
+        action = parts[0].upper()
+        if action in ("MOVE", "TURN"):
+            usage = f"e.g. {action} {'50' if action == 'MOVE' else '90'}"
+            if len(parts) != 2:
+                raise ScriptError(number, f"{action} takes exactly one number ({usage}).")
+            block.append((MOVE if action == "MOVE" else TURN, _parse_int(parts[1], number, usage), number))
+        elif action == "REPEAT":
+            if len(parts) != 2:
+                raise ScriptError(number, "REPEAT takes exactly one count (e.g. REPEAT 4).")
+            count = _parse_int(parts[1], number, "e.g. REPEAT 4")
+            if count < 1:
+                raise ScriptError(number, "REPEAT count must be at least 1 (e.g. REPEAT 4).")
+            if depth >= MAX_DEPTH:
+                raise ScriptError(number, f"REPEAT blocks are nested more than {MAX_DEPTH} deep.")
+            body, index = _parse_block(lines, index, number, depth + 1)
+            block.append(("REPEAT", count, body, number))
+        elif action == "END":
+            if len(parts) != 1:
+                raise ScriptError(number, "END takes no arguments.")
+            if not opened_at:
+                raise ScriptError(number, "END without a matching REPEAT.")
+            return block, index
+        else:
+            raise ScriptError(number, f"Unknown command '{parts[0]}'. Use MOVE, TURN, REPEAT or END.")
+    if opened_at:
+        raise ScriptError(opened_at, "REPEAT is missing its END.")
+    return block, index
+
+
+def _expanded_size(block):
+    size = 0
+    for item in block:
+        size += item[1] * _expanded_size(item[2]) if item[0] == "REPEAT" else 1
+    return size
+
+
+def _emit(block, program):
+    for item in block:
+        if item[0] == "REPEAT":
+            if _expanded_size(item[2]) == 0:
+                continue
+            for _ in range(item[1]):
+                _emit(item[2], program)
+        else:
+            op, arg, line = item
+            program.ops.append(op)
+            program.args.append(arg)
+            program.lines.append(line)
+
+
+def compile_script(text):
+    """Compiles script text into a Program; raises ScriptError on the first bad line."""
+    block, _ = _parse_block(text.splitlines(), 0, 0)
+    if _expanded_size(block) > MAX_INSTRUCTIONS:
+        first_repeat = next((item[3] for item in block if item[0] == "REPEAT"), 1)
+        raise ScriptError(first_repeat, f"Script expands to more than {MAX_INSTRUCTIONS:,} commands.")
+    program = Program()
+    _emit(block, program)
+    return program
+
+
+def trace(program, start):
+    """
+    Walks the program from `start` (heading 0) with the turtle's own
+    arithmetic: 5 px steps added one at a time and headings rotated like
+    Vec2D.rotate, so every point matches what the animation would reach.
+    """
+    path = Path(program, start)
+    x, y = float(start[0]), float(start[1])
+    ox, oy = 1.0, 0.0
+    xs, ys, step_instr, first_step = path.xs, path.ys, path.step_instr, path.first_step
+    for i, (op, arg, line) in enumerate(program):
+        first_step.append(len(xs))
+        if op == TURN:
+            ox, oy = _rotate(ox, oy, -arg)   # turtle.right(arg)
+            continue
+        steps = abs(arg) // STEP
+        if len(xs) + steps > MAX_STEPS:
+            raise ScriptError(line, f"Path is longer than {MAX_STEPS:,} steps.")
+        step = STEP if arg > 0 else -STEP
+        for _ in range(steps):
+            x, y = x + ox * step, y + oy * step
+            xs.append(x)
+            ys.append(y)
+            step_instr.append(i)
+    first_step.append(len(xs))
+    return path
+
+
+def simulate(text, walls, start, goal, hit_test=None):
+    """Compiles, traces and runs a script headlessly; see maze_engine.run_path."""
+    path = trace(compile_script(text), start)
+    return run_path(path, goal, hit_test or (lambda x, y: is_collision(walls, x, y)))
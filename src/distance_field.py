@@ -0,0 +1,147 @@
+import hashlib
+import json
+import math
+import os
+import sys
+from array import array
+
+from maze_engine import point_segment_distance
+
+# Precomputed distance-to-nearest-wall grid over the 600x600 playfield.
+# Values are sampled every CELL px and capped at CAP (only the band near the
+# walls matters). Distance to a set of segments is 1-Lipschitz, so a bilinear
+# lookup is never off by more than CELL / sqrt(2): outside that band around
+# the collision threshold the lookup alone decides, inside it the caller runs
+# the exact segment test.
+#
+# Fields are cached next to the maze file (maze.json -> maze.dfield) and
+# rebuilt whenever the hash of the maze's walls changes.
+
+FORMAT_VERSION = 1
+CELL = 4
+CAP = 16
+EXTENT = 300   # playfield spans -300..300 on both axes
+
+
+def walls_hash(walls):
+    return hashlib.sha1(json.dumps(walls, separators=(",", ":")).encode()).hexdigest()
+
+
+class DistanceField:
+    def __init__(self, values, content_hash, cell=CELL, cap=CAP, x0=-EXTENT, y0=-EXTENT, size=None):
+        self.values = values
+        self.content_hash = content_hash
+        self.cell = cell
+        self.cap = cap
+        self.x0 = x0
+        self.y0 = y0
+        self.size = size or (2 * EXTENT // cell + 1)
+        self.error = cell / math.sqrt(2) + 1e-3  # bilinear bound + float32 rounding
+
+    @classmethod
+    def build(cls, walls, content_hash=None, cell=CELL, cap=CAP):
+        size = 2 * EXTENT // cell + 1
+        x0 = y0 = -EXTENT
+        values = array("f", [cap]) * (size * size)
+        for x1, y1, x2, y2 in walls:
+            i0 = max(0, math.floor((min(x1, x2) - cap - x0) / cell))
+            i1 = min(size - 1, math.ceil((max(x1, x2) + cap - x0) / cell))
+            j0 = max(0, math.floor((min(y1, y2) - cap - y0) / cell))
+            j1 = min(size - 1, math.ceil((max(y1, y2) + cap - y0) / cell))
+            for j in range(j0, j1 + 1):
+                py = y0 + j * cell
+                row = j * size
+                for i in range(i0, i1 + 1):
+                    d = point_segment_distance(x0 + i * cell, py, x1, y1, x2, y2)
+                    if d < values[row + i]:
+                        values[row + i] = d
+        return cls(values, content_hash or walls_hash(walls), cell, cap, x0, y0, size)
+
+    def lookup(self, x, y):
+        """Bilinear distance estimate at (x, y), or None outside the playfield."""
+        fx = (x - self.x0) / self.cell
+        fy = (y - self.y0) / self.cell
+        i = math.floor(fx)
+        j = math.floor(fy)
+        if i < 0 or j < 0 or i >= self.size - 1 or j >= self.size - 1:
+            return None
+        tx = fx - i
+        ty = fy - j
+        values = self.values
+        k = j * self.size + i
+        top = values[k] + (values[k + 1] - values[k]) * tx
+        k += self.size
+        bottom = values[k] + (values[k + 1] - values[k]) * tx
+        return top + (bottom - top) * ty
+
+    def classify(self, x, y, threshold):
+        """
+        True if (x, y) is certainly closer than `threshold` to a wall, False if
+        it certainly isn't, None when only the exact test can tell.
+        """
+        d = self.lookup(x, y)
+        if d is None:
+            return None
+        if d - self.error >= threshold:
+            return False
+        if d + self.error < threshold:
+            return True
+        return None
+
+    # --- Disk cache ---
+    def save(self, path):
+        header = {
+            "version": FORMAT_VERSION,
+            "hash": self.content_hash,
+            "cell": self.cell,
+            "cap": self.cap,
+            "x0": self.x0,
+            "y0": self.y0,
+            "size": self.size,
+        }
+        # Written under a temp name and renamed, so a reader never sees half a file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps(header).encode() + b"\n")
+                self.values.tofile(f)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, path, content_hash):
+        """Reads a cached field; returns None if it is missing, stale or unreadable."""
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline())
+                if (header.get("version") != FORMAT_VERSION or header.get("hash") != content_hash
+                        or header.get("cell") != CELL or header.get("cap") != CAP):
+                    return None
+                values = array("f")
+                values.fromfile(f, header["size"] * header["size"])
+        except (OSError, ValueError, EOFError):
+            return None
+        return cls(values, content_hash, header["cell"], header["cap"], header["x0"], header["y0"], header["size"])
+
+
+def cache_path(maze_filename):
+    return os.path.splitext(maze_filename)[0] + ".dfield"
+
+
+def field_for_maze(maze_filename, walls):
+    """Loads the cached field for a maze file, rebuilding and re-caching it if stale."""
+    content_hash = walls_hash(walls)
+    path = cache_path(maze_filename)
+    field = DistanceField.load(path, content_hash)
+    if field is None:
+        field = DistanceField.build(walls, content_hash)
+        try:
+            field.save(path)
+        except OSError as e:
+            print(f"Could not cache distance field: {e}", file=sys.stderr)
+    return field
@@ -0,0 +1,170 @@
+import json
+import os
+import sys
+import time
+
+# Optional frame profiler for Escape_Protocol.py
+# Enable with:  ESCAPE_PROFILE=1 python Escape_Protocol.py
+# Each run of the command box writes a Chrome trace (open in chrome://tracing
+# or https://ui.perfetto.dev) to ESCAPE_PROFILE_DIR and prints a summary.
+
+
+class NullProfiler:
+    """Stand-in used when profiling is off; every hook is a no-op."""
+    enabled = False
+
+    def begin_run(self, maze_name, wall_count):
+        pass
+
+    def start_step(self):
+        pass
+
+    def mark(self, phase):
+        pass
+
+    def count_collision(self, hit_index):
+        pass
+
+    def end_step(self):
+        pass
+
+    def finish(self, outcome):
+        pass
+
+
+class FrameProfiler:
+    """
+    Times each phase of a command run (motion, render, delay, collision,
+    goal check, turn) per animation step and counts how many times every
+    wall was tested by the collision check.
+    """
+    enabled = True
+
+    def __init__(self, out_dir="profiles"):
+        self.out_dir = out_dir
+        self.maze_name = ""
+        self._events = []
+        self._phase_times = {}
+        self._step_times = []
+        self._collision_stops = []
+        self._field_answers = 0
+        self._wall_count = 0
+        self._run_start = 0.0
+        self._step_start = 0.0
+        self._last = 0.0
+        self._step = 0
+
+    def begin_run(self, maze_name, wall_count):
+        self.maze_name = maze_name
+        self._events = []
+        self._phase_times = {}
+        self._step_times = []
+        # _collision_stops[i] = checks that stopped at wall i; the last slot counts misses
+        self._collision_stops = [0] * (wall_count + 1)
+        self._field_answers = 0
+        self._wall_count = wall_count
+        self._step = 0
+        self._run_start = self._last = time.perf_counter()
+
+    def start_step(self):
+        self._step_start = self._last = time.perf_counter()
+
+    def mark(self, phase):
+        """Closes the phase that started at the previous mark."""
+        now = time.perf_counter()
+        duration = now - self._last
+        self._phase_times.setdefault(phase, []).append(duration)
+        self._events.append((phase, self._last, duration, self._step))
+        self._last = now
+
+    def count_collision(self, hit_index):
+        """
+        Records a collision check that stopped at wall `hit_index` (-1 = no
+        hit, None = answered by the distance field without scanning walls).
+        """
+        if hit_index is None:
+            self._field_answers += 1
+        else:
+            self._collision_stops[hit_index] += 1
+
+    def end_step(self):
+        self._step_times.append(time.perf_counter() - self._step_start)
+        self._step += 1
+
+    # --- Reporting ---
+    def wall_checks(self):
+        """Number of point-to-wall tests each wall received (the scan stops at the first hit)."""
+        checks = []
+        running = self._collision_stops[-1]
+        for stops in reversed(self._collision_stops[:-1]):
+            running += stops
+            checks.append(running)
+        return checks[::-1]
+
+    def summary(self, outcome):
+        lines = [f"=== Frame profile: {self.maze_name} ({outcome}) ==="]
+        total = time.perf_counter() - self._run_start
+        lines.append(f"Run time: {total * 1000:.1f} ms over {self._step} steps")
+        if self._step_times:
+            lines.append(f"Frame time: {_describe(self._step_times)}")
+        for phase, times in sorted(self._phase_times.items(), key=lambda item: -sum(item[1])):
+            share = sum(times) / total * 100 if total else 0.0
+            lines.append(f"  {phase:<11} {share:5.1f}%  {_describe(times)}")
+
+        checks = self.wall_checks()
+        calls = sum(self._collision_stops) + self._field_answers
+        lines.append(f"Collision checks: {calls} calls, {self._field_answers} answered by distance field, {sum(checks)} wall tests")
+        busiest = sorted(range(len(checks)), key=lambda i: -checks[i])[:10]
+        for i in busiest:
+            lines.append(f"  wall #{i:<4} {checks[i]} tests")
+        return "\n".join(lines)
+
+    def finish(self, outcome):
+        """Prints the summary and writes the trace file for the run that just ended."""
+        summary = self.summary(outcome)
+        print(summary, file=sys.stderr)
+
+        trace = {
+            "traceEvents": [
+                {
+                    "name": phase,
+                    "ph": "X",
+                    "ts": (start - self._run_start) * 1e6,
+                    "dur": duration * 1e6,
+                    "pid": 1,
+                    "tid": 1,
+                    "args": {"step": step},
+                }
+                for phase, start, duration, step in self._events
+            ],
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "maze": self.maze_name,
+                "outcome": outcome,
+                "wall_checks": self.wall_checks(),
+                "summary": summary,
+            },
+        }
+        safe_name = "".join(c if c.isalnum() else "_" for c in self.maze_name) or "maze"
+        filename = os.path.join(self.out_dir, f"{safe_name}_{time.strftime('%Y%m%d-%H%M%S')}.trace.json")
+        try:
+            os.makedirs(self.out_dir, exist_ok=True)
+            with open(filename, "w") as f:
+                json.dump(trace, f)
+            print(f"Trace written to {filename}", file=sys.stderr)
+        except OSError as e:
+            print(f"Could not write trace file: {e}", file=sys.stderr)
+
+
+def _describe(times):
+    ordered = sorted(times)
+    mean = sum(ordered) / len(ordered)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"n={len(ordered)} mean={mean * 1000:.2f}ms p95={p95 * 1000:.2f}ms max={ordered[-1] * 1000:.2f}ms"
+
+
+def make_profiler():
+    """Returns a FrameProfiler when ESCAPE_PROFILE=1, otherwise a NullProfiler."""
+    if os.environ.get("ESCAPE_PROFILE") == "1":
+        return FrameProfiler(os.environ.get("ESCAPE_PROFILE_DIR", "profiles"))
+    return NullProfiler()
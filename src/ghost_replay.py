@@ -0,0 +1,299 @@
+import base64
+import json
+import os
+import sys
+import time
+import zlib
+
+from maze_engine import STEP_DELAY, TURN, TURN_DELAY
+
+# Ghost replays: a finished run stored as the turtle's pose at every frame.
+# RUN : python src/ghost_replay.py run.ghost   (prints the header and frame stats)
+#
+# File layout:
+#   b"GHST" <version byte> <varint header length> <header JSON> <zlib stream>
+# The zlib stream holds three zigzag varints per frame - dx, dy, dheading -
+# in hundredths of a pixel / degree relative to the previous frame (the first
+# frame relative to the header's start, heading 0). A frame that doesn't move is a TURN frame and
+# lasts TURN_DELAY, every other frame is a 5 px step lasting STEP_DELAY, so
+# ghosts replay on the same simulated clock as the player. Runs of identical
+# deltas (every straight MOVE) compress to almost nothing: a few hundred bytes
+# per maze. Frames decode block by block, without reading the whole file.
+
+MAGIC = b"GHST"
+VERSION = 1
+SCALE = 100        # fixed-point units per pixel / degree
+FULL_TURN = 360 * SCALE
+MAX_HEADER = 4096
+
+
+def _zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _varint(value):
+    out = bytearray()
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return out
+
+
+def _decode_varints(chunks):
+    """Signed (zigzag) varints from an iterable of byte chunks; values may span chunks."""
+    value = shift = 0
+    for chunk in chunks:
+        for byte in chunk:
+            value |= (byte & 0x7F) << shift
+            if byte & 0x80:
+                shift += 7
+                continue
+            yield (value >> 1) ^ -(value & 1)
+            value = shift = 0
+    if shift:
+        raise ValueError("Truncated ghost file.")
+
+
+class GhostWriter:
+    """Encodes frames incrementally; finish() returns the complete file bytes."""
+
+    def __init__(self, header, start):
+        header = json.dumps(dict(header, start=list(start)), separators=(",", ":")).encode()
+        self._parts = [MAGIC, bytes([VERSION]), bytes(_varint(len(header))), header]
+        self._compressor = zlib.compressobj(9)
+        self._pending = bytearray()
+        self._last = (round(start[0] * SCALE), round(start[1] * SCALE), 0)
+        self.frames = 0
+
+    def add(self, x, y, heading):
+        pose = (round(x * SCALE), round(y * SCALE), round(heading * SCALE) % FULL_TURN)
+        dx, dy = pose[0] - self._last[0], pose[1] - self._last[1]
+        dh = (pose[2] - self._last[2] + FULL_TURN // 2) % FULL_TURN - FULL_TURN // 2
+        for delta in (dx, dy, dh):
+            self._pending += _varint(_zigzag(delta))
+        self._last = pose
+        self.frames += 1
+        if len(self._pending) >= 4096:
+            self._parts.append(self._compressor.compress(bytes(self._pending)))
+            self._pending.clear()
+
+    def finish(self):
+        self._parts.append(self._compressor.compress(bytes(self._pending)))
+        self._parts.append(self._compressor.flush())
+        self._pending.clear()
+        return b"".join(self._parts)
+
+
+def record_path(path, result, header):
+    """
+    Ghost file for the part of a traced path (command_script.trace) that a
+    run_path result actually executed: one frame per TURN and per 5 px step.
+    """
+    writer = GhostWriter(dict(header, frames=result["steps"] + result["turns"]), path.start)
+    program = path.program
+    x, y = float(path.start[0]), float(path.start[1])
+    heading = 0.0
+    for i in range(result["instructions"]):
+        if program.ops[i] == TURN:
+            heading -= program.args[i]   # turtle.right
+            writer.add(x, y, heading)
+            continue
+        for k in range(path.first_step[i], min(path.first_step[i + 1], result["steps"])):
+            x, y = path.xs[k], path.ys[k]
+            writer.add(x, y, heading)
+    return writer.finish()
+
+
+# --- Reading ---
+def _read_exact(stream, size):
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError("Truncated ghost file.")
+    return data
+
+
+def read_header(stream):
+    """Reads the header from a binary stream, leaving it at the start of the frame data."""
+    if _read_exact(stream, len(MAGIC)) != MAGIC:
+        raise ValueError("Not a ghost file.")
+    version = _read_exact(stream, 1)[0]
+    if version != VERSION:
+        raise ValueError(f"Unsupported ghost version {version}.")
+    length = shift = 0
+    while True:
+        byte = _read_exact(stream, 1)[0]
+        length |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            break
+        shift += 7
+    if length > MAX_HEADER:
+        raise ValueError("Ghost header is too large.")
+    return json.loads(_read_exact(stream, length))
+
+
+def iter_frames(stream, start, block=4096):
+    """
+    Yields (x, y, heading, duration) per frame, decompressing `block` bytes
+    at a time. Call read_header(stream) first; `start` is its 'start'.
+    Raises ValueError when it reaches a truncated or corrupt part.
+    """
+    decompressor = zlib.decompressobj()
+
+    def chunks():
+        try:
+            while True:
+                data = stream.read(block)
+                if not data:
+                    yield decompressor.flush()
+                    break
+                yield decompressor.decompress(data)
+        except zlib.error as e:
+            raise ValueError(f"Corrupt ghost file: {e}") from None
+        if not decompressor.eof:
+            raise ValueError("Truncated ghost file.")
+
+    values = _decode_varints(chunks())
+    x, y, heading = round(start[0] * SCALE), round(start[1] * SCALE), 0
+    for dx in values:
+        # A frame cut short must not reach next()'s StopIteration (a RuntimeError in a generator)
+        dy, dh = next(values, None), next(values, None)
+        if dh is None:
+            raise ValueError("Truncated ghost file.")
+        x, y = x + dx, y + dy
+        heading = (heading + dh) % FULL_TURN
+        duration = TURN_DELAY if dx == 0 and dy == 0 else STEP_DELAY
+        yield x / SCALE, y / SCALE, heading / SCALE, duration
+
+
+def open_ghost(filename):
+    """(header, frame iterator) for a ghost file; the file closes when the frames run out."""
+    stream = open(filename, "rb")
+    try:
+        header = read_header(stream)
+    except (ValueError, json.JSONDecodeError):
+        stream.close()
+        raise
+
+    def frames():
+        with stream:
+            yield from iter_frames(stream, header["start"])
+
+    return header, frames()
+
+
+class GhostTrack:
+    """
+    A ghost's position on the simulated run clock, decoded lazily. advance()
+    raises ValueError if the file turns out to be damaged part way through.
+    """
+
+    def __init__(self, header, frames):
+        self.header = header
+        self._frames = frames
+        self._next = next(frames, None)
+        self._clock = 0.0
+        self.pose = None
+
+    @property
+    def done(self):
+        return self._next is None
+
+    def close(self):
+        """Stops the track early, closing its file."""
+        self._next = None
+        self._frames.close()
+
+    def advance(self, elapsed):
+        """Pose reached after `elapsed` simulated seconds, or None if it hasn't changed."""
+        moved = False
+        while self._next is not None and self._clock + self._next[3] <= elapsed + 1e-9:
+            x, y, heading, duration = self._next
+            self._clock += duration
+            self.pose = (x, y, heading)
+            self._next = next(self._frames, None)
+            moved = True
+        return self.pose if moved else None
+
+
+# --- Local Storage ---
+def ghost_dir(directory, maze_key):
+    return os.path.join(directory, maze_key)
+
+
+def save_ghost(directory, maze_key, blob, keep=3):
+    """Stores a ghost for a maze, keeping only the `keep` best-scoring ones."""
+    folder = ghost_dir(directory, maze_key)
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{time.time_ns()}.ghost")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(blob)
+    os.replace(tmp_path, path)
+    for old in ghost_files(directory, maze_key)[keep:]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+    return path
+
+
+def ghost_files(directory, maze_key):
+    """Ghost files for a maze, best score first (unreadable files are skipped)."""
+    folder = ghost_dir(directory, maze_key)
+    try:
+        names = [name for name in os.listdir(folder) if name.endswith(".ghost")]
+    except OSError:
+        return []
+    ranked = []
+    for name in names:
+        path = os.path.join(folder, name)
+        try:
+            with open(path, "rb") as f:
+                ranked.append((-float(read_header(f).get("score", 0.0)), name, path))
+        except (OSError, ValueError, json.JSONDecodeError):
+            continue
+    return [path for _, _, path in sorted(ranked)]
+
+
+def load_tracks(directory, maze_key, count):
+    """GhostTracks for the `count` best local ghosts of a maze."""
+    tracks = []
+    for path in ghost_files(directory, maze_key)[:count]:
+        try:
+            tracks.append(GhostTrack(*open_ghost(path)))
+        except (OSError, ValueError, json.JSONDecodeError) as e:
+            print(f"WARNING: Could not read ghost {path}: {e}", file=sys.stderr)
+    return tracks
+
+
+# --- Upload ---
+def to_text(blob):
+    """Ghost bytes as ASCII for the JSON score payload."""
+    return base64.b64encode(blob).decode("ascii")
+
+
+def from_text(text):
+    return base64.b64decode(text, validate=True)
+
+
+def main(argv):
+    if not argv:
+        print("Usage: python src/ghost_replay.py run.ghost [...]", file=sys.stderr)
+        return 2
+    for filename in argv:
+        header, frames = open_ghost(filename)
+        steps = turns = 0
+        for _, _, _, duration in frames:
+            if duration == STEP_DELAY:
+                steps += 1
+            else:
+                turns += 1
+        size = os.path.getsize(filename)
+        print(f"{filename}: {json.dumps(header)}")
+        print(f"  {steps} steps + {turns} turns in {size} bytes ({size / max(1, steps + turns):.2f} bytes/frame)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -2,6 +2,9 @@ import streamlit as st
 import pandas as pd
 import requests
 import json
+import os
+import sys
+import tempfile
 import time
 
 #RUN : streamlit run src/leaderboard/main2.py
@@ -12,22 +15,133 @@ st.set_page_config(layout="wide", page_title="Escape Protocol")
 
 # NOTE: Replace with your actual deployed Render URL
 API_URL = r"https://ace-rnd-escapeprotocol.onrender.com/leaderboard" 
+# Arrow snapshots of the board (see API_Server/snapshots.py), preferred over the JSON endpoint
+SNAPSHOT_URL = r"https://ace-rnd-escapeprotocol.onrender.com/snapshot"
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR")  # read the server's snapshot files directly when on the same machine
+SNAPSHOT_CACHE = os.path.join(tempfile.gettempdir(), "escape_protocol_snapshots")
+SNAPSHOT_MAX_AGE = float(os.environ.get("SNAPSHOT_MAX_AGE", 180))  # older snapshots fall back to live data (s)
+SNAPSHOT_RETRY = 600  # seconds before asking a server without snapshots again
+EVENT = os.environ.get("LEADERBOARD_EVENT")  # show an event / season board instead of the all-time one
+
+MAZE_COLUMNS = ["maze", "username", "score", "moves", "distance", "time"]
 
 # --- Data Fetching ---
+def read_arrow(path):
+    """Memory-maps an Arrow IPC snapshot file and converts it to a DataFrame."""
+    import pyarrow as pa
+    import pyarrow.ipc  # noqa: F401
+    source = pa.memory_map(path, "r")
+    return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def local_snapshot_paths(directory):
+    """(paths, checked_at) of the newest complete snapshot in `directory`, or None."""
+    versions = {}
+    for name in os.listdir(directory):
+        table, _, rest = name.partition("-")
+        if rest.endswith(".arrow") and rest[:-len(".arrow")].isdigit():
+            versions.setdefault(int(rest[:-len(".arrow")]), set()).add(table)
+    complete = [v for v, tables in versions.items() if tables >= {"leaderboard", "maze_scores"}]
+    if not complete:
+        return None
+    version = max(complete)
+    paths = {table: os.path.join(directory, f"{table}-{version}.arrow") for table in ("leaderboard", "maze_scores")}
+    # The server touches the newest files every time it finds the board unchanged
+    return paths, os.path.getmtime(paths["leaderboard"])
+
+
+@st.cache_resource
+def snapshot_state():
+    """Shared across sessions and reruns: when snapshots were last found disabled on the server."""
+    return {"disabled_at": None}
+
+
+def prune_snapshot_cache(keep):
+    """Deletes downloaded snapshot files other than the `keep` paths."""
+    for name in os.listdir(SNAPSHOT_CACHE):
+        path = os.path.join(SNAPSHOT_CACHE, name)
+        if path not in keep:
+            try:
+                os.remove(path)
+            except OSError:   # still mapped by another session (Windows)
+                pass
+
+
+def download_snapshot_paths():
+    """
+    Downloads the current snapshot version once (versions never change) and
+    returns (local paths, checked_at); None if the server has snapshots disabled.
+    """
+    state = snapshot_state()
+    if state["disabled_at"] is not None and time.time() - state["disabled_at"] < SNAPSHOT_RETRY:
+        return None
+    response = requests.get(SNAPSHOT_URL, timeout=10)
+    if response.status_code == 404:
+        print("INFO: The server has leaderboard snapshots disabled; using the JSON endpoint.", file=sys.stderr)
+        state["disabled_at"] = time.time()
+        return None
+    response.raise_for_status()
+    state["disabled_at"] = None
+    index = response.json()
+    os.makedirs(SNAPSHOT_CACHE, exist_ok=True)
+    base = SNAPSHOT_URL.rsplit("/snapshot", 1)[0]
+    paths = {}
+    for table, url in index["tables"].items():
+        path = os.path.join(SNAPSHOT_CACHE, f"{table}-{index['version']}.arrow")
+        if not os.path.exists(path):
+            download = requests.get(base + url, timeout=30)
+            download.raise_for_status()
+            with open(path + ".tmp", "wb") as f:
+                f.write(download.content)
+            os.replace(path + ".tmp", path)
+        paths[table] = path
+    prune_snapshot_cache(set(paths.values()))
+    # Servers before "checked_at" only tell when the version was written (ms since the epoch)
+    return paths, index.get("checked_at", index["version"] / 1000)
+
+
+def fetch_snapshot():
+    """(board, maze table) from the newest Arrow snapshot, or None if unavailable or too old."""
+    try:
+        import pyarrow
+    except ImportError:
+        return None
+    try:
+        found = local_snapshot_paths(SNAPSHOT_DIR) if SNAPSHOT_DIR else download_snapshot_paths()
+        if not found:
+            return None
+        paths, checked_at = found
+        age = time.time() - checked_at
+        if age > SNAPSHOT_MAX_AGE:
+            print(f"WARNING: Leaderboard snapshot is {age:.0f}s old; using live data.", file=sys.stderr)
+            return None
+        return read_arrow(paths["leaderboard"]), read_arrow(paths["maze_scores"])
+    except (requests.RequestException, pyarrow.ArrowInvalid, OSError, ValueError, KeyError) as e:
+        print(f"WARNING: Leaderboard snapshot unavailable ({e}); using live data.", file=sys.stderr)
+        return None
+
+
+def fetch_json():
+    """(board, maze table) from the /leaderboard JSON endpoint."""
+    response = requests.get(API_URL, params={"event": EVENT} if EVENT else None)
+    response.raise_for_status()
+    data = response.json()
+
+    # Flatten the per-maze details: metrics = [score, move_count, total_distance, elapsed]
+    maze_records = []
+    for entry in data:
+        for maze_name, metrics in entry.pop("mazes", {}).items():
+            if len(metrics) == 4:
+                maze_records.append([maze_name, entry["username"], *metrics])
+    return pd.DataFrame(data), pd.DataFrame(maze_records, columns=MAZE_COLUMNS)
+
+
 @st.cache_data(ttl=5)
 def fetch_leaderboard():
-    """Fetches the aggregated leaderboard data from the Flask API."""
+    """Fetches the aggregated leaderboard and the per-maze score table."""
     try:
-        response = requests.get(API_URL)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Ensure 'mazes' is present, even if empty, for robust DataFrame creation
-        for entry in data:
-            if 'mazes' not in entry:
-                entry['mazes'] = {}
-
-        df = pd.DataFrame(data)
+        snapshot = None if EVENT else fetch_snapshot()   # snapshots only cover the all-time board
+        df, maze_df = snapshot if snapshot is not None else fetch_json()
         
         # Rename columns for display
         df.rename(columns={
@@ -40,12 +154,20 @@ def fetch_leaderboard():
         
         # Sort the main DataFrame by Total Score (descending)
         df.sort_values(by="Total Score", ascending=False, inplace=True)
+        maze_df = maze_df.rename(columns={
+            "maze": "Maze Name",
+            "username": "Username",
+            "score": "Score",
+            "moves": "Moves",
+            "distance": "Distance",
+            "time": "Time (s)"
+        })
         
-        return df, None
+        return df, maze_df, None
     except requests.exceptions.RequestException as e:
-        return pd.DataFrame(), f"❌ Error connecting to API: {e}. Check if API is running at {API_URL}"
+        return pd.DataFrame(), pd.DataFrame(), f"❌ Error connecting to API: {e}. Check if API is running at {API_URL}"
     except Exception as e:
-        return pd.DataFrame(), f"❌ Error processing data: {e}"
+        return pd.DataFrame(), pd.DataFrame(), f"❌ Error processing data: {e}"
 
 
 # --- Leaderboard Views ---
@@ -55,7 +177,7 @@ def display_overall_leaderboard(df):
     st.header("🏆 Global Leaderboard")
     st.caption("Ranked by Total Score across all mazes.")
     
-    display_df = df.copy().drop(columns=['mazes', 'Total Time (s)'])
+    display_df = df.copy().drop(columns=['Total Time (s)'])
     
     st.dataframe(
         display_df,
@@ -68,42 +190,18 @@ def display_overall_leaderboard(df):
         }
     )
 
-def generate_maze_leaderboard(df):
+def generate_maze_leaderboard(maze_df):
     """Generates a detailed ranking for each individual maze."""
     st.subheader("🗺️ Per-Maze Leaderboard")
     
-    # 1. Prepare list of all unique maze names
-    all_mazes = set()
-    for index, row in df.iterrows():
-        all_mazes.update(row['mazes'].keys())
+    # 1. The per-maze table comes flattened already (one row per user and maze)
+    all_mazes = set(maze_df["Maze Name"]) if not maze_df.empty else set()
         
     if not all_mazes:
         st.info("No detailed maze scores available yet.")
         return
 
-    # 2. Iterate and create the single, long DataFrame
-    maze_records = []
-    for index, user_row in df.iterrows():
-        username = user_row['username']
-        for maze_name, metrics in user_row['mazes'].items():
-            # metrics = [score, move_count, total_distance, elapsed]
-            if len(metrics) == 4:
-                maze_records.append({
-                    "Maze Name": maze_name,
-                    "Username": username,
-                    "Score": metrics[0],
-                    "Moves": metrics[1],
-                    "Distance": metrics[2],
-                    "Time (s)": metrics[3]
-                })
-
-    if not maze_records:
-        st.info("No detailed maze score records found.")
-        return
-
-    maze_df = pd.DataFrame(maze_records)
-
-    # 3. Display rankings for a selected maze
+    # 2. Display rankings for a selected maze
     selected_maze = st.selectbox(
         "Select a Maze to see its ranking:",
         options=sorted(list(all_mazes))
@@ -128,7 +226,7 @@ def generate_maze_leaderboard(df):
             }
         )
 
-def display_user_history(df):
+def display_user_history(df, maze_df):
     """Displays the detailed performance history for a selected user."""
     st.subheader("👤 User Performance Detail")
     
@@ -151,20 +249,10 @@ def display_user_history(df):
         st.markdown("---")
         st.markdown("**Per-Maze History:**")
         
-        maze_history = []
-        for maze_name, metrics in user_data['mazes'].items():
-            # metrics = [score, move_count, total_distance, elapsed]
-            if len(metrics) == 4:
-                maze_history.append({
-                    "Maze Name": maze_name,
-                    "Score": metrics[0],
-                    "Time (s)": metrics[3],
-                    "Moves": metrics[1],
-                    "Distance": metrics[2]
-                })
+        history_df = maze_df[maze_df["Username"] == selected_user] if not maze_df.empty else maze_df
         
-        if maze_history:
-            history_df = pd.DataFrame(maze_history)
+        if not history_df.empty:
+            history_df = history_df[["Maze Name", "Score", "Time (s)", "Moves", "Distance"]].copy()
             history_df.sort_values(by="Score", ascending=False, inplace=True)
             st.dataframe(
                 history_df,
@@ -182,10 +270,10 @@ def display_user_history(df):
 
 # --- Main App Execution ---
 
-st.title("Escape Protocol")
+st.title(f"Escape Protocol · {EVENT}" if EVENT else "Escape Protocol")
 st.markdown("Good Luck Coding")
 
-df, error = fetch_leaderboard()
+df, maze_df, error = fetch_leaderboard()
 
 if error:
     st.error(error)
@@ -203,10 +291,10 @@ else:
     col_maze, col_user = st.columns(2)
     
     with col_maze:
-        generate_maze_leaderboard(df)
+        generate_maze_leaderboard(maze_df)
 
     with col_user:
-        display_user_history(df)
+        display_user_history(df, maze_df)
 
     st.caption(f"Last updated: {time.strftime('%H:%M:%S', time.localtime())}")
 
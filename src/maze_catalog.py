@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import sys
+
+# Catalog of the maze files in a directory.
+# RUN : python src/maze_catalog.py [directory]   (lists the catalog)
+#
+# Each maze's name, wall count, bounding box and content hash are kept in a
+# manifest (.catalog.json) next to the mazes. refresh() only re-reads files
+# whose size or mtime changed since the manifest was written, so lookups by
+# file stem, maze name or hash never open the maze files themselves.
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = ".catalog.json"
+MAZE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mazes")
+
+
+def maze_hash(data):
+    """sha1 of the maze's name, walls, start and goal (formatting doesn't matter)."""
+    content = {key: data[key] for key in ("name", "walls", "start", "goal")}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def describe(data):
+    """Manifest fields for a parsed maze file."""
+    xs = [data["start"][0], data["goal"][0]]
+    ys = [data["start"][1], data["goal"][1]]
+    for x1, y1, x2, y2 in data["walls"]:
+        xs += (x1, x2)
+        ys += (y1, y2)
+    return {
+        "name": data["name"],
+        "walls": len(data["walls"]),
+        "bbox": [min(xs), min(ys), max(xs), max(ys)],
+        "hash": maze_hash(data),
+    }
+
+
+class MazeCatalog:
+    def __init__(self, directory=MAZE_DIR):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, MANIFEST_NAME)
+        self.files = {}   # file name -> manifest entry
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get("version") != FORMAT_VERSION:
+            return {}
+        return manifest.get("files", {})
+
+    def refresh(self):
+        """Brings the catalog up to date with the directory; returns the names of re-read files."""
+        known = self.files or self._load_manifest()
+        files = {}
+        changed = []
+        try:
+            listing = sorted(os.scandir(self.directory), key=lambda entry: entry.name)
+        except OSError as e:
+            print(f"WARNING: Could not scan {self.directory}: {e}", file=sys.stderr)
+            listing = []
+        for dir_entry in listing:
+            if not dir_entry.name.endswith(".json") or dir_entry.name == MANIFEST_NAME:
+                continue
+            stat = dir_entry.stat()
+            entry = known.get(dir_entry.name)
+            if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                files[dir_entry.name] = entry
+                continue
+            entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+            try:
+                with open(dir_entry.path, "r") as f:
+                    entry.update(describe(json.load(f)))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                entry["error"] = str(e)
+            files[dir_entry.name] = entry
+            changed.append(dir_entry.name)
+
+        self.files = files
+        if changed or files.keys() != known.keys():
+            self._save_manifest()
+        return changed
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"version": FORMAT_VERSION, "files": self.files}, f, indent=1)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            print(f"WARNING: Could not write maze manifest: {e}", file=sys.stderr)
+
+    # --- Lookup ---
+    def entries(self):
+        """Readable mazes as (file name, entry), in file-name order."""
+        return [(name, entry) for name, entry in self.files.items() if "error" not in entry]
+
+    def path(self, file_name):
+        return os.path.join(self.directory, file_name)
+
+    def find(self, key):
+        """
+        Maze file name for `key`: a file name or stem (case-insensitive), a maze
+        name, or a content hash (prefixes of 7+ characters work). None if unknown.
+        """
+        key = key.strip()
+        folded = key.casefold()
+        entries = self.entries()
+        for name, _ in entries:
+            if folded in (name.casefold(), os.path.splitext(name)[0].casefold()):
+                return name
+        for name, entry in entries:
+            if entry["name"] == key:
+                return name
+        if len(key) >= 7:
+            for name, entry in entries:
+                if entry["hash"].startswith(folded):
+                    return name
+        return None
+
+    def resolve(self, keys):
+        """Paths for a playlist of keys; unknown keys are reported and skipped."""
+        paths = []
+        for key in keys:
+            name = self.find(key)
+            if name is None:
+                print(f"WARNING: No maze matches '{key}' in {self.directory}", file=sys.stderr)
+                continue
+            paths.append(self.path(name))
+        return paths
+
+
+def load_catalog(directory=MAZE_DIR):
+    catalog = MazeCatalog(directory)
+    catalog.refresh()
+    return catalog
+
+
+def main(argv):
+    catalog = MazeCatalog(argv[0] if argv else MAZE_DIR)
+    changed = catalog.refresh()
+    print(f"{'File':<16} {'Name':<32} {'Walls':>5} {'Bounding box':>26} {'Hash':>10}")
+    for name, entry in catalog.files.items():
+        if "error" in entry:
+            print(f"{name:<16} ⚠ unreadable: {entry['error']}")
+            continue
+        bbox = "({:.0f}, {:.0f})-({:.0f}, {:.0f})".format(*entry["bbox"])
+        print(f"{name:<16} {entry['name'][:32]:<32} {entry['walls']:>5} {bbox:>26} {entry['hash'][:10]:>10}")
+    print(f"\n{len(changed)} of {len(catalog.files)} files re-read", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,156 @@
+import math
+
+from maze_engine import GOAL_RADIUS, THRESHOLD
+
+# Fast solvability check used by the editor before saving.
+# Walls are rasterized, inflated by the player's collision radius, into a
+# byte-per-cell occupancy grid, then a scanline flood fill runs from the start
+# cell. The maze is solvable when the fill reaches a cell inside the goal
+# radius. Grids are a few hundred cells wide, so the whole check takes
+# milliseconds.
+
+FREE = 0
+BLOCKED = 1
+
+
+def _capsule_span(x1, y1, x2, y2, r, y):
+    """x-interval where the horizontal line at `y` lies within `r` of the wall, or None."""
+    lo = math.inf
+    hi = -math.inf
+
+    # Round caps at both ends
+    for ex, ey in ((x1, y1), (x2, y2)):
+        dy = y - ey
+        if abs(dy) < r:
+            half = math.sqrt(r * r - dy * dy)
+            lo = min(lo, ex - half)
+            hi = max(hi, ex + half)
+
+    # Straight body: 0 <= along <= length and |across| < r, both linear in x
+    dx = x2 - x1
+    dy = y2 - y1
+    length = math.hypot(dx, dy)
+    if length > 0:
+        ux = dx / length
+        uy = dy / length
+        oy = y - y1
+        body_lo, body_hi = -math.inf, math.inf
+        # along = (x - x1) * ux + oy * uy
+        if ux:
+            a = x1 + (0 - oy * uy) / ux
+            b = x1 + (length - oy * uy) / ux
+            body_lo, body_hi = max(body_lo, min(a, b)), min(body_hi, max(a, b))
+        elif not 0 <= oy * uy <= length:
+            body_lo, body_hi = math.inf, -math.inf
+        # across = (x - x1) * uy - oy * ux
+        if uy:
+            a = x1 + (oy * ux - r) / uy
+            b = x1 + (oy * ux + r) / uy
+            body_lo, body_hi = max(body_lo, min(a, b)), min(body_hi, max(a, b))
+        elif abs(oy * ux) >= r:
+            body_lo, body_hi = math.inf, -math.inf
+        if body_lo <= body_hi:
+            lo = min(lo, body_lo)
+            hi = max(hi, body_hi)
+
+    if lo > hi:
+        return None
+    return lo, hi
+
+
+def occupancy_grid(walls, radius, cell, x0, y0, width, height):
+    """
+    Rasterizes the walls grown by `radius` into a bytearray of width*height
+    cells (row-major, row 0 at y0). A cell is BLOCKED when its centre lies
+    within `radius` of a wall.
+    """
+    grid = bytearray(width * height)
+    for x1, y1, x2, y2 in walls:
+        j0 = max(0, math.floor((min(y1, y2) - radius - y0) / cell))
+        j1 = min(height - 1, math.ceil((max(y1, y2) + radius - y0) / cell))
+        for j in range(j0, j1 + 1):
+            span = _capsule_span(x1, y1, x2, y2, radius, y0 + (j + 0.5) * cell)
+            if span is None:
+                continue
+            i0 = max(0, math.ceil((span[0] - x0) / cell - 0.5))
+            i1 = min(width - 1, math.floor((span[1] - x0) / cell - 0.5))
+            if i0 <= i1:
+                offset = j * width
+                grid[offset + i0:offset + i1 + 1] = b"\x01" * (i1 - i0 + 1)
+    return grid
+
+
+def flood_fill(grid, width, height, si, sj):
+    """Scanline fill from cell (si, sj); returns a bytearray marking every reached cell."""
+    reached = bytearray(width * height)
+    grid = bytearray(grid)
+    stack = [(si, sj)]
+    while stack:
+        i, j = stack.pop()
+        offset = j * width
+        if grid[offset + i] != FREE:
+            continue
+        left = grid.rfind(BLOCKED, offset, offset + i) + 1
+        if left == 0:
+            left = offset
+        right = grid.find(BLOCKED, offset + i, offset + width)
+        if right == -1:
+            right = offset + width
+        grid[left:right] = b"\x01" * (right - left)
+        reached[left:right] = b"\x01" * (right - left)
+        lo, hi = left - offset, right - offset
+
+        for nj in (j - 1, j + 1):
+            if not 0 <= nj < height:
+                continue
+            noffset = nj * width
+            k = noffset + lo
+            end = noffset + hi
+            while k < end:
+                k = grid.find(FREE, k, end)
+                if k == -1:
+                    break
+                stack.append((k - noffset, nj))
+                k = grid.find(BLOCKED, k, end)
+                if k == -1:
+                    break
+    return reached
+
+
+def check_reachable(walls, start, goal, radius=THRESHOLD, cell=2):
+    """
+    Returns (True, message) when the goal can be reached from the start
+    without coming within `radius` of a wall, otherwise (False, reason).
+    """
+    xs = [start[0], goal[0]]
+    ys = [start[1], goal[1]]
+    for x1, y1, x2, y2 in walls:
+        xs += (x1, x2)
+        ys += (y1, y2)
+    # One free cell of border beyond every wall so open mazes can be walked around
+    margin = radius + GOAL_RADIUS + 2 * cell
+    x0 = min(xs) - margin
+    y0 = min(ys) - margin
+    width = math.ceil((max(xs) + margin - x0) / cell)
+    height = math.ceil((max(ys) + margin - y0) / cell)
+
+    grid = occupancy_grid(walls, radius, cell, x0, y0, width, height)
+    si = int((start[0] - x0) / cell)
+    sj = int((start[1] - y0) / cell)
+    if grid[sj * width + si] != FREE:
+        return False, f"Start {tuple(start)} is inside a wall (closer than {radius}px)."
+
+    reached = flood_fill(grid, width, height, si, sj)
+
+    gx, gy = goal
+    gi0 = max(0, int((gx - GOAL_RADIUS - x0) / cell))
+    gi1 = min(width - 1, int((gx + GOAL_RADIUS - x0) / cell))
+    gj0 = max(0, int((gy - GOAL_RADIUS - y0) / cell))
+    gj1 = min(height - 1, int((gy + GOAL_RADIUS - y0) / cell))
+    for j in range(gj0, gj1 + 1):
+        cy = y0 + (j + 0.5) * cell
+        offset = j * width
+        for i in range(gi0, gi1 + 1):
+            if reached[offset + i] and math.hypot(x0 + (i + 0.5) * cell - gx, cy - gy) < GOAL_RADIUS:
+                return True, "Goal is reachable from start."
+    return False, f"Goal {tuple(goal)} can't be reached from start {tuple(start)}."
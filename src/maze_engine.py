@@ -0,0 +1,281 @@
+import json
+import math
+import time
+
+# --- Game rules (mirrors run_commands in Escape_Protocol.py) ---
+THRESHOLD = 5       # collision radius around the player
+GOAL_RADIUS = 15    # player.distance(goal_pos) < 15 finishes the maze
+STEP = 5            # MOVE advances in 5 px animation steps
+STEP_DELAY = 0.02   # time.sleep after each MOVE step
+TURN_DELAY = 0.1    # time.sleep after each TURN
+
+
+# --- Maze Loader ---
+def load_maze(filename):
+    """Reads a maze JSON file into {'name', 'walls', 'start', 'goal'}."""
+    with open(filename, "r") as f:
+        data = json.load(f)
+    return {
+        "name": data["name"],
+        "walls": data["walls"],
+        "start": tuple(data["start"]),
+        "goal": tuple(data["goal"]),
+    }
+
+
+# --- Geometry ---
+def point_segment_distance(px, py, x1, y1, x2, y2):
+    dx = x2 - x1
+    dy = y2 - y1
+    len_sq = dx * dx + dy * dy
+    if len_sq == 0:
+        return math.hypot(px - x1, py - y1)
+    t = ((px - x1) * dx + (py - y1) * dy) / len_sq
+    t = max(0, min(1, t))
+    return math.hypot(px - (x1 + t * dx), py - (y1 + t * dy))
+
+
+def segments_intersect(ax, ay, bx, by, cx, cy, dx, dy):
+    d1 = (dx - cx) * (ay - cy) - (dy - cy) * (ax - cx)
+    d2 = (dx - cx) * (by - cy) - (dy - cy) * (bx - cx)
+    d3 = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+    d4 = (bx - ax) * (dy - ay) - (by - ay) * (dx - ax)
+    return ((d1 > 0) != (d2 > 0)) and ((d3 > 0) != (d4 > 0))
+
+
+def segment_distance(ax, ay, bx, by, cx, cy, dx, dy):
+    """Shortest distance between segments AB and CD."""
+    if segments_intersect(ax, ay, bx, by, cx, cy, dx, dy):
+        return 0.0
+    return min(
+        point_segment_distance(ax, ay, cx, cy, dx, dy),
+        point_segment_distance(bx, by, cx, cy, dx, dy),
+        point_segment_distance(cx, cy, ax, ay, bx, by),
+        point_segment_distance(dx, dy, ax, ay, bx, by),
+    )
+
+
+# --- Collision Detection ---
+def wall_hit_index(walls, x, y, threshold=THRESHOLD):
+    """Returns the index of the first wall closer than `threshold` to (x, y), or -1."""
+    for i, (x1, y1, x2, y2) in enumerate(walls):
+        if point_segment_distance(x, y, x1, y1, x2, y2) < threshold:
+            return i
+    return -1
+
+
+def is_collision(walls, x, y):
+    return wall_hit_index(walls, x, y) >= 0
+
+
+class WallGrid:
+    """
+    Uniform-grid spatial index over wall segments.
+
+    A wall is registered in every cell that its segment, grown by `pad`,
+    can reach, so any wall within `pad` of a point is found in that point's
+    cell alone.
+    """
+
+    def __init__(self, walls, cell=32, pad=THRESHOLD):
+        self.walls = walls
+        self.cell = cell
+        self.pad = pad
+        self.cells = {}
+        for i in range(len(walls)):
+            self.add(i)
+
+    def add(self, i):
+        """Registers walls[i] (e.g. one just appended to the list)."""
+        x1, y1, x2, y2 = self.walls[i]
+        cell, pad = self.cell, self.pad
+        reach = cell * math.sqrt(2) / 2 + pad
+        cx0, cy0 = self._cell_of(min(x1, x2) - pad, min(y1, y2) - pad)
+        cx1, cy1 = self._cell_of(max(x1, x2) + pad, max(y1, y2) + pad)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                mx = (cx + 0.5) * cell
+                my = (cy + 0.5) * cell
+                if point_segment_distance(mx, my, x1, y1, x2, y2) <= reach:
+                    self.cells.setdefault((cx, cy), []).append(i)
+
+    def _cell_of(self, x, y):
+        return math.floor(x / self.cell), math.floor(y / self.cell)
+
+    def near_point(self, x, y):
+        """Indices of walls that may lie within `pad` of (x, y)."""
+        return self.cells.get(self._cell_of(x, y), ())
+
+    def in_rect(self, x0, y0, x1, y1):
+        """Indices of walls registered in any cell overlapping the rectangle."""
+        cx0, cy0 = self._cell_of(x0, y0)
+        cx1, cy1 = self._cell_of(x1, y1)
+        found = set()
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                found.update(self.cells.get((cx, cy), ()))
+        return found
+
+    def along_segment(self, ax, ay, bx, by):
+        """Yields wall indices near segment AB, cell by cell from A towards B."""
+        seen = set()
+        for key in self._traverse(ax, ay, bx, by):
+            for i in self.cells.get(key, ()):
+                if i not in seen:
+                    seen.add(i)
+                    yield i
+
+    def _traverse(self, ax, ay, bx, by):
+        # Amanatides & Woo grid walk over the cells the segment passes through
+        cell = self.cell
+        cx, cy = self._cell_of(ax, ay)
+        end_x, end_y = self._cell_of(bx, by)
+        dx = bx - ax
+        dy = by - ay
+        step_x = 1 if dx > 0 else -1
+        step_y = 1 if dy > 0 else -1
+        t_delta_x = abs(cell / dx) if dx else math.inf
+        t_delta_y = abs(cell / dy) if dy else math.inf
+        if dx:
+            next_x = (cx + (1 if dx > 0 else 0)) * cell
+            t_max_x = (next_x - ax) / dx
+        else:
+            t_max_x = math.inf
+        if dy:
+            next_y = (cy + (1 if dy > 0 else 0)) * cell
+            t_max_y = (next_y - ay) / dy
+        else:
+            t_max_y = math.inf
+        yield cx, cy
+        while (cx, cy) != (end_x, end_y):
+            if t_max_x < t_max_y:
+                if t_max_x > 1:
+                    break
+                cx += step_x
+                t_max_x += t_delta_x
+            else:
+                if t_max_y > 1:
+                    break
+                cy += step_y
+                t_max_y += t_delta_y
+            yield cx, cy
+
+
+# --- Scoring ---
+def compute_score(elapsed, move_count, total_distance):
+    """The score formula used by run_commands (elapsed: see VirtualClock)."""
+    return max(0, 1000 - (elapsed * 2 + move_count * 1 + total_distance * 0.1))
+
+
+class VirtualClock:
+    """
+    Deterministic score clock for one maze: real time spent planning (the
+    clock runs between runs) plus the simulated travel time of every run
+    (run_path's 'elapsed'). Time spent animating a run is not counted, so
+    playback speed and rendering load don't change the score.
+    """
+
+    def __init__(self, now=time.monotonic):
+        self._now = now
+        self.reset()
+
+    def reset(self):
+        self._started = self._now()
+        self._paused_at = None
+        self._paused = 0.0
+        self.travel = 0.0
+
+    def planning(self):
+        end = self._paused_at if self._paused_at is not None else self._now()
+        return end - self._started - self._paused
+
+    def begin_run(self):
+        """Stops the planning clock while a run plays back."""
+        if self._paused_at is None:
+            self._paused_at = self._now()
+
+    def end_run(self, travel):
+        """Adds the run's simulated travel time and restarts the planning clock."""
+        self.travel += travel
+        if self._paused_at is not None:
+            self._paused += self._now() - self._paused_at
+            self._paused_at = None
+
+    def elapsed(self):
+        return self.planning() + self.travel
+
+
+# --- Headless Run ---
+MOVE = 0    # opcodes of a compiled command script (see command_script.py)
+TURN = 1
+
+
+def run_path(path, goal, hit_test, mark=None):
+    """
+    Applies the game rules to a traced command path: the run ends at the
+    first step where `hit_test(x, y)` reports a wall or the turtle is within
+    GOAL_RADIUS of the goal. Every executed MOVE/TURN counts as a move.
+    `mark(phase)`, if given, is called after each step's "collision" and
+    "goal" check (a profiler hook, see frame_profiler.py).
+
+    'elapsed' is the travel time the built-in delays would take, i.e. the
+    score-relevant time with zero planning time.
+    """
+    gx, gy = goal
+    xs, ys = path.xs, path.ys
+    outcome = "finished"
+    stop = None
+    for k in range(len(xs)):
+        x = xs[k]
+        y = ys[k]
+        hit = hit_test(x, y)
+        if mark is not None:
+            mark("collision")
+        if hit:
+            outcome = "collision"
+            stop = k
+            break
+        reached = math.hypot(gx - x, gy - y) < GOAL_RADIUS
+        if mark is not None:
+            mark("goal")
+        if reached:
+            outcome = "goal"
+            stop = k
+            break
+
+    program = path.program
+    if stop is None:
+        executed = len(program)
+        steps = len(xs)
+    else:
+        executed = path.step_instr[stop] + 1
+        steps = stop + 1
+
+    total_distance = 0
+    turns = 0
+    for i in range(executed):
+        if program.ops[i] == MOVE:
+            total_distance += abs(program.args[i])
+        else:
+            turns += 1
+
+    elapsed = steps * STEP_DELAY + turns * TURN_DELAY
+    return {
+        "outcome": outcome,
+        "stop_step": stop,
+        "instructions": executed,
+        "position": (xs[steps - 1], ys[steps - 1]) if steps else tuple(path.start),
+        "moves": executed,
+        "distance": total_distance,
+        "steps": steps,
+        "turns": turns,
+        "elapsed": elapsed,
+        "score": compute_score(elapsed, executed, total_distance) if outcome == "goal" else 0.0,
+    }
+
+
+def _rotate(ox, oy, angle):
+    # Same arithmetic as turtle.Vec2D.rotate so headless runs match the animation
+    angle = math.radians(angle)
+    c, s = math.cos(angle), math.sin(angle)
+    return ox * c + -oy * s, oy * c + ox * s
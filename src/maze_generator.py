@@ -0,0 +1,242 @@
+import json
+import math
+import os
+import random
+import sys
+import time
+
+from maze_engine import THRESHOLD
+
+# Procedural maze generator (same JSON schema as the editor: name, walls, start, goal).
+# RUN : python src/maze_generator.py backtracker|kruskal|polygons [--size 40x40]
+#           [--seed 1] [--cell 20] [--out maze.json] [--check]
+#
+# Grid algorithms carve a perfect maze (every cell reachable, one route
+# between any two cells) and emit one wall per remaining cell edge, so a
+# 100x100 grid gives ~10k walls; mazes larger than the 600x600 playfield
+# simply extend past it. 'polygons' scatters random convex, rotated
+# polygons whose circumscribed circles keep a player-sized gap, which keeps
+# the free space connected. The same seed always gives the same maze.
+
+ALGORITHMS = ("backtracker", "kruskal", "polygons")
+MIN_CELL = 2 * THRESHOLD + 4   # narrower corridors can't be walked
+
+
+def _grid_frame(cols, rows, cell):
+    """Top-left corner of a cols x rows grid centred on the origin."""
+    return -(cols * cell) // 2, (rows * cell) // 2
+
+
+def _cell_centre(col, row, cell, x0, y0):
+    return (x0 + col * cell + cell // 2, y0 - row * cell - cell // 2)
+
+
+def _grid_walls(cols, rows, cell, open_edges):
+    """One wall per cell edge not in `open_edges` ({(cell, neighbour)} with cell = col + row * cols)."""
+    x0, y0 = _grid_frame(cols, rows, cell)
+    walls = []
+    for row in range(rows):
+        for col in range(cols):
+            index = col + row * cols
+            left = x0 + col * cell
+            top = y0 - row * cell
+            if row == 0:
+                walls.append([left, top, left + cell, top])
+            if col == 0:
+                walls.append([left, top, left, top - cell])
+            # right and bottom edges
+            if col == cols - 1 or (index, index + 1) not in open_edges:
+                walls.append([left + cell, top, left + cell, top - cell])
+            if row == rows - 1 or (index, index + cols) not in open_edges:
+                walls.append([left, top - cell, left + cell, top - cell])
+    return walls
+
+
+def recursive_backtracker(cols, rows, rng):
+    """Open edges of a depth-first (iterative) backtracker maze."""
+    visited = bytearray(cols * rows)
+    open_edges = set()
+    stack = [0]
+    visited[0] = 1
+    while stack:
+        current = stack[-1]
+        col, row = current % cols, current // cols
+        neighbours = []
+        if col > 0 and not visited[current - 1]:
+            neighbours.append(current - 1)
+        if col < cols - 1 and not visited[current + 1]:
+            neighbours.append(current + 1)
+        if row > 0 and not visited[current - cols]:
+            neighbours.append(current - cols)
+        if row < rows - 1 and not visited[current + cols]:
+            neighbours.append(current + cols)
+        if not neighbours:
+            stack.pop()
+            continue
+        chosen = rng.choice(neighbours)
+        visited[chosen] = 1
+        open_edges.add((min(current, chosen), max(current, chosen)))
+        stack.append(chosen)
+    return open_edges
+
+
+def kruskal(cols, rows, rng):
+    """Open edges of a randomized Kruskal maze (union-find over cells)."""
+    parent = list(range(cols * rows))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    edges = []
+    for row in range(rows):
+        for col in range(cols):
+            index = col + row * cols
+            if col < cols - 1:
+                edges.append((index, index + 1))
+            if row < rows - 1:
+                edges.append((index, index + cols))
+    rng.shuffle(edges)
+
+    open_edges = set()
+    for a, b in edges:
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_a] = root_b
+            open_edges.add((a, b))
+    return open_edges
+
+
+def grid_maze(algorithm, cols, rows, cell, rng):
+    carve = recursive_backtracker if algorithm == "backtracker" else kruskal
+    walls = _grid_walls(cols, rows, cell, carve(cols, rows, rng))
+    x0, y0 = _grid_frame(cols, rows, cell)
+    return walls, _cell_centre(0, 0, cell, x0, y0), _cell_centre(cols - 1, rows - 1, cell, x0, y0)
+
+
+def polygon_maze(count, cell, rng):
+    """
+    `count` random convex polygons inside a square border. Circles around the
+    polygons stay `gap` apart (and away from the border, start and goal), so
+    the inflated obstacles never touch and the goal stays reachable.
+    """
+    gap = 2 * THRESHOLD + 4
+    half = max(280, int(math.sqrt(count) * cell * 1.25))
+    start = (-half + 2 * gap, half - 2 * gap)
+    goal = (half - 2 * gap, -half + 2 * gap)
+    bucket = 2 * cell + gap
+    buckets = {}
+    walls = [[-half, half, half, half], [half, half, half, -half], [half, -half, -half, -half], [-half, -half, -half, half]]
+
+    placed = 0
+    attempts = 0
+    while placed < count and attempts < count * 50:
+        attempts += 1
+        radius = rng.uniform(cell * 0.4, cell)
+        cx = rng.uniform(-half + radius + gap, half - radius - gap)
+        cy = rng.uniform(-half + radius + gap, half - radius - gap)
+        if any(math.hypot(cx - px, cy - py) < radius + gap + THRESHOLD for px, py in (start, goal)):
+            continue
+        bx, by = int(cx // bucket), int(cy // bucket)
+        clear = True
+        for nx in (bx - 1, bx, bx + 1):
+            for ny in (by - 1, by, by + 1):
+                for ox, oy, other in buckets.get((nx, ny), ()):
+                    if math.hypot(cx - ox, cy - oy) < radius + other + gap:
+                        clear = False
+        if not clear:
+            continue
+        buckets.setdefault((bx, by), []).append((cx, cy, radius))
+        placed += 1
+
+        sides = rng.randint(3, 8)
+        rotation = rng.uniform(0, 2 * math.pi)
+        # Sorted angles on a circle give a convex polygon inside it
+        angles = sorted(rotation + rng.uniform(0, 2 * math.pi) for _ in range(sides))
+        vertices = [(round(cx + radius * math.cos(a)), round(cy + radius * math.sin(a))) for a in angles]
+        vertices = [v for i, v in enumerate(vertices) if v != vertices[i - 1]]
+        for i in range(len(vertices)):
+            (x1, y1), (x2, y2) = vertices[i - 1], vertices[i]
+            walls.append([x1, y1, x2, y2])
+    return walls, start, goal
+
+
+def generate(algorithm, cols, rows, seed=0, cell=20, name=None):
+    """Generates a maze dict; identical arguments always give the identical maze."""
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm '{algorithm}'. Use one of: {', '.join(ALGORITHMS)}.")
+    if cell < MIN_CELL:
+        raise ValueError(f"Cell size must be at least {MIN_CELL}px for the player to fit.")
+    if cols < 1 or rows < 1:
+        raise ValueError(f"Maze size must be at least 1x1, got {cols}x{rows}.")
+    rng = random.Random(f"{algorithm}:{cols}x{rows}:{cell}:{seed}")
+    if algorithm == "polygons":
+        walls, start, goal = polygon_maze(cols * rows, cell, rng)
+    else:
+        walls, start, goal = grid_maze(algorithm, cols, rows, cell, rng)
+    return {
+        "name": name or f"{algorithm.capitalize()} {cols}x{rows} #{seed}",
+        "walls": walls,
+        "start": list(start),
+        "goal": list(goal),
+    }
+
+
+def parse_size(text):
+    cols, _, rows = text.lower().partition("x")
+    return int(cols), int(rows or cols)
+
+
+def main(argv):
+    args = list(argv)
+    if not args or args[0] not in ALGORITHMS:
+        print(f"Usage: python src/maze_generator.py {'|'.join(ALGORITHMS)} [--size 40x40] [--seed 1] "
+              "[--cell 20] [--out maze.json] [--check]", file=sys.stderr)
+        return 2
+    algorithm = args.pop(0)
+    options = {"--size": "20x20", "--seed": "0", "--cell": "20", "--out": None}
+    check = False
+    while args:
+        flag = args.pop(0)
+        if flag == "--check":
+            check = True
+        elif flag in options and args:
+            options[flag] = args.pop(0)
+        else:
+            print(f"Unknown option {flag}", file=sys.stderr)
+            return 2
+
+    started = time.perf_counter()
+    try:
+        cols, rows = parse_size(options["--size"])
+        maze = generate(algorithm, cols, rows, int(options["--seed"]), int(options["--cell"]))
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 2
+    print(f"{maze['name']}: {len(maze['walls'])} walls in {(time.perf_counter() - started) * 1000:.0f} ms",
+          file=sys.stderr)
+
+    if check:
+        from maze_check import check_reachable
+
+        started = time.perf_counter()
+        reachable, message = check_reachable(maze["walls"], maze["start"], maze["goal"])
+        print(f"{'✅' if reachable else '❌'} {message} ({(time.perf_counter() - started) * 1000:.0f} ms)",
+              file=sys.stderr)
+        if not reachable:
+            return 1
+
+    if options["--out"]:
+        os.makedirs(os.path.dirname(os.path.abspath(options["--out"])), exist_ok=True)
+        with open(options["--out"], "w") as f:
+            json.dump(maze, f, indent=2)
+    else:
+        json.dump(maze, sys.stdout)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,137 @@
+import json
+import sys
+from fractions import Fraction
+
+# Wall-list optimizer for the editor.
+# RUN : python src/maze_optimizer.py maze.json [--write]
+#
+# Only rewrites that keep the union of the walls identical are applied, so
+# the distance from any point to the nearest wall - and therefore the
+# collision outcome of any path - is unchanged:
+#   * endpoints are canonicalized (float noise like 12.0000000001 snapped to
+#     the integer it stands for, each wall oriented the same way), which makes
+#     reversed and repeated walls exact duplicates
+#   * collinear walls that overlap or touch are merged into one
+#   * zero-length walls lying on another wall (or on each other) are dropped
+# Zero-length walls standing alone still block a 5 px circle, so they are
+# kept and only reported. Geometry is compared with exact fractions.
+
+SNAP = 1e-6   # coordinates this close to an integer are that integer
+
+
+def _snap(value):
+    nearest = round(value)
+    return int(nearest) if abs(value - nearest) <= SNAP else value
+
+
+def _exact(point):
+    return Fraction(point[0]), Fraction(point[1])
+
+
+def _line_key(p, q):
+    """Identifies the infinite line through p and q, plus the coordinate that orders points on it."""
+    (px, py), (qx, qy) = _exact(p), _exact(q)
+    if px != qx:
+        slope = (qy - py) / (qx - px)
+        return ("slope", slope, py - slope * px), 0
+    return ("vertical", px), 1
+
+
+def _on_segment(point, p, q):
+    (x, y), (px, py), (qx, qy) = _exact(point), _exact(p), _exact(q)
+    if (qx - px) * (y - py) != (qy - py) * (x - px):
+        return False
+    return min(px, qx) <= x <= max(px, qx) and min(py, qy) <= y <= max(py, qy)
+
+
+def optimize_walls(walls):
+    """
+    Returns (optimized walls, report). The report counts 'before', 'after',
+    'duplicates', 'merged', 'points_dropped' and lists 'isolated_points'.
+    """
+    report = {"before": len(walls), "duplicates": 0, "merged": 0, "points_dropped": 0, "isolated_points": []}
+
+    seen = set()
+    segments = []
+    points = []
+    for wall in walls:
+        x1, y1, x2, y2 = (_snap(v) for v in wall)
+        p, q = sorted([(x1, y1), (x2, y2)])
+        if (p, q) in seen:
+            report["duplicates"] += 1
+            continue
+        seen.add((p, q))
+        (points if p == q else segments).append((p, q))
+
+    # Group by supporting line (first-seen order) and merge overlapping/touching intervals
+    lines = {}
+    for p, q in segments:
+        key, axis = _line_key(p, q)
+        lines.setdefault(key, (axis, []))[1].append((p, q))
+
+    merged = []
+    for axis, group in lines.values():
+        group.sort(key=lambda seg: Fraction(seg[0][axis]))
+        start, end = group[0]
+        for p, q in group[1:]:
+            if Fraction(p[axis]) <= Fraction(end[axis]):
+                if Fraction(q[axis]) > Fraction(end[axis]):
+                    end = q
+                report["merged"] += 1
+            else:
+                merged.append((start, end))
+                start, end = p, q
+        merged.append((start, end))
+
+    kept_points = []
+    for point, _ in points:
+        if any(_on_segment(point, p, q) for p, q in merged) or point in kept_points:
+            report["points_dropped"] += 1
+            continue
+        kept_points.append(point)
+        report["isolated_points"].append(list(point))
+
+    optimized = [[p[0], p[1], q[0], q[1]] for p, q in merged]
+    optimized += [[x, y, x, y] for x, y in kept_points]
+    report["after"] = len(optimized)
+    return optimized, report
+
+
+def describe_report(report):
+    removed = report["before"] - report["after"]
+    share = removed / report["before"] * 100 if report["before"] else 0.0
+    text = f"Walls: {report['before']} → {report['after']} (-{removed}, {share:.0f}%)"
+    details = []
+    if report["duplicates"]:
+        details.append(f"{report['duplicates']} duplicate")
+    if report["merged"]:
+        details.append(f"{report['merged']} merged")
+    if report["points_dropped"]:
+        details.append(f"{report['points_dropped']} zero-length")
+    if details:
+        text += ": " + ", ".join(details)
+    if report["isolated_points"]:
+        text += f"\n{len(report['isolated_points'])} zero-length wall(s) kept (they still block): " + \
+            ", ".join(f"({x}, {y})" for x, y in report["isolated_points"][:5])
+    return text
+
+
+def main(argv):
+    write = "--write" in argv
+    files = [arg for arg in argv if not arg.startswith("--")]
+    if not files:
+        print("Usage: python src/maze_optimizer.py maze.json [...] [--write]", file=sys.stderr)
+        return 2
+    for filename in files:
+        with open(filename, "r") as f:
+            data = json.load(f)
+        data["walls"], report = optimize_walls(data["walls"])
+        print(f"{filename}: {describe_report(report)}")
+        if write and report["after"] != report["before"]:
+            with open(filename, "w") as f:
+                json.dump(data, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
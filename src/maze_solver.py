@@ -0,0 +1,277 @@
+import heapq
+import math
+import os
+import sys
+import time
+
+from maze_engine import (
+    GOAL_RADIUS,
+    STEP,
+    THRESHOLD,
+    WallGrid,
+    load_maze,
+    point_segment_distance,
+    segment_distance,
+    _rotate,
+)
+from command_script import simulate
+from maze_catalog import load_catalog
+
+# Par-score solver
+# RUN : python src/maze_solver.py [maze.json ...]   (defaults to every maze in src/mazes)
+#
+# Walls are inflated by the collision THRESHOLD plus a small margin for the
+# integer TURN angles and 5 px MOVE steps. Candidate waypoints sit on an
+# octagon around every wall endpoint (the corners a shortest path can bend
+# around), and A* searches the visibility graph between them with
+# line-of-sight checks evaluated lazily, only when an edge would improve a
+# node. The path is then turned into MOVE/TURN commands and replayed with the
+# game's own stepping to get the exact par score.
+
+OCTAGON = [(math.cos(k * math.pi / 4), math.sin(k * math.pi / 4)) for k in range(8)]
+MARGINS = (1.0, 2.5, 4.0, 6.0)   # extra clearance tried until the replay is collision-free
+FLAT = math.cos(math.pi / 8)     # walls within 22.5 degrees of a waypoint's tangent
+
+
+class VisibilityGraph:
+    def __init__(self, walls, clearance):
+        self.walls = walls
+        self.clearance = clearance
+        self.grid = WallGrid(walls, cell=32, pad=clearance)
+        self._visible = {}   # (a, b, clearance) -> line of sight, shared by every search on this graph
+
+    def point_clearance(self, x, y):
+        """Distance to the nearest wall, capped at the grid padding."""
+        best = self.clearance
+        for i in self.grid.near_point(x, y):
+            x1, y1, x2, y2 = self.walls[i]
+            best = min(best, point_segment_distance(x, y, x1, y1, x2, y2))
+        return best
+
+    def corner_nodes(self):
+        """
+        Waypoints around every wall endpoint, just outside the inflated walls,
+        as (x, y, nx, ny) with (nx, ny) the outward octagon direction.
+        """
+        radius = self.clearance / math.cos(math.pi / 8) + 0.5
+        leaving = {}   # endpoint -> unit directions of the walls that leave it
+        for x1, y1, x2, y2 in self.walls:
+            length = math.hypot(x2 - x1, y2 - y1)
+            if length:
+                leaving.setdefault((x1, y1), []).append(((x2 - x1) / length, (y2 - y1) / length))
+                leaving.setdefault((x2, y2), []).append(((x1 - x2) / length, (y1 - y2) / length))
+        seen = set()
+        nodes = []
+        for x1, y1, x2, y2 in self.walls:
+            for ex, ey in ((x1, y1), (x2, y2)):
+                directions = leaving.get((ex, ey), ())
+                for ux, uy in OCTAGON:
+                    # Walls running on past the endpoint on both sides make it a flat stretch
+                    # of the inflated outline there, which a shortest path never bends around
+                    sides = {ux * dy - uy * dx > 0 for dx, dy in directions if abs(ux * dy - uy * dx) >= FLAT}
+                    if len(sides) == 2:
+                        continue
+                    px = round(ex + ux * radius, 1)
+                    py = round(ey + uy * radius, 1)
+                    if (px, py) not in seen and self.point_clearance(px, py) >= self.clearance:
+                        seen.add((px, py))
+                        nodes.append((px, py, ux, uy))
+        return nodes
+
+    def visible(self, a, b, clearance):
+        key = (a, b, clearance)
+        known = self._visible.get(key)
+        if known is None:
+            known = self._visible[key] = self._line_of_sight(a, b, clearance)
+        return known
+
+    def _line_of_sight(self, a, b, clearance):
+        ax, ay = a
+        bx, by = b
+        # Walls entirely to one side of the segment's box (grown by clearance) can't be too close
+        lox, hix = min(ax, bx) - clearance, max(ax, bx) + clearance
+        loy, hiy = min(ay, by) - clearance, max(ay, by) + clearance
+        walls = self.walls
+        for i in self.grid.along_segment(ax, ay, bx, by):
+            x1, y1, x2, y2 = walls[i]
+            if (x1 < lox and x2 < lox) or (x1 > hix and x2 > hix) or (y1 < loy and y2 < loy) or (y1 > hiy and y2 > hiy):
+                continue
+            if segment_distance(ax, ay, bx, by, x1, y1, x2, y2) < clearance:
+                return False
+        return True
+
+
+def shortest_path(maze, clearance, tangent_only=True, graph=None):
+    """
+    A* over the visibility graph from start to goal; returns the waypoint
+    list or None. Pass the same `graph` to searches with the same clearance
+    to reuse its line-of-sight results.
+
+    The goal counts as reached at any waypoint well inside GOAL_RADIUS, so a
+    ring of extra targets around the goal is searched too. With
+    `tangent_only`, edges leaving a corner waypoint must run along its
+    octagon rather than into or straight away from it (a shortest path only
+    bends around corners it touches tangentially), which skips most
+    line-of-sight checks.
+    """
+    graph = graph or VisibilityGraph(maze["walls"], clearance)
+    start = (float(maze["start"][0]), float(maze["start"][1]))
+    gx, gy = float(maze["goal"][0]), float(maze["goal"][1])
+    target_radius = GOAL_RADIUS - STEP
+
+    # nodes[i] = (x, y, nx, ny, own clearance); nx/ny is None for free waypoints
+    nodes = [(start[0], start[1], None, None, max(THRESHOLD, min(clearance, graph.point_clearance(*start) - 0.01)))]
+    targets = set()
+    for k in range(16):
+        angle = k * math.pi / 8
+        for radius in ((0.0, target_radius) if k == 0 else (target_radius,)):
+            px = gx + math.cos(angle) * radius
+            py = gy + math.sin(angle) * radius
+            if graph.point_clearance(px, py) >= clearance:
+                targets.add(len(nodes))
+                nodes.append((px, py, None, None, clearance))
+    for px, py, nx, ny in graph.corner_nodes():
+        nodes.append((px, py, nx, ny, clearance))
+    if not targets:
+        return None
+
+    tangent = math.sin(math.pi / 8) + 0.02
+    g_cost = {0: 0.0}
+    parent = {0: None}
+    closed = set()
+    heap = [(max(0.0, math.hypot(start[0] - gx, start[1] - gy) - target_radius), 0.0, 0)]
+    reached = None
+
+    while heap:
+        _, g, u = heapq.heappop(heap)
+        if u in closed:
+            continue
+        if u in targets:
+            reached = u
+            break
+        closed.add(u)
+        ux, uy, unx, uny, u_clear = nodes[u]
+        for v in range(1, len(nodes)):
+            if v in closed:
+                continue
+            vx, vy, vnx, vny, v_clear = nodes[v]
+            length = math.hypot(vx - ux, vy - uy)
+            new_g = g + length
+            if new_g >= g_cost.get(v, math.inf) or length == 0:
+                continue
+            if tangent_only:
+                ex = (vx - ux) / length
+                ey = (vy - uy) / length
+                if unx is not None and abs(ex * unx + ey * uny) > tangent:
+                    continue
+                if vnx is not None and abs(ex * vnx + ey * vny) > tangent:
+                    continue
+            if not graph.visible((ux, uy), (vx, vy), min(u_clear, v_clear)):
+                continue
+            g_cost[v] = new_g
+            parent[v] = u
+            h = max(0.0, math.hypot(vx - gx, vy - gy) - target_radius)
+            heapq.heappush(heap, (new_g + h, new_g, v))
+
+    if reached is None:
+        return None
+    path = []
+    node = reached
+    while node is not None:
+        path.append(nodes[node])
+        node = parent[node]
+    path.reverse()
+
+    # Drop waypoints the path can cut straight past: fewer MOVE/TURN pairs
+    pulled = [path[0]]
+    i = 0
+    while i < len(path) - 1:
+        j = len(path) - 1
+        while j > i + 1 and not graph.visible(path[i][:2], path[j][:2], min(path[i][4], path[j][4])):
+            j -= 1
+        pulled.append(path[j])
+        i = j
+    return [node[:2] for node in pulled]
+
+
+def path_to_commands(path, goal):
+    """
+    Converts waypoints into MOVE/TURN lines, steering from where the turtle
+    will actually be after each rounded command so errors don't accumulate.
+    """
+    x, y = path[0]
+    ox, oy = 1.0, 0.0
+    gx, gy = goal
+    commands = []
+
+    for i, (tx, ty) in enumerate(path[1:], start=1):
+        heading = math.degrees(math.atan2(oy, ox))
+        wanted = math.degrees(math.atan2(ty - y, tx - x))
+        turn = round((heading - wanted + 180) % 360 - 180)
+        if turn:
+            commands.append(f"TURN {turn}")
+            ox, oy = _rotate(ox, oy, -turn)
+
+        if i == len(path) - 1:
+            # Final leg: stop at the first step inside the goal radius
+            steps = 0
+            limit = round(math.hypot(tx - x, ty - y) / STEP) + 2
+            while math.hypot(gx - x, gy - y) >= GOAL_RADIUS and steps < limit:
+                x, y = x + ox * STEP, y + oy * STEP
+                steps += 1
+        else:
+            steps = max(1, round(math.hypot(tx - x, ty - y) / STEP))
+            x, y = x + ox * STEP * steps, y + oy * STEP * steps
+        commands.append(f"MOVE {steps * STEP}")
+
+    return commands
+
+
+def solve(maze):
+    """
+    Finds the par route for a maze.
+
+    Returns a dict with the command lines, the waypoints and the headless
+    replay result (outcome, moves, distance, elapsed, score), or None when no
+    collision-free route was found.
+    """
+    graphs = {}
+    for tangent_only in (True, False):
+        for margin in MARGINS:
+            if margin not in graphs:
+                graphs[margin] = VisibilityGraph(maze["walls"], THRESHOLD + margin)
+            path = shortest_path(maze, THRESHOLD + margin, tangent_only, graphs[margin])
+            if path is None:
+                continue
+            commands = path_to_commands(path, maze["goal"])
+            result = simulate("\n".join(commands), maze["walls"], maze["start"], maze["goal"])
+            if result["outcome"] == "goal":
+                return {"commands": commands, "path": path, "margin": margin, **result}
+    return None
+
+
+def main(argv):
+    show_script = "--script" in argv
+    files = [arg for arg in argv if not arg.startswith("--")]
+    if not files:
+        catalog = load_catalog()
+        files = [catalog.path(name) for name, _ in catalog.entries()]
+
+    print(f"{'Maze':<40} {'Walls':>5} {'Moves':>5} {'Dist':>6} {'Par':>8} {'Solve':>8}")
+    for filename in files:
+        maze = load_maze(filename)
+        started = time.perf_counter()
+        solution = solve(maze)
+        solve_ms = (time.perf_counter() - started) * 1000
+        label = f"{maze['name']} ({os.path.basename(filename)})"[:40]
+        if solution is None:
+            print(f"{label:<40} {len(maze['walls']):>5} {'—':>5} {'—':>6} {'no route':>8} {solve_ms:>6.0f}ms")
+            continue
+        print(f"{label:<40} {len(maze['walls']):>5} {solution['moves']:>5} {solution['distance']:>6} "
+              f"{solution['score']:>8.2f} {solve_ms:>6.0f}ms")
+        if show_script:
+            print("    " + "\n    ".join(solution["commands"]))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
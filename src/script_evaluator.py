@@ -0,0 +1,127 @@
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from command_script import ScriptError, compile_script, trace
+from distance_field import field_for_maze
+from ghost_replay import record_path, to_text
+from maze_catalog import load_catalog
+from maze_engine import THRESHOLD, compute_score, load_maze, run_path, wall_hit_index
+
+# Runs one command script against many mazes at once, one worker process per
+# maze, and reports how far it gets on each.
+# RUN : python src/script_evaluator.py script.txt [maze.json ...] [--json]
+#       (script "-" reads stdin; mazes default to every file in src/mazes)
+#
+# The projected score is the score the run would get with zero planning time,
+# i.e. travel time from the game's step/turn delays (see VirtualClock).
+
+
+def evaluate_maze(filename, script, ghost_header=None):
+    """
+    Runs `script` on one maze file headlessly and returns a result row. With
+    a `ghost_header` a run that reaches the goal also carries its ghost
+    replay (base64, as uploaded with a score) in row["ghost"].
+    """
+    row = {"file": filename, "name": os.path.basename(filename)}
+    try:
+        maze = load_maze(filename)
+    except (OSError, ValueError, KeyError) as e:
+        row.update(outcome="error", error=f"Could not load maze: {e}")
+        return row
+    row["name"] = maze["name"]
+    try:
+        program = compile_script(script)
+        path = trace(program, maze["start"])
+    except ScriptError as e:
+        row.update(outcome="error", error=str(e))
+        return row
+
+    walls = maze["walls"]
+    field = field_for_maze(filename, walls)
+
+    def hit_test(x, y):
+        verdict = field.classify(x, y, THRESHOLD)
+        if verdict is None:
+            return wall_hit_index(walls, x, y) >= 0
+        return verdict
+
+    result = run_path(path, maze["goal"], hit_test)
+    row.update(
+        outcome=result["outcome"],
+        moves=result["moves"],
+        distance=result["distance"],
+        travel=round(result["elapsed"], 2),
+        position=[round(result["position"][0], 1), round(result["position"][1], 1)],
+        projected_score=round(compute_score(result["elapsed"], result["moves"], result["distance"]), 2)
+        if result["outcome"] == "goal" else 0.0,
+    )
+    if ghost_header is not None and result["outcome"] == "goal":
+        header = dict(ghost_header, maze=maze["name"], score=row["projected_score"])
+        row["ghost"] = to_text(record_path(path, result, header))
+    if result["outcome"] == "collision":
+        row["wall"] = wall_hit_index(walls, *result["position"])
+        row["line"] = program.lines[result["instructions"] - 1]
+    return row
+
+
+def evaluate_all(files, script, workers=None):
+    """
+    Evaluates `script` on every maze file in parallel; rows come back in the
+    order of `files`. Raises ScriptError up front if the script doesn't compile.
+    """
+    compile_script(script)
+    if len(files) <= 1 or workers == 1:
+        return [evaluate_maze(filename, script) for filename in files]
+    workers = workers or min(len(files), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(evaluate_maze, files, [script] * len(files)))
+
+
+def format_table(rows):
+    lines = [f"{'Maze':<32} {'Result':<10} {'Moves':>5} {'Dist':>6} {'Stopped at':>16} {'Projected':>9}"]
+    for row in rows:
+        if row["outcome"] == "error":
+            lines.append(f"{row['name'][:32]:<32} {'error':<10} {row['error']}")
+            continue
+        result = {"goal": "✅ pass", "collision": "💥 wall", "finished": "❌ short"}[row["outcome"]]
+        stopped = "" if row["outcome"] == "goal" else f"({row['position'][0]:.0f}, {row['position'][1]:.0f})"
+        lines.append(f"{row['name'][:32]:<32} {result:<10} {row['moves']:>5} {row['distance']:>6} "
+                     f"{stopped:>16} {row['projected_score']:>9.2f}")
+    return "\n".join(lines)
+
+
+def main(argv):
+    as_json = "--json" in argv
+    args = [arg for arg in argv if not arg.startswith("--")]
+    if not args:
+        print("Usage: python src/script_evaluator.py script.txt [maze.json ...] [--json]", file=sys.stderr)
+        return 2
+    script = sys.stdin.read() if args[0] == "-" else open(args[0]).read()
+    if args[1:]:
+        files = args[1:]
+    else:
+        catalog = load_catalog()
+        files = [catalog.path(name) for name, _ in catalog.entries()]
+
+    started = time.perf_counter()
+    try:
+        rows = evaluate_all(files, script)
+    except ScriptError as e:
+        if as_json:
+            print(json.dumps({"error": e.message, "line": e.line}))
+        else:
+            print(f"❌ {e}", file=sys.stderr)
+        return 1
+    if as_json:
+        print(json.dumps({"results": rows}))
+    else:
+        print(format_table(rows))
+        print(f"\n{len(rows)} mazes in {(time.perf_counter() - started) * 1000:.0f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from maze_catalog import load_catalog, maze_hash
+from maze_engine import load_maze
+from script_evaluator import evaluate_maze
+
+# Runs every contestant's command script on one maze headlessly, ranks the
+# results and submits the ranking to the leaderboard in one request.
+# RUN : python src/tournament.py maze.json scripts/ [alice.txt ...] [--event spring-cup] [--submit] [--json]
+#       (a catalog stem, maze name or hash works too; a directory adds every *.txt in it, username = file name)
+#
+# Scripts run in a pool of worker processes and each result is printed as soon
+# as it finishes. Scores are projected scores (travel time only, see
+# script_evaluator.py), so a tournament is deterministic: the same scripts on
+# the same maze always give the same ranking. --submit sends one /submit_score
+# payload per finisher, with its ghost replay, to /submit_scores. Submission
+# ids are derived from the event, maze and script, so re-running a tournament
+# never counts a score twice.
+
+API_URL = os.environ.get("TOURNAMENT_API", "https://ace-rnd-escapeprotocol.onrender.com") + "/submit_scores"
+SUBMIT_BATCH = 100      # payloads per request (the server accepts up to BULK_MAX)
+SUBMIT_ATTEMPTS = 4
+SUBMIT_TIMEOUT = 60     # seconds per attempt; a batch is applied in one request
+
+
+def find_scripts(paths):
+    """{username: script file} from script files and directories of *.txt files."""
+    scripts = {}
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".txt"))
+        else:
+            files = [path]
+        for filename in files:
+            username = os.path.splitext(os.path.basename(filename))[0]
+            if username in scripts:
+                print(f"WARNING: {filename} replaces {scripts[username]} for {username}", file=sys.stderr)
+            scripts[username] = filename
+    return scripts
+
+
+def resolve_maze(key):
+    """
+    A maze file path, or a catalog key (file name or stem, maze name or
+    content hash, as MazeCatalog.find takes); raises ValueError if unknown.
+    """
+    if os.path.exists(key):
+        return key
+    catalog = load_catalog()
+    name = catalog.find(key)
+    if name is None:
+        raise ValueError(f"No maze file or catalog entry matches '{key}'.")
+    return catalog.path(name)
+
+
+def run_tournament(maze_file, scripts, workers=None, on_result=None):
+    """
+    Evaluates every {username: script text} on `maze_file` in parallel and
+    returns the result rows (with "username"), calling on_result(row) for
+    each one as it finishes.
+    """
+    rows = []
+    workers = workers or min(len(scripts), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            pool.submit(evaluate_maze, maze_file, script, {"username": username}): username
+            for username, script in scripts.items()
+        }
+        for future in as_completed(futures):
+            username = futures[future]
+            try:
+                row = future.result()
+            except Exception as e:   # a crashed worker only costs its own contestant
+                row = {"file": maze_file, "outcome": "error", "error": f"Worker failed: {e}"}
+            row["username"] = username
+            rows.append(row)
+            if on_result:
+                on_result(row)
+    return rows
+
+
+def rank(rows):
+    """
+    Sorts rows best first and numbers them: finishers by projected score
+    (then fewer moves, then shorter distance), everyone else after them.
+    Equal results share a rank (1, 2, 2, 4).
+    """
+    def result_key(row):
+        if row["outcome"] != "goal":
+            return (1, 0.0, 0, 0.0)
+        return (0, -row["projected_score"], row["moves"], row["distance"])
+
+    ranked = sorted(rows, key=lambda row: (result_key(row), row["username"]))
+    for i, row in enumerate(ranked):
+        tied = i > 0 and result_key(ranked[i - 1]) == result_key(row)
+        row["rank"] = ranked[i - 1]["rank"] if tied else i + 1
+    return ranked
+
+
+def format_row(row):
+    if row["outcome"] == "error":
+        return f"{row['username'][:24]:<24} error      {row['error']}"
+    result = {"goal": "✅ pass", "collision": "💥 wall", "finished": "❌ short"}[row["outcome"]]
+    return (f"{row['username'][:24]:<24} {result:<10} {row['moves']:>5} {row['distance']:>6} "
+            f"{row['travel']:>7.2f} {row['projected_score']:>9.2f}")
+
+
+def format_ranking(ranked):
+    lines = [f"{'#':>3}  {'Player':<24} {'Result':<10} {'Moves':>5} {'Dist':>6} {'Travel':>7} {'Score':>9}"]
+    lines += [f"{row['rank']:>3}  {format_row(row)}" for row in ranked]
+    return "\n".join(lines)
+
+
+# --- Submission ---
+def submission_id(event, maze_key, username, script):
+    """Stable id for one contestant's result: a re-run submits the same id and is ignored."""
+    digest = hashlib.sha1(f"{event or ''}\n{maze_key}\n{username}\n{script}".encode()).hexdigest()
+    return f"t-{digest}"
+
+
+def score_payload(row, event, submission):
+    """The /submit_score payload for a finisher, as the game would send it."""
+    data = {
+        "username": row["username"],
+        "score": row["projected_score"],
+        "maze_scores": {row["name"]: [row["projected_score"], row["moves"], row["distance"], row["travel"]]},
+        "moves": row["moves"],
+        "distance": row["distance"],
+        "time_elapsed": row["travel"],
+        "submission_id": submission,
+    }
+    if event:
+        data["event"] = event
+    if row.get("ghost"):
+        data["replays"] = {row["name"]: row["ghost"]}
+    return data
+
+
+def post_batch(payloads):
+    """Sends one /submit_scores request, retrying with backoff; the per-payload results, or None."""
+    import requests
+    reason = "no attempt"
+    for attempt in range(SUBMIT_ATTEMPTS):
+        retry_after = 0.0
+        try:
+            response = requests.post(API_URL, json={"submissions": payloads}, timeout=SUBMIT_TIMEOUT)
+            if response.status_code < 500 and response.status_code != 429:
+                if not response.ok:
+                    print(f"ERROR: Tournament upload rejected: {response.text}", file=sys.stderr)
+                    return None
+                return response.json()["results"]
+            reason = f"HTTP {response.status_code}"
+            retry_after = float(response.headers.get("Retry-After", 0) or 0)
+        except (requests.RequestException, ValueError, KeyError) as e:
+            reason = str(e)
+        if attempt + 1 < SUBMIT_ATTEMPTS:
+            # Safe to resend the whole batch: every payload carries its submission id
+            delay = max(retry_after, min(8.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0))
+            print(f"WARNING: Tournament upload failed ({reason}); retrying in {delay:.1f}s", file=sys.stderr)
+            time.sleep(delay)
+    print(f"ERROR: Tournament upload failed after {SUBMIT_ATTEMPTS} attempts ({reason}).", file=sys.stderr)
+    return None
+
+
+def submit_ranking(ranked, scripts, maze_key, event=None):
+    """Submits every finisher's score in bulk; returns (submitted, failed) usernames."""
+    payloads = [
+        score_payload(row, event, submission_id(event, maze_key, row["username"], scripts[row["username"]]))
+        for row in ranked if row["outcome"] == "goal"
+    ]
+    submitted, failed = [], []
+    for i in range(0, len(payloads), SUBMIT_BATCH):
+        batch = payloads[i:i + SUBMIT_BATCH]
+        results = post_batch(batch) or [{"status": None}] * len(batch)
+        for payload, result in zip(batch, results):
+            ok = result.get("status") == 200
+            (submitted if ok else failed).append(payload["username"])
+            if not ok and result.get("status") is not None:
+                print(f"WARNING: {payload['username']}: {result.get('error', result)}", file=sys.stderr)
+    return submitted, failed
+
+
+def main(argv):
+    as_json = "--json" in argv
+    submit = "--submit" in argv
+    event = argv[argv.index("--event") + 1] if "--event" in argv else None
+    workers = int(argv[argv.index("--workers") + 1]) if "--workers" in argv else None
+    valued = {argv[i + 1] for i, arg in enumerate(argv[:-1]) if arg in ("--event", "--workers")}
+    args = [arg for arg in argv if not arg.startswith("--") and arg not in valued]
+    if len(args) < 2:
+        print("Usage: python src/tournament.py maze.json scripts/ [script.txt ...] "
+              "[--event name] [--submit] [--workers N] [--json]", file=sys.stderr)
+        return 2
+
+    try:
+        maze_file = resolve_maze(args[0])
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    try:
+        maze = load_maze(maze_file)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"ERROR: Could not load maze {args[0]}: {e}", file=sys.stderr)
+        return 1
+    scripts = {}
+    for username, filename in find_scripts(args[1:]).items():
+        try:
+            with open(filename) as f:
+                scripts[username] = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"WARNING: Skipping {filename}: {e}", file=sys.stderr)
+    if not scripts:
+        print("ERROR: No contestant scripts found.", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    done = 0
+
+    def report(row):
+        nonlocal done
+        done += 1
+        if not as_json:
+            print(f"[{done}/{len(scripts)}] {format_row(row)}", file=sys.stderr)
+
+    ranked = rank(run_tournament(maze_file, scripts, workers, report))
+    elapsed = time.perf_counter() - started
+    if as_json:
+        rows = [{key: value for key, value in row.items() if key != "ghost"} for row in ranked]
+        print(json.dumps({"maze": maze["name"], "event": event, "ranking": rows}))
+    else:
+        print(f"\n🏁 {maze['name']}: {len(ranked)} contestants in {elapsed:.1f}s\n")
+        print(format_ranking(ranked))
+
+    if submit:
+        with open(maze_file) as f:
+            maze_key = maze_hash(json.load(f))[:16]
+        submitted, failed = submit_ranking(ranked, scripts, maze_key, event)
+        print(f"\nSubmitted {len(submitted)} score(s)" + (f", {len(failed)} failed: {', '.join(failed)}" if failed else ""),
+              file=sys.stderr)
+        if failed:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
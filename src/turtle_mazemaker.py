@@ -4,6 +4,16 @@ from tkinter import filedialog
 import json
 import os
 import math
+import queue
+import threading
+import time
+
+from maze_catalog import load_catalog
+from maze_check import check_reachable
+from maze_generator import ALGORITHMS, generate, parse_size
+from maze_optimizer import describe_report, optimize_walls
+from maze_solver import solve
+from viewport import Viewport
 
 # --- Tkinter Setup ---
 root = tk.Tk()
@@ -20,14 +30,16 @@ canvas.pack()
 screen = turtle.TurtleScreen(canvas)
 screen.tracer(0)
 
-drawer = turtle.RawTurtle(screen)
-drawer.hideturtle()
-drawer.speed(0)
+# Zoom/pan view; draws the walls itself (created before the turtles, see viewport.py)
+viewport = Viewport(screen)
+viewport.bind()
 
-preview_turtle = turtle.RawTurtle(screen)
-preview_turtle.hideturtle()
-preview_turtle.pensize(2)
-preview_turtle.color("gray")
+# Wall preview: one canvas line whose coordinates follow the mouse, instead
+# of a turtle that clears and redraws it (and the whole screen) every event
+preview_line = screen.cv.create_line(0, 0, 0, 0, fill="gray", width=2, state="hidden")
+PREVIEW_FRAME_MS = 16   # mouse motion is applied at most once per frame
+pending_motion = None   # latest unapplied pointer position (turtle coordinates)
+motion_scheduled = False
 
 walls = []
 clicks = []
@@ -36,6 +48,8 @@ goal_pos = (180, -180)
 line_mode = tk.StringVar(value="straight")
 delete_mode = tk.BooleanVar(value=False)
 set_mode = tk.StringVar(value="draw")  # 'draw', 'start', 'goal', 'delete'
+check_on_save = tk.BooleanVar(value=True)
+optimize_on_save = tk.BooleanVar(value=False)
 
 # --- Start & Goal markers ---
 start_marker = turtle.RawTurtle(screen)
@@ -52,6 +66,9 @@ goal_marker.goto(goal_pos)
 goal_marker.color("green")
 goal_marker.dot(20)
 
+# The viewport draws `walls` from here on; new walls are announced with add_wall
+viewport.set_walls(walls, points=(start_pos, goal_pos))
+
 # --- UI Elements ---
 maze_name_label = tk.Label(frame_left, text="Maze Name:")
 maze_name_label.pack()
@@ -105,14 +122,8 @@ status_label = tk.Label(frame_left, text="Click to draw walls (2 clicks per wall
 status_label.pack(pady=10)
 
 # --- Drawing Functions ---
-def preview_wall(x, y):
-    preview_turtle.clear()
-    if len(clicks) != 1:
-        return
-
-    x1, y1 = clicks[0]
-    x2, y2 = x, y
-
+def wall_end(x1, y1, x2, y2):
+    """End point of a wall from (x1, y1) towards (x2, y2), snapped to the nearest axis in straight mode."""
     if line_mode.get() == "straight":
         dx = abs(x2 - x1)
         dy = abs(y2 - y1)
@@ -120,11 +131,23 @@ def preview_wall(x, y):
             y2 = y1
         else:
             x2 = x1
+    return x2, y2
+
+def preview_wall(x, y):
+    if len(clicks) != 1:
+        hide_preview()
+        return
+
+    x1, y1 = clicks[0]
+    x2, y2 = wall_end(x1, y1, x, y)
+    # Turtle y points up, canvas y points down; canvas units follow the zoom
+    xs, ys = screen.xscale, screen.yscale
+    screen.cv.coords(preview_line, x1 * xs, -y1 * ys, x2 * xs, -y2 * ys)
+    screen.cv.itemconfigure(preview_line, state="normal")
+    screen.cv.tag_raise(preview_line)
 
-    preview_turtle.penup()
-    preview_turtle.goto(x1, y1)
-    preview_turtle.pendown()
-    preview_turtle.goto(x2, y2)
+def hide_preview():
+    screen.cv.itemconfigure(preview_line, state="hidden")
 
 def onclick(x, y):
     """Handle clicks for drawing, deleting, or setting start/goal."""
@@ -158,37 +181,33 @@ def onclick(x, y):
     clicks.append((x, y))
     if len(clicks) == 2:
         x1, y1 = clicks[0]
-        x2, y2 = clicks[1]
-
-        if line_mode.get() == "straight":
-            dx = abs(x2 - x1)
-            dy = abs(y2 - y1)
-            if dx > dy:
-                y2 = y1
-            else:
-                x2 = x1
-
-        drawer.penup()
-        drawer.goto(x1, y1)
-        drawer.pendown()
-        drawer.goto(x2, y2)
+        x2, y2 = wall_end(x1, y1, *clicks[1])
+
         walls.append([int(x1), int(y1), int(x2), int(y2)])
+        viewport.add_wall()
 
         clicks.clear()
-        preview_turtle.clear()
+        hide_preview()
         screen.update()
 
 screen.onclick(onclick)
 
 def motion_handler(event):
-    """Track mouse motion for live preview."""
-    if len(clicks) == 1 and set_mode.get() == "draw":
-        width = canvas.winfo_width()
-        height = canvas.winfo_height()
-        x = event.x - width / 2
-        y = height / 2 - event.y
-        preview_wall(x, y)
-        root.after_idle(lambda: screen.update())
+    """Track mouse motion for live preview; bursts of events are coalesced into one redraw per frame."""
+    global pending_motion, motion_scheduled
+    if len(clicks) != 1 or set_mode.get() != "draw":
+        return
+    # Same conversion as turtle's own click handler (honours scrolling)
+    pending_motion = (screen.cv.canvasx(event.x) / screen.xscale, -screen.cv.canvasy(event.y) / screen.yscale)
+    if not motion_scheduled:
+        motion_scheduled = True
+        root.after(PREVIEW_FRAME_MS, apply_motion)
+
+def apply_motion():
+    global motion_scheduled
+    motion_scheduled = False
+    if pending_motion is not None and len(clicks) == 1 and set_mode.get() == "draw":
+        preview_wall(*pending_motion)
 
 screen.cv.bind("<Motion>", motion_handler)
 
@@ -225,14 +244,9 @@ def delete_nearest_wall(x, y):
     else:
         status_label.config(text="⚠️ Click closer to a wall to delete it.")
 
-def redraw_all_walls():
-    drawer.clear()
-    preview_turtle.clear()
-    for x1, y1, x2, y2 in walls:
-        drawer.penup()
-        drawer.goto(x1, y1)
-        drawer.pendown()
-        drawer.goto(x2, y2)
+def redraw_all_walls(fit=False):
+    hide_preview()
+    viewport.set_walls(walls, points=(start_pos, goal_pos), fit=fit)
     screen.update()
 
 # --- Undo ---
@@ -247,6 +261,18 @@ def undo_last_wall():
 undo_button = tk.Button(frame_left, text="Undo Last Wall", command=undo_last_wall)
 undo_button.pack(pady=5)
 
+# --- Optimize ---
+def optimize_maze():
+    """Merges duplicate/collinear walls in place; collisions stay exactly the same."""
+    optimized, report = optimize_walls(walls)
+    walls[:] = optimized
+    redraw_all_walls()
+    status_label.config(text=f"🧹 {describe_report(report)}")
+    return report
+
+optimize_button = tk.Button(frame_left, text="🧹 Optimize Walls", command=optimize_maze)
+optimize_button.pack(pady=5)
+
 # --- Save Maze ---
 def save_maze():
     name = maze_name_entry.get().strip()
@@ -254,26 +280,112 @@ def save_maze():
         status_label.config(text="⚠️ Please enter a maze name before saving.")
         return
 
+    # Optimize a copy: the editor's walls only change if the save goes ahead
+    saved_walls = walls
+    optimize_note = ""
+    if optimize_on_save.get():
+        saved_walls, report = optimize_walls(walls)
+        optimize_note = "\n🧹 " + describe_report(report).splitlines()[0]
+
     maze_data = {
         "name": name,
-        "walls": walls,
+        "walls": saved_walls,
         "start": start_pos,
         "goal": goal_pos,
     }
 
+    # Refuse to write mazes whose goal can't be reached from the start
+    if check_on_save.get():
+        reachable, message = check_reachable(saved_walls, start_pos, goal_pos)
+        if not reachable:
+            status_label.config(text=f"❌ Not saved: {message}")
+            return
+
     dir_name = "src/mazes"
     filename = os.path.join(dir_name, f"{name}.json")
     try:
         os.makedirs(dir_name, exist_ok=True)
         with open(filename, "w") as f:
             json.dump(maze_data, f, indent=2)
-        status_label.config(text=f"✅ Maze saved to {filename}")
     except Exception as e:
         status_label.config(text=f"❌ Error saving maze: {e}")
+        return
+    if saved_walls is not walls:
+        walls[:] = saved_walls
+        redraw_all_walls()
+    status_label.config(text=f"✅ Maze saved to {filename}{optimize_note}")
+    # Keep the maze manifest current so the game picks the new maze up by name
+    load_catalog(dir_name)
+
+    saved = f"✅ Maze saved to {filename}{optimize_note}"
+    if len(walls) > PAR_WALL_BUDGET:
+        status_label.config(text=f"{saved}\n🏆 Par skipped ({len(walls)} walls); use Compute Par")
+        return
+    compute_par(saved)
+
+# --- Par Score ---
+# The solver's search grows with the square of the wall count, so it runs on a
+# worker thread and its result is polled from the event loop; saving only
+# computes par automatically for mazes up to PAR_WALL_BUDGET walls.
+PAR_WALL_BUDGET = 500
+par_results = queue.Queue()
+par_request = 0   # results of an older request are dropped
+par_pending = 0   # requests still solving; the queue is polled while there are any
+
+def compute_par(prefix=""):
+    """Solves a snapshot of the current maze in the background and shows its par score."""
+    global par_request, par_pending
+    par_request += 1
+    request = par_request
+    maze_data = {"walls": [list(wall) for wall in walls], "start": start_pos, "goal": goal_pos}
+    status_label.config(text=f"{prefix}\n🏆 Computing par ({len(walls)} walls)...".lstrip())
+
+    def worker():
+        # Par score: best route the solver finds, scored like run_commands
+        started = time.perf_counter()
+        try:
+            solution = solve(maze_data)
+        except Exception as e:
+            solution = e
+        par_results.put((request, prefix, solution, (time.perf_counter() - started) * 1000))
+
+    threading.Thread(target=worker, daemon=True).start()
+    par_pending += 1
+    if par_pending == 1:
+        root.after(50, poll_par)
+
+def poll_par():
+    global par_pending
+    while True:
+        try:
+            request, prefix, solution, solve_ms = par_results.get_nowait()
+        except queue.Empty:
+            break
+        par_pending -= 1
+        if request != par_request:
+            continue
+        if isinstance(solution, Exception):
+            text = f"❌ Solver failed: {solution}"
+        elif solution:
+            text = f"🏆 Par: {solution['score']:.2f} ({solution['moves']} moves, {solve_ms:.0f} ms)"
+        else:
+            text = "⚠️ Solver found no route to the goal"
+        status_label.config(text=f"{prefix}\n{text}".lstrip())
+    if par_pending:
+        root.after(50, poll_par)
+
+check_toggle = tk.Checkbutton(frame_left, text="Check solvability on save", variable=check_on_save)
+check_toggle.pack(pady=(10, 0))
+
+optimize_toggle = tk.Checkbutton(frame_left, text="Optimize walls on save", variable=optimize_on_save)
+optimize_toggle.pack()
 
 save_button = tk.Button(frame_left, text="Save Maze", command=save_maze)
 save_button.pack(pady=10)
 
+par_button = tk.Button(frame_left, text="🏆 Compute Par", command=compute_par)
+par_button.pack(pady=(0, 5))
+
 # --- Load Maze ---
 def load_maze():
     global walls, start_pos, goal_pos
@@ -289,19 +401,10 @@ def load_maze():
         with open(file_path, "r") as f:
             data = json.load(f)
 
-        walls.clear()
-        drawer.clear()
-        preview_turtle.clear()
-
-        for x1, y1, x2, y2 in data.get("walls", []):
-            drawer.penup()
-            drawer.goto(x1, y1)
-            drawer.pendown()
-            drawer.goto(x2, y2)
-            walls.append([x1, y1, x2, y2])
-
+        walls[:] = [[x1, y1, x2, y2] for x1, y1, x2, y2 in data.get("walls", [])]
         start_pos = tuple(data.get("start", start_pos))
         goal_pos = tuple(data.get("goal", goal_pos))
+        redraw_all_walls(fit=True)
         start_marker.clear()
         goal_marker.clear()
         start_marker.goto(start_pos)
@@ -321,5 +424,51 @@ def load_maze():
 load_button = tk.Button(frame_left, text="Load Maze", command=load_maze)
 load_button.pack(pady=5)
 
+# --- Generate Maze ---
+generate_algorithm = tk.StringVar(value=ALGORITHMS[0])
+GENERATE_MAX_SIDE = 100   # 100x100 is ~10k walls; bigger grids belong to maze_generator.py
+
+def generate_maze():
+    global start_pos, goal_pos
+    try:
+        cols, rows = parse_size(generate_size_entry.get())
+        seed = int(generate_seed_entry.get() or 0)
+        if not (1 <= cols <= GENERATE_MAX_SIDE and 1 <= rows <= GENERATE_MAX_SIDE):
+            raise ValueError(f"size must be between 1x1 and {GENERATE_MAX_SIDE}x{GENERATE_MAX_SIDE}")
+        maze_data = generate(generate_algorithm.get(), cols, rows, seed)
+    except ValueError as e:
+        status_label.config(text=f"❌ Can't generate maze: {e}")
+        return
+
+    walls[:] = maze_data["walls"]
+    start_pos = tuple(maze_data["start"])
+    goal_pos = tuple(maze_data["goal"])
+    redraw_all_walls(fit=True)
+    start_marker.clear()
+    goal_marker.clear()
+    start_marker.goto(start_pos)
+    start_marker.dot(20)
+    goal_marker.goto(goal_pos)
+    goal_marker.dot(20)
+    maze_name_entry.delete(0, tk.END)
+    maze_name_entry.insert(0, maze_data["name"])
+    screen.update()
+    note = "\n🏆 Par won't be computed on save; use Compute Par" if len(walls) > PAR_WALL_BUDGET else ""
+    status_label.config(text=f"🎲 Generated {maze_data['name']} ({len(walls)} walls){note}")
+
+generate_frame = tk.Frame(frame_left)
+generate_frame.pack(pady=(10, 0))
+tk.OptionMenu(generate_frame, generate_algorithm, *ALGORITHMS).pack(side="left")
+generate_size_entry = tk.Entry(generate_frame, width=6)
+generate_size_entry.insert(0, "12x12")
+generate_size_entry.pack(side="left", padx=2)
+tk.Label(generate_frame, text="seed").pack(side="left")
+generate_seed_entry = tk.Entry(generate_frame, width=5)
+generate_seed_entry.insert(0, "0")
+generate_seed_entry.pack(side="left", padx=2)
+
+generate_button = tk.Button(frame_left, text="🎲 Generate Maze", command=generate_maze)
+generate_button.pack(pady=5)
+
 screen.update()
 root.mainloop()
\ No newline at end of file
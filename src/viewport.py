@@ -0,0 +1,171 @@
+from maze_engine import WallGrid
+
+# Zoomable, pannable view of a maze on a TurtleScreen, shared by the game and the editor.
+#
+#   mouse wheel            zoom around the pointer
+#   right/middle drag      pan
+#   double right click     fit the whole maze
+#
+# The view is applied with the screen's own world coordinates
+# (setworldcoordinates), so turtles, their trails and click positions follow
+# it without any changes. Walls are not drawn by a turtle: the viewport keeps
+# them in a WallGrid and owns one canvas line per wall near the visible area,
+# creating and deleting lines as the view moves. A maze of any size costs only
+# as many canvas items as fit on screen. View changes are coalesced to at most
+# one per frame.
+#
+# The screen switches to 'world' mode on creation, which resets every turtle,
+# so create the Viewport before the turtles.
+
+FRAME_MS = 16
+ZOOM_STEP = 1.2
+MIN_SPAN = 40          # most zoomed-in view, in world units across
+MARGIN = 0.1           # walls this far (share of the view) outside it are kept drawn
+GRID_CELL = 64
+
+
+class Viewport:
+    def __init__(self, screen, extent=300, color="black", width=1):
+        self.screen = screen
+        self.cv = screen.cv
+        self.home = (-extent, -extent, extent, extent)
+        self.color = color
+        self.width = width
+        self.walls = []
+        self.grid = WallGrid(self.walls, cell=GRID_CELL, pad=0)
+        self.items = {}        # wall index -> canvas line
+        self.bounds = self.home
+        self.center = (0.0, 0.0)
+        self.span = 2.0 * extent
+        self._scheduled = False
+        self._drag = None
+        self._apply()
+
+    # --- View ---
+    def rect(self):
+        (cx, cy), half = self.center, self.span / 2
+        return cx - half, cy - half, cx + half, cy + half
+
+    def max_span(self):
+        x0, y0, x1, y1 = self.bounds
+        return max(x1 - x0, y1 - y0) * 4
+
+    def fit(self):
+        """Shows the whole maze (never zooming in past the default 600x600 view)."""
+        x0, y0, x1, y1 = self.bounds
+        self.center = ((x0 + x1) / 2, (y0 + y1) / 2)
+        self.span = max(x1 - x0, y1 - y0)
+        self.schedule()
+
+    def zoom(self, factor, x=None, y=None):
+        """Zooms in by `factor` (< 1 zooms out), keeping world point (x, y) in place."""
+        span = min(self.max_span(), max(MIN_SPAN, self.span / factor))
+        if x is not None:
+            cx, cy = self.center
+            ratio = span / self.span
+            self.center = (x + (cx - x) * ratio, y + (cy - y) * ratio)
+        self.span = span
+        self.schedule()
+
+    def pan(self, dx, dy):
+        cx, cy = self.center
+        self.center = (cx + dx, cy + dy)
+        self.schedule()
+
+    def schedule(self):
+        if not self._scheduled:
+            self._scheduled = True
+            self.cv.after(FRAME_MS, self._apply)
+
+    def _apply(self):
+        self._scheduled = False
+        self.screen.setworldcoordinates(*self.rect())
+        self.refresh()
+        self.screen.update()
+
+    # --- Walls ---
+    def set_walls(self, walls, points=(), fit=False):
+        """
+        Shows a new wall list (kept by reference, so later appends can be
+        announced with add_wall). `points` (start, goal) count towards the
+        maze bounds used by fit().
+        """
+        for item in self.items.values():
+            self.cv.delete(item)
+        self.items.clear()
+        self.walls = walls
+        self.grid = WallGrid(walls, cell=GRID_CELL, pad=0)
+        self.bounds = self._bounds([(x, y) for x1, y1, x2, y2 in walls for x, y in ((x1, y1), (x2, y2))]
+                                   + [tuple(p) for p in points])
+        if fit:
+            self.fit()
+        else:
+            self.refresh()
+
+    def add_wall(self):
+        """Registers and draws the wall just appended to the list."""
+        i = len(self.walls) - 1
+        self.grid.add(i)
+        x1, y1, x2, y2 = self.walls[i]
+        self.bounds = self._bounds(((x1, y1), (x2, y2)), self.bounds)
+        self.refresh()
+
+    def _bounds(self, points, start=None):
+        """Bounding box of `points` and `start` (the default view if None)."""
+        x0, y0, x1, y1 = start or self.home
+        for x, y in points:
+            x0, y0, x1, y1 = min(x0, x), min(y0, y), max(x1, x), max(y1, y)
+        return x0, y0, x1, y1
+
+    def refresh(self):
+        """Creates lines for walls that came into view and deletes the ones that left it."""
+        x0, y0, x1, y1 = self.rect()
+        pad = self.span * MARGIN
+        visible = self.grid.in_rect(x0 - pad, y0 - pad, x1 + pad, y1 + pad)
+        for i in [i for i in self.items if i not in visible]:
+            self.cv.delete(self.items.pop(i))
+        xs, ys = self.screen.xscale, self.screen.yscale
+        created = False
+        for i in visible:
+            wx1, wy1, wx2, wy2 = self.walls[i]
+            coords = (wx1 * xs, -wy1 * ys, wx2 * xs, -wy2 * ys)
+            item = self.items.get(i)
+            if item is None:
+                self.items[i] = self.cv.create_line(*coords, fill=self.color, width=self.width,
+                                                    capstyle="round", tags="wall")
+                created = True
+            else:
+                self.cv.coords(item, *coords)
+        if created:
+            self.cv.tag_lower("wall")   # under turtles, trails and markers
+
+    # --- Mouse ---
+    def bind(self):
+        self.cv.bind("<MouseWheel>", self._on_wheel, add="+")
+        self.cv.bind("<Button-4>", lambda event: self._zoom_at(event, ZOOM_STEP), add="+")
+        self.cv.bind("<Button-5>", lambda event: self._zoom_at(event, 1 / ZOOM_STEP), add="+")
+        for button in (2, 3):
+            self.cv.bind(f"<ButtonPress-{button}>", self._start_drag, add="+")
+            self.cv.bind(f"<B{button}-Motion>", self._on_drag, add="+")
+        self.cv.bind("<Double-Button-3>", lambda event: self.fit(), add="+")
+
+    def world_point(self, event):
+        """World coordinates under a mouse event (as turtle's click handler computes them)."""
+        return (self.cv.canvasx(event.x) / self.screen.xscale,
+                -self.cv.canvasy(event.y) / self.screen.yscale)
+
+    def _on_wheel(self, event):
+        self._zoom_at(event, ZOOM_STEP if event.delta > 0 else 1 / ZOOM_STEP)
+
+    def _zoom_at(self, event, factor):
+        self.zoom(factor, *self.world_point(event))
+
+    def _start_drag(self, event):
+        self._drag = (event.x, event.y)
+
+    def _on_drag(self, event):
+        if self._drag is None:
+            return
+        (last_x, last_y), self._drag = self._drag, (event.x, event.y)
+        self.pan(-(event.x - last_x) / self.screen.xscale, (event.y - last_y) / self.screen.yscale)
+